@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+asyncio helpers to run the blocking polars IO calls off the event loop.
+
+Polars releases the GIL while encoding and decoding, so running the calls
+in a thread pool lets an asyncio application serve many exports concurrently.
+A :class:`ConcurrencyLimiter` bounds how many of them run at the same time,
+either per :class:`~polars_writer.writer.Writer` or globally.
+"""
+
+import typing as T
+import weakref
+import functools
+import threading
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+class ConcurrencyLimiter:
+    """
+    A semaphore that can be shared by multiple event loops.
+
+    ``asyncio.Semaphore`` is bound to the event loop it is used on,
+    this class lazily creates one semaphore per running event loop,
+    so a limiter can be created at import time and used anywhere.
+
+    :param limit: The max number of concurrent operations.
+    """
+
+    def __init__(self, limit: int):
+        if limit < 1:
+            raise ValueError(f"limit must be greater than 0, got {limit}")
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._semaphores: T.MutableMapping[
+            "asyncio.AbstractEventLoop", "asyncio.Semaphore"
+        ] = weakref.WeakKeyDictionary()
+
+    def get_semaphore(self) -> "asyncio.Semaphore":
+        """
+        Get the semaphore for the current running event loop.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            try:
+                return self._semaphores[loop]
+            except KeyError:
+                semaphore = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = semaphore
+                return semaphore
+
+    async def __aenter__(self):
+        await self.get_semaphore().acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.get_semaphore().release()
+
+
+_global_limiter: T.Optional[ConcurrencyLimiter] = None
+
+
+def set_global_concurrency(limit: T.Optional[int]):
+    """
+    Set the max number of concurrent async operations for all
+    :class:`~polars_writer.writer.Writer` that don't have their own limiter.
+    Set it to None to remove the limit.
+    """
+    global _global_limiter
+    if limit is None:
+        _global_limiter = None
+    else:
+        _global_limiter = ConcurrencyLimiter(limit)
+
+
+def get_global_limiter() -> T.Optional[ConcurrencyLimiter]:
+    """
+    Get the global :class:`ConcurrencyLimiter`, None if it is not set.
+    """
+    return _global_limiter
+
+
+async def run_in_thread(
+    limiter: T.Optional[ConcurrencyLimiter],
+    func: T.Callable,
+    *args,
+    **kwargs,
+):
+    """
+    Run a blocking function in the default executor of the running event loop,
+    optionally bounded by a :class:`ConcurrencyLimiter`.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    partial = functools.partial(func, *args, **kwargs)
+    if limiter is None:
+        return await loop.run_in_executor(None, partial)
+    async with limiter:
+        return await loop.run_in_executor(None, partial)
@@ -1,3 +1,27 @@
 # -*- coding: utf-8 -*-
 
+from .compression import TextCompressionEnum
+from .aio import ConcurrencyLimiter
+from .aio import set_global_concurrency
+from .aio import get_global_limiter
+from .autotune import ObjectiveEnum
+from .hooks import IOEvent
+from .hooks import WriteResult
+from .hooks import ReadResult
+from .hooks import HookRegistry
+from .hooks import hook_registry
+from .plan import WritePlan
+from .plan import ReadPlan
+from .plan import ScanPlan
+from .s3 import S3MultipartUpload
+from .delta import DeltaAppendBuffer
+from .delta import UpsertResult
+from .filters import FilterOpEnum
+from .cache import ParquetMetadataCache
+from .cache import ReadCache
+from .transform import DtypeEnum
+from .transform import TransformResult
+from .writer import BatchItemResult
+from .writer import RolledFile
+from .writer import AppendSession
 from .writer import Writer
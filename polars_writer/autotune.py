@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pick the parquet compression, compression level and row group size for a
+dataset by trial-encoding a sample in memory, see :meth:`Writer.autotune
+<polars_writer.writer.Writer.autotune>`.
+"""
+
+import typing as T
+import io
+import enum
+import time
+import dataclasses
+
+from func_args import NOTHING
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    from .writer import Writer
+
+
+class ObjectiveEnum(str, enum.Enum):
+    """
+    Enumeration of the autotune objectives.
+
+    - ``size``: the smallest output.
+    - ``write_speed``: the fastest encoding.
+    - ``read_speed``: the fastest decoding.
+    - ``balanced``: the best sum of size, write time and read time,
+      each normalized by the best value of all trials.
+    """
+
+    size = "size"
+    write_speed = "write_speed"
+    read_speed = "read_speed"
+    balanced = "balanced"
+
+
+DEFAULT_COMPRESSION_CANDIDATES: T.List[T.Tuple[str, T.Optional[int]]] = [
+    ("zstd", 3),
+    ("snappy", None),
+    ("lz4", None),
+    ("zstd", 1),
+    ("zstd", 9),
+    ("uncompressed", None),
+    ("gzip", 6),
+    ("brotli", 5),
+    ("zstd", 15),
+    ("gzip", 9),
+]
+"""
+``(parquet_compression, parquet_compression_level)`` candidates, in the order
+they are tried, the most commonly good choices first, so a small budget
+still covers them.
+"""
+
+DEFAULT_ROW_GROUP_SIZE_CANDIDATES: T.List[int] = [
+    16_384,
+    65_536,
+    262_144,
+    1_048_576,
+]
+"""
+``parquet_row_group_size`` candidates, only the ones smaller than the
+sample are tried, because a row group larger than the sample is the same
+as the default in the trial.
+"""
+
+
+@dataclasses.dataclass
+class Trial:
+    """
+    The measurement of one candidate setting.
+    """
+
+    compression: str = dataclasses.field()
+    compression_level: T.Optional[int] = dataclasses.field()
+    row_group_size: T.Optional[int] = dataclasses.field()
+    output_bytes: int = dataclasses.field()
+    write_seconds: float = dataclasses.field()
+    read_seconds: float = dataclasses.field()
+
+
+def run_trial(
+    df: "pl.DataFrame",
+    compression: str,
+    compression_level: T.Optional[int],
+    row_group_size: T.Optional[int],
+    repeat: int = 1,
+) -> Trial:
+    """
+    Encode and decode the DataFrame in memory with the given setting,
+    keep the best time of ``repeat`` runs.
+    """
+    import polars as pl
+
+    kwargs = dict(compression=compression)
+    if compression_level is not None:
+        kwargs["compression_level"] = compression_level
+    if row_group_size is not None:
+        kwargs["row_group_size"] = row_group_size
+    write_seconds = None
+    read_seconds = None
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        df.write_parquet(buffer, **kwargs)
+        elapsed = time.perf_counter() - start
+        write_seconds = elapsed if write_seconds is None else min(write_seconds, elapsed)
+        data = buffer.getvalue()
+        start = time.perf_counter()
+        pl.read_parquet(data)
+        elapsed = time.perf_counter() - start
+        read_seconds = elapsed if read_seconds is None else min(read_seconds, elapsed)
+    return Trial(
+        compression=compression,
+        compression_level=compression_level,
+        row_group_size=row_group_size,
+        output_bytes=len(data),
+        write_seconds=write_seconds,
+        read_seconds=read_seconds,
+    )
+
+
+def pick_best(trials: T.List[Trial], objective: str) -> Trial:
+    """
+    Pick the best trial for the objective.
+    """
+    if objective == ObjectiveEnum.size.value:
+        key = lambda t: (t.output_bytes, t.write_seconds)
+    elif objective == ObjectiveEnum.write_speed.value:
+        key = lambda t: (t.write_seconds, t.output_bytes)
+    elif objective == ObjectiveEnum.read_speed.value:
+        key = lambda t: (t.read_seconds, t.output_bytes)
+    elif objective == ObjectiveEnum.balanced.value:
+        min_bytes = max(min(t.output_bytes for t in trials), 1)
+        min_write = max(min(t.write_seconds for t in trials), 1e-9)
+        min_read = max(min(t.read_seconds for t in trials), 1e-9)
+        key = lambda t: (
+            t.output_bytes / min_bytes
+            + t.write_seconds / min_write
+            + t.read_seconds / min_read
+        )
+    else:
+        raise ValueError(f"Invalid objective: {objective}")
+    return min(trials, key=key)
+
+
+def autotune(
+    writer: "Writer",
+    sample_df: "pl.DataFrame",
+    objective: str = ObjectiveEnum.balanced.value,
+    budget_seconds: float = 10.0,
+    compression_candidates: T.Optional[
+        T.List[T.Tuple[str, T.Optional[int]]]
+    ] = None,
+    row_group_size_candidates: T.Optional[T.List[int]] = None,
+    repeat: int = 1,
+) -> T.Tuple["Writer", T.List[Trial]]:
+    """
+    Trial-encode the sample over the candidate settings and return a copy of
+    the writer with the best parquet compression, level and row group size,
+    together with all the trials.
+
+    The compression candidates are tried first with the default row group
+    size, then the row group size candidates with the best compression.
+    No new trial starts after ``budget_seconds``, but at least one trial runs.
+    """
+    if writer.is_parquet() is False:
+        raise ValueError("autotune only supports 'parquet' format!")
+    try:
+        ObjectiveEnum[objective]
+    except KeyError:
+        raise ValueError(f"Invalid objective: {objective}")
+    if compression_candidates is None:
+        compression_candidates = DEFAULT_COMPRESSION_CANDIDATES
+    if row_group_size_candidates is None:
+        row_group_size_candidates = DEFAULT_ROW_GROUP_SIZE_CANDIDATES
+
+    deadline = time.perf_counter() + budget_seconds
+    trials = list()
+    for compression, level in compression_candidates:
+        if trials and time.perf_counter() > deadline:
+            break
+        trials.append(run_trial(sample_df, compression, level, None, repeat=repeat))
+    best = pick_best(trials, objective)
+
+    for row_group_size in row_group_size_candidates:
+        if row_group_size >= sample_df.height:
+            continue
+        if time.perf_counter() > deadline:
+            break
+        trials.append(
+            run_trial(
+                sample_df,
+                best.compression,
+                best.compression_level,
+                row_group_size,
+                repeat=repeat,
+            )
+        )
+    best = pick_best(trials, objective)
+
+    tuned_writer = dataclasses.replace(
+        writer,
+        parquet_compression=best.compression,
+        parquet_compression_level=(
+            NOTHING if best.compression_level is None else best.compression_level
+        ),
+        parquet_row_group_size=(
+            NOTHING if best.row_group_size is None else best.row_group_size
+        ),
+    )
+    return tuned_writer, trials
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite for every :class:`~polars_writer.writer.FormatEnum` and
+compression combination over synthetic data shapes.
+
+Run it with::
+
+    python -m polars_writer.bench --shapes narrow wide --rows 1000 1000000
+
+The result is a JSON document with write / read / scan throughput,
+output size and peak memory of each case, together with the polars and
+polars_writer versions, so regressions can be compared across releases.
+"""
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Command line entry point of the benchmark suite::
+
+    python -m polars_writer.bench --help
+"""
+
+import json
+import argparse
+from pathlib import Path
+
+from ..writer import FormatEnum
+from .data import DataShapeEnum
+from .runner import BenchmarkConfig, run_suite
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m polars_writer.bench",
+        description="Benchmark polars_writer formats and compressions.",
+    )
+    parser.add_argument(
+        "--shapes",
+        nargs="+",
+        choices=[shape.value for shape in DataShapeEnum],
+        default=[shape.value for shape in DataShapeEnum],
+    )
+    parser.add_argument(
+        "--rows",
+        nargs="+",
+        type=lambda s: int(float(s)),
+        default=[1_000, 100_000],
+        help="number of rows, scientific notation like 1e6 is accepted",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=[format.value for format in FormatEnum],
+        default=None,
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="output json file")
+    parser.add_argument("--quiet", action="store_true")
+    ns = parser.parse_args(args)
+
+    config = BenchmarkConfig(
+        shapes=ns.shapes,
+        row_counts=ns.rows,
+        formats=ns.formats,
+        repeat=ns.repeat,
+        seed=ns.seed,
+    )
+    report = run_suite(config, verbose=not ns.quiet)
+    text = json.dumps(report, indent=4)
+    if ns.output is None:
+        print(text)
+    else:
+        ns.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic DataFrame generators for the benchmark.
+"""
+
+import typing as T
+import enum
+
+import polars as pl
+
+
+class DataShapeEnum(str, enum.Enum):
+    """
+    Enumeration of synthetic data shapes.
+
+    - ``narrow``: 3 mixed type columns.
+    - ``wide``: 100 numeric columns.
+    - ``string_heavy``: 8 string columns with low and high cardinality.
+    - ``numeric``: 8 int / float columns.
+    - ``nulls``: 8 mixed type columns, about half of the values are null.
+    """
+
+    narrow = "narrow"
+    wide = "wide"
+    string_heavy = "string_heavy"
+    numeric = "numeric"
+    nulls = "nulls"
+
+
+def _index(n_rows: int) -> pl.Expr:
+    return pl.int_range(0, n_rows, dtype=pl.Int64)
+
+
+def _hashed(n_rows: int, seed: int) -> pl.Expr:
+    """
+    A deterministic pseudo random UInt64 column.
+    """
+    return _index(n_rows).hash(seed=seed)
+
+
+def _frame(n_rows: int, exprs: T.Dict[str, pl.Expr]) -> pl.DataFrame:
+    return pl.select(**exprs)
+
+
+def make_frame(
+    shape: str,
+    n_rows: int,
+    seed: int = 0,
+) -> pl.DataFrame:
+    """
+    Generate a deterministic synthetic DataFrame.
+
+    :param shape: One of :class:`DataShapeEnum`.
+    :param n_rows: The number of rows.
+    :param seed: The random seed.
+    """
+    if shape == DataShapeEnum.narrow.value:
+        return _frame(
+            n_rows,
+            dict(
+                id=_index(n_rows),
+                value=(_hashed(n_rows, seed) % 1_000_000).cast(pl.Float64) / 100,
+                tag=pl.format("tag-{}", _hashed(n_rows, seed + 1) % 100),
+            ),
+        )
+    elif shape == DataShapeEnum.wide.value:
+        return _frame(
+            n_rows,
+            {
+                f"c{i:03d}": (_hashed(n_rows, seed + i) % 1_000_000).cast(pl.Int64)
+                for i in range(100)
+            },
+        )
+    elif shape == DataShapeEnum.string_heavy.value:
+        exprs = dict()
+        for i in range(4):
+            exprs[f"low_card_{i}"] = pl.format(
+                "category-{}", _hashed(n_rows, seed + i) % 20
+            )
+        for i in range(4):
+            exprs[f"high_card_{i}"] = pl.format(
+                "user-{}-{}", _hashed(n_rows, seed + 10 + i), _index(n_rows)
+            )
+        return _frame(n_rows, exprs)
+    elif shape == DataShapeEnum.numeric.value:
+        exprs = dict()
+        for i in range(4):
+            exprs[f"int_{i}"] = (_hashed(n_rows, seed + i) % 1_000_000_000).cast(
+                pl.Int64
+            )
+        for i in range(4):
+            exprs[f"float_{i}"] = (
+                _hashed(n_rows, seed + 10 + i) % 1_000_000
+            ).cast(pl.Float64) / 1000
+        return _frame(n_rows, exprs)
+    elif shape == DataShapeEnum.nulls.value:
+        exprs = dict()
+        for i in range(8):
+            if i % 2:
+                value = pl.format("v-{}", _hashed(n_rows, seed + i) % 1000)
+            else:
+                value = (_hashed(n_rows, seed + i) % 1000).cast(pl.Int64)
+            is_null = (_hashed(n_rows, seed + 100 + i) % 2) == 0
+            exprs[f"c{i}"] = pl.when(is_null).then(None).otherwise(value)
+        return _frame(n_rows, exprs)
+    else:
+        raise ValueError(f"Invalid shape: {shape}")
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measure the per-call dispatch overhead of :meth:`Writer.write
+<polars_writer.writer.Writer.write>` versus a compiled
+:class:`~polars_writer.plan.WritePlan`.
+
+Run it with::
+
+    python -m polars_writer.bench.dispatch
+"""
+
+import typing as T
+import io
+import json
+import time
+
+import polars as pl
+
+from ..writer import Writer
+
+
+class NoopFrame:
+    """
+    A stand-in for ``polars.DataFrame`` whose write methods do nothing,
+    so only the dispatch overhead is measured.
+    """
+
+    def write_csv(self, *args, **kwargs):
+        pass
+
+    def write_parquet(self, *args, **kwargs):
+        pass
+
+
+def _ns_per_call(func: T.Callable[[], T.Any], n_calls: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(n_calls):
+        func()
+    return (time.perf_counter_ns() - start) / n_calls
+
+
+def run_dispatch_benchmark(
+    writer: T.Optional[Writer] = None,
+    n_calls: int = 100_000,
+) -> T.Dict[str, T.Any]:
+    """
+    :param writer: The writer to benchmark, default to a csv writer with
+        a few options.
+    :param n_calls: The number of calls for the dispatch-only measurement,
+        the end to end measurement uses 1/10 of it.
+
+    :return: ns per call of ``Writer.write`` and ``WritePlan.execute``,
+        dispatch only and end to end with a tiny frame.
+    """
+    if writer is None:
+        writer = Writer(
+            format="csv",
+            csv_include_header=True,
+            csv_delimiter=",",
+            csv_null_value="",
+        )
+    plan = writer.compile()
+    noop = NoopFrame()
+    file_args = [None]
+    overrides = {"include_header": False}
+    result = {
+        "format": writer.format,
+        "n_calls": n_calls,
+        "dispatch_writer_ns": _ns_per_call(
+            lambda: writer.write(noop, file_args, write_kwargs=overrides),
+            n_calls,
+        ),
+        "dispatch_plan_ns": _ns_per_call(
+            lambda: plan.execute(noop, file_args, overrides=overrides),
+            n_calls,
+        ),
+    }
+
+    df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+    n_e2e_calls = max(n_calls // 10, 1)
+    result["end_to_end_writer_ns"] = _ns_per_call(
+        lambda: writer.write(df, [io.BytesIO()], write_kwargs=overrides),
+        n_e2e_calls,
+    )
+    result["end_to_end_plan_ns"] = _ns_per_call(
+        lambda: plan.execute(df, [io.BytesIO()], overrides=overrides),
+        n_e2e_calls,
+    )
+    result["dispatch_speedup"] = (
+        result["dispatch_writer_ns"] / result["dispatch_plan_ns"]
+    )
+    return result
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_dispatch_benchmark(), indent=4))
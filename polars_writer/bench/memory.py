@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Peak memory measurement for the benchmark.
+
+Most of the polars allocations happen in Rust, they are invisible to
+``tracemalloc``, so the resident set size (RSS) of the process is sampled
+by a background thread instead.
+"""
+
+import typing as T
+import os
+import sys
+import threading
+
+
+def get_rss() -> T.Optional[int]:
+    """
+    Get the current resident set size of this process in bytes,
+    None if it is not available on this platform.
+    """
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:  # pragma: no cover
+        pass
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return None  # pragma: no cover
+
+
+class PeakMemorySampler:
+    """
+    Sample the RSS in a background thread and record the peak.
+    Use it as a context manager::
+
+        with PeakMemorySampler() as sampler:
+            df.write_parquet(path)
+        print(sampler.peak_delta)
+
+    :param interval: The sampling interval in seconds.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline: T.Optional[int] = None
+        self.peak: T.Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: T.Optional[threading.Thread] = None
+
+    def _sample(self):
+        rss = get_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    @property
+    def peak_delta(self) -> T.Optional[int]:
+        """
+        The peak RSS increase in bytes compared to the start.
+        """
+        if self.baseline is None or self.peak is None:
+            return None
+        return max(self.peak - self.baseline, 0)
+
+    def __enter__(self) -> "PeakMemorySampler":
+        self.baseline = get_rss()
+        self.peak = self.baseline
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""
+Run the benchmark cases and collect the metrics.
+"""
+
+import typing as T
+import sys
+import time
+import shutil
+import platform
+import tempfile
+import datetime
+import dataclasses
+from pathlib import Path
+
+import polars as pl
+
+from .._version import __version__
+from ..writer import FormatEnum, ParquetCompressionEnum, IpcCompressionEnum, Writer
+from ..compression import TextCompressionEnum
+from .data import DataShapeEnum, make_frame
+from .memory import PeakMemorySampler
+
+
+def iter_writers(
+    formats: T.Optional[T.Iterable[str]] = None,
+) -> T.Iterator[T.Tuple[T.Optional[str], Writer]]:
+    """
+    Yield ``(compression, writer)`` for every format and compression
+    combination, compression is None for the uncompressed text formats and
+    for delta.
+
+    :param formats: Only yield these formats, all :class:`FormatEnum` if None.
+    """
+    if formats is None:
+        formats = [format.value for format in FormatEnum]
+    for format in formats:
+        if format == FormatEnum.parquet.value:
+            for compression in ParquetCompressionEnum:
+                yield compression.value, Writer(
+                    format=format,
+                    parquet_compression=compression.value,
+                )
+        elif format == FormatEnum.delta.value:
+            yield None, Writer(format=format, delta_mode="overwrite")
+        elif format in (FormatEnum.ipc.value, FormatEnum.ipc_stream.value):
+            for compression in IpcCompressionEnum:
+                yield compression.value, Writer(
+                    format=format,
+                    **{f"{format}_compression": compression.value},
+                )
+        else:
+            yield None, Writer(format=format)
+            for compression in TextCompressionEnum:
+                yield compression.value, Writer(
+                    format=format,
+                    **{f"{format}_compression": compression.value},
+                )
+
+
+def get_output_size(path: Path) -> int:
+    """
+    Get the size in bytes of a file, or the total size of a directory.
+    """
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.glob("**/*") if p.is_file())
+    return path.stat().st_size
+
+
+def _timeit(func: T.Callable, repeat: int) -> T.Tuple[float, T.Optional[int]]:
+    """
+    Run the function ``repeat`` times, return the best elapsed seconds
+    and the peak memory increase of all runs.
+    """
+    best = None
+    peak = None
+    for _ in range(repeat):
+        with PeakMemorySampler() as sampler:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if sampler.peak_delta is not None:
+            peak = sampler.peak_delta if peak is None else max(peak, sampler.peak_delta)
+    return best, peak
+
+
+def _throughput(
+    prefix: str,
+    elapsed: float,
+    n_rows: int,
+    n_bytes: int,
+    peak: T.Optional[int],
+) -> T.Dict[str, T.Any]:
+    return {
+        f"{prefix}_seconds": elapsed,
+        f"{prefix}_rows_per_second": n_rows / elapsed if elapsed else None,
+        f"{prefix}_mb_per_second": n_bytes / 1_000_000 / elapsed if elapsed else None,
+        f"{prefix}_peak_memory_bytes": peak,
+    }
+
+
+def run_case(
+    writer: Writer,
+    df: pl.DataFrame,
+    dir_tmp: Path,
+    repeat: int = 3,
+) -> T.Dict[str, T.Any]:
+    """
+    Benchmark write, read and scan of one DataFrame with one writer.
+
+    The MB/s metrics are based on the in-memory ``estimated_size`` of
+    the DataFrame, so they are comparable across formats.
+
+    :return: A JSON serializable dict of metrics, with an ``error`` key if
+        the combination is not supported.
+    """
+    path = dir_tmp.joinpath(f"data.{writer.get_file_ext()}")
+    if path.is_dir():
+        shutil.rmtree(path)
+    n_rows = df.height
+    n_bytes = df.estimated_size()
+    metrics = dict()
+    try:
+        elapsed, peak = _timeit(
+            lambda: writer.write(df, file_args=[path]),
+            repeat=repeat,
+        )
+        metrics.update(_throughput("write", elapsed, n_rows, n_bytes, peak))
+        metrics["output_bytes"] = get_output_size(path)
+
+        file_args = [str(path)] if writer.is_delta() else [path]
+        elapsed, peak = _timeit(
+            lambda: writer.read(file_args=file_args),
+            repeat=repeat,
+        )
+        metrics.update(_throughput("read", elapsed, n_rows, n_bytes, peak))
+
+        if writer.has_scan():
+            elapsed, peak = _timeit(
+                lambda: writer.scan(file_args=file_args).collect(),
+                repeat=repeat,
+            )
+            metrics.update(_throughput("scan", elapsed, n_rows, n_bytes, peak))
+    except Exception as e:
+        metrics["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink()
+    return metrics
+
+
+def get_environment() -> T.Dict[str, T.Any]:
+    """
+    Get the versions and platform info to put in the benchmark report.
+    """
+    return {
+        "polars_writer_version": __version__,
+        "polars_version": pl.__version__,
+        "python_version": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+@dataclasses.dataclass
+class BenchmarkConfig:
+    """
+    The benchmark suite configuration.
+
+    :param shapes: The data shapes, see :class:`~polars_writer.bench.data.DataShapeEnum`.
+    :param row_counts: The number of rows of each generated DataFrame.
+    :param formats: The formats to benchmark, all formats if None.
+    :param repeat: Run each operation this many times and keep the best.
+    :param seed: The random seed of the synthetic data.
+    """
+
+    shapes: T.List[str] = dataclasses.field(
+        default_factory=lambda: [shape.value for shape in DataShapeEnum]
+    )
+    row_counts: T.List[int] = dataclasses.field(
+        default_factory=lambda: [1_000, 100_000]
+    )
+    formats: T.Optional[T.List[str]] = dataclasses.field(default=None)
+    repeat: int = dataclasses.field(default=3)
+    seed: int = dataclasses.field(default=0)
+
+
+def run_suite(
+    config: BenchmarkConfig,
+    dir_tmp: T.Optional[Path] = None,
+    verbose: bool = False,
+) -> T.Dict[str, T.Any]:
+    """
+    Run every format x compression x data shape x row count combination.
+
+    :param config: The benchmark configuration.
+    :param dir_tmp: The working directory for the output files,
+        a temporary directory is used if None.
+    :param verbose: Print progress to stderr.
+
+    :return: A JSON serializable report.
+    """
+    cleanup = dir_tmp is None
+    if dir_tmp is None:
+        dir_tmp = Path(tempfile.mkdtemp(prefix="polars_writer_bench_"))
+    dir_tmp.mkdir(parents=True, exist_ok=True)
+    results = list()
+    try:
+        for shape in config.shapes:
+            for n_rows in config.row_counts:
+                df = make_frame(shape, n_rows, seed=config.seed)
+                for compression, writer in iter_writers(config.formats):
+                    if verbose:  # pragma: no cover
+                        print(
+                            f"{shape} x {n_rows} rows: {writer.format} {compression}",
+                            file=sys.stderr,
+                        )
+                    result = {
+                        "format": writer.format,
+                        "compression": compression,
+                        "shape": shape,
+                        "n_rows": n_rows,
+                        "n_columns": df.width,
+                        "estimated_size_bytes": df.estimated_size(),
+                    }
+                    result.update(run_case(writer, df, dir_tmp, repeat=config.repeat))
+                    results.append(result)
+    finally:
+        if cleanup:
+            shutil.rmtree(dir_tmp, ignore_errors=True)
+    return {
+        "environment": get_environment(),
+        "config": dataclasses.asdict(config),
+        "results": results,
+    }
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parquet split block bloom filters, the lookup side only.
+
+pyarrow writes the bloom filters (see ``parquet_bloom_filters``) but can't
+read them, so this module checks a value against a bitset:
+
+- :func:`bloom_filter_hash` hashes a filter value like the writer did, the
+  64 bits xxHash of its plain encoding, by the ``xxhash`` package if
+  installed, else a pure python version.
+- :func:`bloom_filter_may_contain` checks the hash against the bitset.
+- ``_parse_bloom_filter_header`` reads the size of the bitset from the thrift
+  ``BloomFilterHeader`` before it, only the integer fields are decoded.
+
+The bitsets are read and cached by
+:class:`~polars_writer.cache.BloomFilterReader`.
+"""
+
+import typing as T
+import math
+import struct
+
+try:
+    from xxhash import xxh64_intdigest as _xxh64_intdigest
+except ImportError:  # pragma: no cover
+    _xxh64_intdigest = None
+
+BLOOM_FILTER_MAX_HEADER_SIZE = 64
+"""
+The number of bytes read to parse the bloom filter header if the footer
+doesn't record the bloom filter length.
+"""
+
+_BLOOM_FILTER_SALT = (
+    0x47B6137B,
+    0x44974D91,
+    0x8824AD5B,
+    0xA2B7289D,
+    0x705495C7,
+    0x2DF1424B,
+    0x9EFC4947,
+    0x5C6BFB31,
+)
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_XXH_P1 = 0x9E3779B185EBCA87
+_XXH_P2 = 0xC2B2AE3D27D4EB4F
+_XXH_P3 = 0x165667B19E3779F9
+_XXH_P4 = 0x85EBCA77C2B2AE63
+_XXH_P5 = 0x27D4EB2F165667C5
+
+
+def _rotl64(x: int, r: int) -> int:
+    return ((x << r) | (x >> (64 - r))) & _MASK_64
+
+
+def _xxh64_round(acc: int, lane: int) -> int:
+    acc = (acc + lane * _XXH_P2) & _MASK_64
+    return (_rotl64(acc, 31) * _XXH_P1) & _MASK_64
+
+
+def _xxh64_py(data: bytes, seed: int = 0) -> int:
+    """
+    The pure python 64 bits xxHash, used if the ``xxhash`` package is not
+    installed. The looked up values are a few bytes, so it's fast enough.
+    """
+    n = len(data)
+    i = 0
+    if n >= 32:
+        acc = [
+            (seed + _XXH_P1 + _XXH_P2) & _MASK_64,
+            (seed + _XXH_P2) & _MASK_64,
+            seed,
+            (seed - _XXH_P1) & _MASK_64,
+        ]
+        while i + 32 <= n:
+            for k in range(4):
+                lane = int.from_bytes(data[i + k * 8 : i + k * 8 + 8], "little")
+                acc[k] = _xxh64_round(acc[k], lane)
+            i += 32
+        h = (
+            _rotl64(acc[0], 1)
+            + _rotl64(acc[1], 7)
+            + _rotl64(acc[2], 12)
+            + _rotl64(acc[3], 18)
+        ) & _MASK_64
+        for value in acc:
+            h ^= _xxh64_round(0, value)
+            h = (h * _XXH_P1 + _XXH_P4) & _MASK_64
+    else:
+        h = (seed + _XXH_P5) & _MASK_64
+    h = (h + n) & _MASK_64
+    while i + 8 <= n:
+        h ^= _xxh64_round(0, int.from_bytes(data[i : i + 8], "little"))
+        h = (_rotl64(h, 27) * _XXH_P1 + _XXH_P4) & _MASK_64
+        i += 8
+    if i + 4 <= n:
+        h ^= (int.from_bytes(data[i : i + 4], "little") * _XXH_P1) & _MASK_64
+        h = (_rotl64(h, 23) * _XXH_P2 + _XXH_P3) & _MASK_64
+        i += 4
+    while i < n:
+        h ^= (data[i] * _XXH_P5) & _MASK_64
+        h = (_rotl64(h, 11) * _XXH_P1) & _MASK_64
+        i += 1
+    h ^= h >> 33
+    h = (h * _XXH_P2) & _MASK_64
+    h ^= h >> 29
+    h = (h * _XXH_P3) & _MASK_64
+    h ^= h >> 32
+    return h
+
+
+def xxh64(data: bytes, seed: int = 0) -> int:
+    """
+    The 64 bits xxHash of the data, the hash function of the parquet bloom
+    filter, by the ``xxhash`` package if installed.
+    """
+    if _xxh64_intdigest is None:
+        return _xxh64_py(data, seed)
+    return _xxh64_intdigest(data, seed)
+
+
+def _read_varint(data: bytes, pos: int) -> T.Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_compact_struct(data: bytes, pos: int) -> T.Tuple[T.Dict[int, int], int]:
+    """
+    Read a thrift compact protocol struct of integer and struct fields,
+    return the integer fields by field id and the position after the struct.
+    """
+    fields = dict()
+    field_id = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        if byte == 0:  # stop
+            return fields, pos
+        delta, field_type = byte >> 4, byte & 0x0F
+        if delta:
+            field_id += delta
+        else:
+            field_id, pos = _read_varint(data, pos)
+            field_id = (field_id >> 1) ^ -(field_id & 1)
+        if field_type in (4, 5, 6):  # i16, i32, i64
+            value, pos = _read_varint(data, pos)
+            fields[field_id] = (value >> 1) ^ -(value & 1)
+        elif field_type == 12:  # struct
+            _, pos = _skip_compact_struct(data, pos)
+        else:
+            raise ValueError(f"unexpected thrift field type {field_type}")
+
+
+def _parse_bloom_filter_header(data: bytes) -> T.Tuple[int, int]:
+    """
+    Parse the ``BloomFilterHeader`` at the start of the data.
+
+    :return: The size of the bitset and the size of the header.
+    """
+    fields, header_size = _skip_compact_struct(data, 0)
+    if 1 not in fields or fields[1] <= 0:
+        raise ValueError("invalid bloom filter header")
+    return fields[1], header_size
+
+
+def bloom_filter_hash(value: T.Any, physical_type: str) -> T.Optional[int]:
+    """
+    Get the bloom filter hash of a filter value, the xxHash of its plain
+    encoding in a column of the parquet physical type. None if the value
+    can't be hashed exactly like the writer did, for example a date, or a
+    float zero or NaN, the row group must be read then.
+    """
+    if isinstance(value, bool):
+        return None
+    if physical_type in ("INT32", "INT64"):
+        if isinstance(value, float):
+            if not value.is_integer():
+                return None
+            value = int(value)
+        if not isinstance(value, int):
+            return None
+        n_bytes = 4 if physical_type == "INT32" else 8
+        if not -(2 ** (n_bytes * 8 - 1)) <= value < 2 ** (n_bytes * 8):
+            return None
+        data = (value & (2 ** (n_bytes * 8) - 1)).to_bytes(n_bytes, "little")
+    elif physical_type in ("FLOAT", "DOUBLE"):
+        if not isinstance(value, (int, float)):
+            return None
+        value = float(value)
+        if value == 0 or math.isnan(value):  # -0.0 == 0.0 but hashes differ
+            return None
+        try:
+            data = struct.pack("<f" if physical_type == "FLOAT" else "<d", value)
+        except OverflowError:
+            return None
+    elif physical_type == "BYTE_ARRAY":
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+        elif isinstance(value, bytes):
+            data = value
+        else:
+            return None
+    else:
+        return None
+    return xxh64(data)
+
+
+def bloom_filter_may_contain(bitset: bytes, hash_: int) -> bool:
+    """
+    Check a hash against a split block bloom filter, False means the value
+    is definitely not in the column chunk.
+    """
+    num_blocks = len(bitset) // 32
+    if num_blocks == 0:
+        return True
+    block = ((hash_ >> 32) * num_blocks) >> 32
+    key = hash_ & 0xFFFFFFFF
+    words = struct.unpack_from("<8I", bitset, block * 32)
+    for word, salt in zip(words, _BLOOM_FILTER_SALT):
+        bit = ((key * salt) & 0xFFFFFFFF) >> 27
+        if not word & (1 << bit):
+            return False
+    return True
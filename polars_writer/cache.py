@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+
+"""
+In-memory caches for repeated reads of the same files.
+
+- :class:`ParquetMetadataCache` keeps the parsed parquet footers (schema and
+  row group statistics), keyed by the file identity (path, size and
+  modification time), so a repeated read doesn't fetch and parse the footer
+  again and the row groups that can't match ``read_filter`` are skipped.
+- :class:`ReadCache` keeps the decoded DataFrames, keyed by the file
+  identity and the resolved read arguments, so a repeated identical read
+  returns a clone of the cached frame instead of decoding the file again.
+
+:func:`select_row_groups` prunes the row groups by the min / max and null
+count statistics, and the ``eq`` / ``in`` filters by the split block bloom
+filters written with ``parquet_bloom_filters``, see
+:mod:`polars_writer.bloom`. The bloom filter of a high-cardinality column
+skips the row groups whose value range includes the looked up value but that
+don't have it. The bitsets are read (and cached) by a
+:class:`BloomFilterReader`, it opens the file once for all the bitsets of the
+file. The pruning is at the row group level only, no page is skipped.
+
+Every cache is bounded by a byte budget with LRU eviction, and counts
+hits, misses and evictions. All caches are thread safe.
+"""
+
+import typing as T
+import os
+import math
+import struct
+import threading
+import collections
+from pathlib import Path
+
+from .filters import FilterOpEnum, _parse_value
+from .bloom import (
+    BLOOM_FILTER_MAX_HEADER_SIZE,
+    _parse_bloom_filter_header,
+    bloom_filter_hash,
+    bloom_filter_may_contain,
+)
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    import pyarrow
+    import pyarrow.fs
+    import pyarrow.parquet
+
+
+class FileIdentity(T.NamedTuple):
+    """
+    The identity of a file, a changed size or modification time means
+    a changed file.
+    """
+
+    path: str
+    size: int
+    mtime: T.Any
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet
+
+        return pyarrow.parquet
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "parquet metadata cache and remote file identity require "
+            "the 'pyarrow' package, "
+            "you can install it with 'pip install pyarrow'"
+        )
+
+
+def has_io_source() -> bool:
+    """
+    Check if polars supports the IO source plugins
+    (``polars.io.plugins.register_io_source``), needed to scan the parquet
+    files with the cached footers.
+    """
+    try:
+        from polars.io.plugins import register_io_source  # noqa: F401
+
+        return True
+    except ImportError:  # pragma: no cover
+        return False
+
+
+def is_remote_path(path: T.Union[str, Path]) -> bool:
+    return "://" in str(path)
+
+
+def get_filesystem(
+    path: str,
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> T.Tuple["pyarrow.fs.FileSystem", str]:
+    """
+    Get the pyarrow filesystem and the path in it for a local path or a
+    remote uri. For ``s3://``, the credentials, region and endpoint in
+    ``storage_options`` are used.
+    """
+    _import_pyarrow_parquet()
+    import pyarrow.fs
+
+    if is_remote_path(path) is False:
+        return pyarrow.fs.LocalFileSystem(), os.path.abspath(path)
+    if storage_options and (path.startswith("s3://") or path.startswith("s3a://")):
+        options = {k.lower(): v for k, v in storage_options.items()}
+
+        def pick(*keys):
+            for key in keys:
+                if key in options:
+                    return options[key]
+            return None
+
+        fs = pyarrow.fs.S3FileSystem(
+            access_key=pick("aws_access_key_id", "access_key_id"),
+            secret_key=pick("aws_secret_access_key", "secret_access_key"),
+            session_token=pick("aws_session_token", "session_token", "token"),
+            region=pick("aws_region", "region", "region_name"),
+            endpoint_override=pick(
+                "aws_endpoint_url", "aws_endpoint", "endpoint_url", "endpoint"
+            ),
+        )
+        return fs, path.split("://", 1)[1]
+    return pyarrow.fs.FileSystem.from_uri(path)
+
+
+def get_file_identity(
+    path: T.Union[str, Path],
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> FileIdentity:
+    """
+    Get the identity of a local file by ``os.stat``, or of a remote object
+    by a metadata request (no data is read).
+    """
+    path = str(path)
+    if is_remote_path(path) is False:
+        stat = os.stat(path)
+        return FileIdentity(path=path, size=stat.st_size, mtime=stat.st_mtime_ns)
+    fs, fs_path = get_filesystem(path, storage_options)
+    info = fs.get_file_info(fs_path)
+    return FileIdentity(path=path, size=info.size, mtime=info.mtime)
+
+
+class _LRUCache:
+    """
+    A thread safe LRU cache bounded by the total size of the values.
+    """
+
+    def __init__(self, max_bytes: int):
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be greater than 0, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: T.OrderedDict[T.Hashable, T.Tuple[T.Any, int]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: T.Hashable) -> T.Any:
+        """
+        Get the value and count a hit, or return None and count a miss.
+        """
+        with self._lock:
+            try:
+                value, _ = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _put(self, key: T.Hashable, value: T.Any, size: int):
+        """
+        Put the value, evict the least recently used ones to fit the budget.
+        A value larger than the budget is not cached.
+        """
+        with self._lock:
+            if key in self._data:
+                _, old_size = self._data.pop(key)
+                self.current_bytes -= old_size
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def _discard_stale(self, identities: T.Iterable[FileIdentity]):
+        """
+        Remove the entries that depend on an older identity of the files,
+        the first item of a key is a tuple of :class:`FileIdentity`.
+        """
+        current = {identity.path: identity for identity in identities}
+        with self._lock:
+            for key in list(self._data):
+                for identity in key[0]:
+                    if current.get(identity.path, identity) != identity:
+                        _, size = self._data.pop(key)
+                        self.current_bytes -= size
+                        break
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> T.Dict[str, int]:
+        """
+        Get the counters and the current usage.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            n_items=len(self._data),
+            current_bytes=self.current_bytes,
+            max_bytes=self.max_bytes,
+        )
+
+
+class ParquetMetadataCache(_LRUCache):
+    """
+    A cache of parsed parquet footers (``pyarrow.parquet.FileMetaData``),
+    keyed by :class:`FileIdentity`. It is opt-in, assign it to
+    :attr:`Writer.metadata_cache <polars_writer.writer.Writer.metadata_cache>`::
+
+        writer.metadata_cache = ParquetMetadataCache(max_bytes=64 * 1024 * 1024)
+
+    The size of an entry is the serialized size of the footer.
+
+    :param max_bytes: The byte budget of the cache.
+    """
+
+    def get_metadata(
+        self,
+        path: T.Union[str, Path],
+        storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pyarrow.parquet.FileMetaData":
+        """
+        Get the footer of the file, from the cache if the file didn't change.
+        """
+        identity = get_file_identity(path, storage_options)
+        key = ((identity,),)
+        metadata = self._get(key)
+        if metadata is not None:
+            return metadata
+        self._discard_stale([identity])
+        pq = _import_pyarrow_parquet()
+        if is_remote_path(identity.path):
+            fs, fs_path = get_filesystem(identity.path, storage_options)
+            with fs.open_input_file(fs_path) as f:
+                metadata = pq.read_metadata(f)
+        else:
+            metadata = pq.read_metadata(identity.path)
+        self._put(key, metadata, metadata.serialized_size)
+        return metadata
+
+    def get_bloom_filter_reader(
+        self,
+        path: T.Union[str, Path],
+        metadata: "pyarrow.parquet.FileMetaData",
+        storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "BloomFilterReader":
+        """
+        Get a :class:`BloomFilterReader` of the file, the bitsets are read
+        on demand and cached in this cache, the size of an entry is the size
+        of the bitset. Close it (or use it as a context manager) when done.
+        """
+        return BloomFilterReader(self, path, metadata, storage_options)
+
+
+class BloomFilterReader:
+    """
+    A function of ``(row_group_index, column_index)`` that returns the bitset
+    of the bloom filter of the column chunk, None if it has no bloom filter,
+    see :meth:`ParquetMetadataCache.get_bloom_filter_reader`.
+
+    The file identity, the filesystem and the file handle are created on the
+    first cache miss and reused for all the bitsets of the file, the file
+    handle is closed by :meth:`close`.
+    """
+
+    def __init__(
+        self,
+        cache: ParquetMetadataCache,
+        path: T.Union[str, Path],
+        metadata: "pyarrow.parquet.FileMetaData",
+        storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    ):
+        self.cache = cache
+        self.path = str(path)
+        self.metadata = metadata
+        self.storage_options = storage_options
+        self._identity: T.Optional[FileIdentity] = None
+        self._file: T.Optional["pyarrow.NativeFile"] = None
+
+    def _get_identity(self) -> FileIdentity:
+        if self._identity is None:
+            self._identity = get_file_identity(self.path, self.storage_options)
+        return self._identity
+
+    def _get_file(self) -> "pyarrow.NativeFile":
+        if self._file is None:
+            fs, fs_path = get_filesystem(self.path, self.storage_options)
+            self._file = fs.open_input_file(fs_path)
+        return self._file
+
+    def __call__(self, i: int, j: int) -> T.Optional[bytes]:
+        column = self.metadata.row_group(i).column(j)
+        offset = column.bloom_filter_offset
+        if not offset or offset < 0:
+            return None
+        key = ((self._get_identity(),), "bloom_filter", i, j)
+        bitset = self.cache._get(key)
+        if bitset is not None:
+            return bitset
+        f = self._get_file()
+        length = column.bloom_filter_length
+        if length and length > 0:
+            data = f.read_at(length, offset)
+        else:
+            data = f.read_at(BLOOM_FILTER_MAX_HEADER_SIZE, offset)
+        try:
+            num_bytes, header_size = _parse_bloom_filter_header(data)
+        except (ValueError, IndexError):
+            return None
+        if len(data) < header_size + num_bytes:
+            data = data[:header_size] + f.read_at(num_bytes, offset + header_size)
+        bitset = bytes(data[header_size : header_size + num_bytes])
+        self.cache._put(key, bitset, len(bitset))
+        return bitset
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "BloomFilterReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReadCache(_LRUCache):
+    """
+    A cache of decoded DataFrames, keyed by the identity of the source files
+    and the resolved read arguments. It is opt-in, assign it to
+    :attr:`Writer.read_cache <polars_writer.writer.Writer.read_cache>`::
+
+        writer.read_cache = ReadCache(max_bytes=1024 * 1024 * 1024)
+
+    The size of an entry is the ``estimated_size`` of the DataFrame. A hit
+    returns a clone of the cached frame, which doesn't copy the data,
+    so the caller can't change the cached one.
+
+    :param max_bytes: The byte budget of the cache.
+    """
+
+    def get_or_read(
+        self,
+        sources: T.List[T.Union[str, Path]],
+        params: T.Hashable,
+        read: T.Callable[[], "pl.DataFrame"],
+        storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pl.DataFrame":
+        """
+        Get the cached DataFrame of the sources and parameters, or call
+        ``read`` and cache the result. The entries of a changed source file
+        are dropped.
+
+        :param sources: The source file paths.
+        :param params: A hashable value of everything else that changes the
+            result, for example the read method and keyword arguments.
+        :param read: The function to read the DataFrame on a miss.
+        """
+        # get the identity before reading, if the file changes during the
+        # read, the next call sees a new identity and reads it again
+        identities = tuple(
+            get_file_identity(source, storage_options) for source in sources
+        )
+        key = (identities, params)
+        df = self._get(key)
+        if df is not None:
+            return df.clone()
+        self._discard_stale(identities)
+        df = read()
+        self._put(key, df, df.estimated_size())
+        return df.clone()
+
+
+def _to_bounds(value: T.Any, is_float32: bool) -> T.Tuple[T.Any, T.Any]:
+    """
+    Get the range of the values a filter value may be compared as. The
+    statistics of a ``Float32`` column are widened to double, but polars
+    compares the column with the literal rounded to ``Float32``, so both
+    the value and its rounded value must be kept, for example ``0.1``.
+    """
+    if not is_float32 or isinstance(value, bool) or not isinstance(
+        value, (int, float)
+    ):
+        return value, value
+    try:
+        rounded = struct.unpack("<f", struct.pack("<f", value))[0]
+    except OverflowError:
+        rounded = math.copysign(math.inf, value)
+    return min(value, rounded), max(value, rounded)
+
+
+def _overlaps(bounds: T.Tuple[T.Any, T.Any], lower: T.Any, upper: T.Any) -> bool:
+    return bounds[0] <= upper and lower <= bounds[1]
+
+
+def _may_contain_any(col: str, value: T.Any) -> bool:
+    return True
+
+
+def _row_group_may_match(
+    spec: T.Dict[str, T.Any],
+    stats: T.Dict[str, T.Any],
+    num_rows: int,
+    may_contain: T.Optional[T.Callable[[str, T.Any], bool]] = None,
+) -> bool:
+    """
+    Check the filter spec against the statistics of one row group,
+    return False only if no row can match. ``stats`` maps a column name
+    to its ``pyarrow`` statistics, missing statistics always match.
+    ``may_contain(col, value)`` checks an ``eq`` / ``in`` value that is
+    within the min / max against the bloom filter of the column.
+    """
+    if "and" in spec:
+        return all(
+            _row_group_may_match(s, stats, num_rows, may_contain)
+            for s in spec["and"]
+        )
+    if "or" in spec:
+        return any(
+            _row_group_may_match(s, stats, num_rows, may_contain)
+            for s in spec["or"]
+        )
+    if "not" in spec:
+        return True
+    col = spec["col"]
+    if may_contain is None:
+        may_contain = _may_contain_any
+    st = stats.get(col)
+    if st is None:
+        return True
+    op = spec["op"]
+    if op == FilterOpEnum.is_null.value:
+        return (not st.has_null_count) or st.null_count > 0
+    if op == FilterOpEnum.is_not_null.value:
+        return (not st.has_null_count) or st.null_count < num_rows
+    if not st.has_min_max:
+        # no min / max, a column with only nulls never matches a comparison
+        return not (st.has_null_count and st.null_count == num_rows)
+    lower, upper = st.min, st.max
+    is_float32 = st.physical_type == "FLOAT"
+    dtype = spec.get("dtype")
+    try:
+        if op in (FilterOpEnum.in_.value, FilterOpEnum.between.value):
+            values = [_parse_value(v, dtype) for v in spec["value"]]
+            values = [v for v in values if v is not None]
+            if op == FilterOpEnum.between.value:
+                if len(values) < 2:
+                    return True
+                low, _ = _to_bounds(values[0], is_float32)
+                _, high = _to_bounds(values[1], is_float32)
+                return not (high < lower or low > upper)
+            return any(
+                _overlaps(_to_bounds(v, is_float32), lower, upper)
+                and may_contain(col, v)
+                for v in values
+            )
+        value = _parse_value(spec["value"], dtype)
+        if value is None:
+            return True
+        low, high = _to_bounds(value, is_float32)
+        if op == FilterOpEnum.eq.value:
+            return _overlaps((low, high), lower, upper) and may_contain(col, value)
+        elif op == FilterOpEnum.ne.value:
+            return not (lower == upper == low == high)
+        elif op == FilterOpEnum.lt.value:
+            return lower < high
+        elif op == FilterOpEnum.le.value:
+            return lower <= high
+        elif op == FilterOpEnum.gt.value:
+            return upper > low
+        elif op == FilterOpEnum.ge.value:
+            return upper >= low
+    except TypeError:  # not comparable, for example int vs str
+        return True
+    return True
+
+
+def select_row_groups(
+    metadata: "pyarrow.parquet.FileMetaData",
+    spec: T.Optional[T.Dict[str, T.Any]],
+    bloom_filter: T.Optional[T.Callable[[int, int], T.Optional[bytes]]] = None,
+) -> T.List[int]:
+    """
+    Get the indices of the row groups that may match the filter spec,
+    by the min / max and null count statistics in the footer.
+
+    :param bloom_filter: A function of ``(row_group_index, column_index)``
+        that returns the bloom filter bitset of the column chunk or None,
+        see :meth:`ParquetMetadataCache.get_bloom_filter_reader`. If given,
+        the ``eq`` / ``in`` filters are checked against the bloom filters too.
+    """
+    if not spec:
+        return list(range(metadata.num_row_groups))
+    selected = list()
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        stats = dict()
+        columns = dict()
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            columns[column.path_in_schema] = (j, column.physical_type)
+            if column.is_stats_set:
+                stats[column.path_in_schema] = column.statistics
+
+        def may_contain(col: str, value: T.Any) -> bool:
+            if col not in columns:
+                return True
+            j, physical_type = columns[col]
+            hash_ = bloom_filter_hash(value, physical_type)
+            if hash_ is None:
+                return True
+            bitset = bloom_filter(i, j)
+            if bitset is None:
+                return True
+            return bloom_filter_may_contain(bitset, hash_)
+
+        if _row_group_may_match(
+            spec,
+            stats,
+            row_group.num_rows,
+            None if bloom_filter is None else may_contain,
+        ):
+            selected.append(i)
+    return selected
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sort and cluster the rows before writing parquet.
+
+The min / max statistics of a row group only prune when the values of a row
+group fall in a narrow range, and runs of similar values compress better.
+Random ordered data gets neither.
+
+- ``parquet_sort_by`` sorts by the columns lexicographically, the best layout
+  for filters on the first sort column. If the output is written by pyarrow
+  (``parquet_use_pyarrow=True``), the sort order is also recorded in the
+  ``sorting_columns`` field of every row group, so readers know the data
+  is sorted.
+- ``parquet_cluster_by`` sorts by a Z-order key, the bits of the dense rank
+  of each column are interleaved, so the rows that are close in every column
+  are close in the file, and filters on any of the columns prune row groups.
+"""
+
+import typing as T
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    import pyarrow
+    import pyarrow.parquet
+
+Z_ORDER_MAX_BITS = 32
+"""
+The max number of bits of each column in the Z-order key.
+"""
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet
+
+        return pyarrow.parquet
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "recording the parquet sort order requires the 'pyarrow' package, "
+            "you can install it with 'pip install pyarrow'"
+        )
+
+
+Z_ORDER_KEY = "__z_order__"
+"""
+The name of the Z-order key column.
+"""
+
+
+def with_z_order_key(data, columns: T.List[str]):
+    """
+    Add the Z-order key of the columns, an ``UInt64`` column named
+    :data:`Z_ORDER_KEY`, to a ``DataFrame`` or ``LazyFrame``.
+
+    The dense rank of each column (null is the lowest) is scaled to
+    ``63 // len(columns)`` bits (at most :data:`Z_ORDER_MAX_BITS`), so the
+    columns weigh the same whatever their cardinality, then the bits of all
+    the columns are interleaved, the highest bits first. Each scaled rank is
+    computed once as a temporary column, the key is built from them.
+    """
+    import polars as pl
+
+    if not columns:
+        raise ValueError("Z-order requires at least one column!")
+    n_columns = len(columns)
+    n_bits = min(63 // n_columns, Z_ORDER_MAX_BITS)
+    max_value = 2**n_bits - 1
+    rank_names = [f"{Z_ORDER_KEY}{i}" for i in range(n_columns)]
+    rank_exprs = list()
+    for col, name in zip(columns, rank_names):
+        rank = pl.col(col).rank("dense").fill_null(0).cast(pl.Float64)
+        scaled = (
+            (rank / pl.max_horizontal(rank.max(), pl.lit(1.0)) * max_value)
+            .floor()
+            .cast(pl.UInt64)
+        )
+        rank_exprs.append(scaled.alias(name))
+    # interleave a byte at a time, the lookup table spreads the 8 bits of
+    # a byte to every ``n_columns``-th bit
+    table = pl.Series(
+        [
+            sum(((byte >> k) & 1) << (k * n_columns) for k in range(8))
+            for byte in range(256)
+        ],
+        dtype=pl.UInt64,
+    )
+    terms = list()
+    for i, name in enumerate(rank_names):
+        for j in range((n_bits + 7) // 8):
+            byte = (pl.col(name) // pl.lit(2 ** (8 * j), dtype=pl.UInt64)) & pl.lit(
+                255, dtype=pl.UInt64
+            )
+            shift = 2 ** (8 * j * n_columns + (n_columns - 1 - i))
+            terms.append(pl.lit(table).gather(byte) * pl.lit(shift, dtype=pl.UInt64))
+    return (
+        data.with_columns(rank_exprs)
+        .with_columns(pl.sum_horizontal(terms).alias(Z_ORDER_KEY))
+        .drop(rank_names)
+    )
+
+
+def sort_by_z_order(data, columns: T.List[str]):
+    """
+    Sort a ``DataFrame`` or ``LazyFrame`` by the Z-order key of the columns,
+    see :func:`with_z_order_key`.
+    """
+    return with_z_order_key(data, columns).sort(Z_ORDER_KEY).drop(Z_ORDER_KEY)
+
+
+def to_sorting_columns(
+    schema: "pyarrow.Schema",
+    by: T.Union[str, T.List[str]],
+    descending: T.Union[bool, T.List[bool]] = False,
+    nulls_last: bool = False,
+) -> T.List["pyarrow.parquet.SortingColumn"]:
+    """
+    Get the parquet ``sorting_columns`` of a polars sort. Only the leading
+    sort columns that exist in the schema are recorded, the sort order of
+    a prefix is still true.
+    """
+    pq = _import_pyarrow_parquet()
+
+    if isinstance(by, str):
+        by = [by]
+    if isinstance(descending, bool):
+        descending = [descending] * len(by)
+    sort_keys = list()
+    for col, desc in zip(by, descending):
+        if col not in schema.names:
+            break
+        sort_keys.append((col, "descending" if desc else "ascending"))
+    if not sort_keys:
+        return []
+    return list(
+        pq.SortingColumn.from_ordering(
+            schema,
+            sort_keys,
+            null_placement="at_end" if nulls_last else "at_start",
+        )
+    )
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming compression for the text formats (CSV, JSON, NDJSON).
+
+Polars encodes text formats into a writable file object chunk by chunk,
+wrapping that file object with a streaming compressor produces the
+compressed output in one pass with bounded memory.
+
+Reading decompresses the source as a stream too, the compressed content
+is read chunk by chunk, local paths, remote uris and file objects.
+
+- ``gzip`` uses the standard library.
+- ``zstd`` requires the `zstandard <https://pypi.org/project/zstandard/>`_ package.
+- ``lz4`` requires the `lz4 <https://pypi.org/project/lz4/>`_ package.
+"""
+
+import typing as T
+import io
+import enum
+import shutil
+import contextlib
+from pathlib import Path
+
+from .cache import is_remote_path, get_filesystem
+
+
+class TextCompressionEnum(str, enum.Enum):
+    """
+    Enumeration of supported streaming compression algorithms for
+    CSV, JSON and NDJSON files.
+    """
+
+    gzip = "gzip"
+    zstd = "zstd"
+    lz4 = "lz4"
+
+
+file_ext_mapper = {
+    TextCompressionEnum.gzip.value: "gz",
+    TextCompressionEnum.zstd.value: "zst",
+    TextCompressionEnum.lz4.value: "lz4",
+}
+"""
+Mapping from compression algorithm to the conventional file extension.
+"""
+
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+"""
+The size of the chunks a compressed source is decompressed by.
+"""
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "zstd compression requires the 'zstandard' package, "
+            "you can install it with 'pip install zstandard'"
+        )
+
+
+def _import_lz4_frame():
+    try:
+        import lz4.frame
+
+        return lz4.frame
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "lz4 compression requires the 'lz4' package, "
+            "you can install it with 'pip install lz4'"
+        )
+
+
+def _wrap_compressor(
+    fileobj: T.BinaryIO,
+    compression: str,
+    level: T.Optional[int] = None,
+) -> T.BinaryIO:
+    """
+    Wrap a writable binary file object with a streaming compressor.
+    Closing the returned object doesn't close the given file object.
+    """
+    if compression == TextCompressionEnum.gzip.value:
+        import gzip
+
+        return gzip.GzipFile(
+            fileobj=fileobj,
+            mode="wb",
+            compresslevel=6 if level is None else level,
+        )
+    elif compression == TextCompressionEnum.zstd.value:
+        zstandard = _import_zstandard()
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.stream_writer(fileobj, closefd=False)
+    elif compression == TextCompressionEnum.lz4.value:
+        lz4_frame = _import_lz4_frame()
+        return lz4_frame.LZ4FrameFile(
+            fileobj,
+            mode="wb",
+            compression_level=0 if level is None else level,
+        )
+    else:
+        raise ValueError(f"Invalid compression: {compression}")
+
+
+@contextlib.contextmanager
+def open_compressor(
+    target: T.Union[str, Path, T.BinaryIO],
+    compression: str,
+    level: T.Optional[int] = None,
+    mode: str = "wb",
+) -> T.Iterator[T.BinaryIO]:
+    """
+    Open a writable binary stream that compresses everything written to it
+    into ``target``.
+
+    :param target: A file path, or a writable binary file object.
+        A file object is not closed on exit.
+    :param compression: One of :class:`TextCompressionEnum`.
+    :param level: Optional compression level, the library default if None.
+    :param mode: The mode to open the file path, use ``"ab"`` to append
+        a new gzip member / zstd frame / lz4 frame to an existing file.
+    """
+    if isinstance(target, (str, Path)):
+        with open(target, mode) as f:
+            with _wrap_compressor(f, compression, level) as stream:
+                yield stream
+    else:
+        with _wrap_compressor(target, compression, level) as stream:
+            yield stream
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    """
+    Decompress the bytes, concatenated gzip members / zstd frames / lz4 frames
+    (for example from multiple appends) are all decompressed.
+    """
+    if compression == TextCompressionEnum.gzip.value:
+        import gzip
+
+        return gzip.decompress(data)
+    elif compression == TextCompressionEnum.zstd.value:
+        zstandard = _import_zstandard()
+        decompressor = zstandard.ZstdDecompressor()
+        with decompressor.stream_reader(
+            io.BytesIO(data),
+            read_across_frames=True,
+        ) as reader:
+            return reader.read()
+    elif compression == TextCompressionEnum.lz4.value:
+        lz4_frame = _import_lz4_frame()
+        with lz4_frame.LZ4FrameFile(io.BytesIO(data), mode="rb") as reader:
+            return reader.read()
+    else:
+        raise ValueError(f"Invalid compression: {compression}")
+
+
+def _wrap_decompressor(fileobj: T.BinaryIO, compression: str) -> T.BinaryIO:
+    """
+    Wrap a readable binary file object with a streaming decompressor,
+    concatenated gzip members / zstd frames / lz4 frames are all read.
+    Closing the returned object doesn't close the given file object.
+    """
+    if compression == TextCompressionEnum.gzip.value:
+        import gzip
+
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    elif compression == TextCompressionEnum.zstd.value:
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(
+            fileobj,
+            read_across_frames=True,
+            closefd=False,
+        )
+    elif compression == TextCompressionEnum.lz4.value:
+        lz4_frame = _import_lz4_frame()
+        return lz4_frame.LZ4FrameFile(fileobj, mode="rb")
+    else:
+        raise ValueError(f"Invalid compression: {compression}")
+
+
+@contextlib.contextmanager
+def open_decompressor(
+    source: T.Union[str, Path, bytes, T.BinaryIO],
+    compression: str,
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> T.Iterator[T.BinaryIO]:
+    """
+    Open a readable binary stream of the decompressed content, the
+    compressed content is read chunk by chunk, never loaded as a whole.
+
+    :param source: A local file path, a remote uri (opened by the pyarrow
+        filesystem with ``storage_options``, for example ``s3://``), bytes
+        or a readable binary file object. A file object is not closed on exit.
+    :param compression: One of :class:`TextCompressionEnum`.
+    :param storage_options: The credentials and options of a remote uri.
+    """
+    with contextlib.ExitStack() as stack:
+        if isinstance(source, (str, Path)):
+            if is_remote_path(source):
+                fs, fs_path = get_filesystem(str(source), storage_options)
+                # compression=None, don't let pyarrow detect it by the extension
+                fileobj = stack.enter_context(
+                    fs.open_input_stream(fs_path, compression=None)
+                )
+            else:
+                fileobj = stack.enter_context(open(source, "rb"))
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            fileobj = io.BytesIO(source)
+        else:
+            fileobj = source
+        yield stack.enter_context(_wrap_decompressor(fileobj, compression))
+
+
+def decompress_to_buffer(
+    source: T.Union[str, Path, bytes, T.BinaryIO],
+    compression: str,
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> io.BytesIO:
+    """
+    Decompress the source as a stream into an ``io.BytesIO``, only the
+    decompressed content is held in memory, see :func:`open_decompressor`.
+    """
+    buffer = io.BytesIO()
+    with open_decompressor(source, compression, storage_options) as stream:
+        shutil.copyfileobj(stream, buffer, DECOMPRESS_CHUNK_SIZE)
+    buffer.seek(0)
+    return buffer
+
+
+def read_and_decompress(
+    source: T.Union[str, Path, bytes, T.BinaryIO],
+    compression: str,
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> bytes:
+    """
+    Read the compressed content from a file path (local or remote), bytes
+    or a readable binary file object and decompress it.
+    """
+    with open_decompressor(source, compression, storage_options) as stream:
+        return stream.read()
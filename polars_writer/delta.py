@@ -0,0 +1,486 @@
+# -*- coding: utf-8 -*-
+
+"""
+Delta Lake helpers on top of the delta config of
+:class:`~polars_writer.writer.Writer`.
+
+- :class:`DeltaAppendBuffer` coalesces many small appends into fewer,
+  right-sized commits, see :meth:`Writer.open_delta_append
+  <polars_writer.writer.Writer.open_delta_append>`.
+- :func:`optimize_table` and :func:`vacuum_table` compact, Z-order and vacuum
+  a table, see :meth:`Writer.delta_optimize
+  <polars_writer.writer.Writer.delta_optimize>` and :meth:`Writer.delta_vacuum
+  <polars_writer.writer.Writer.delta_vacuum>`.
+- :func:`upsert_table` merges a batch into a table with a predicate derived
+  from the batch, so only the affected files are scanned and rewritten, see
+  :meth:`Writer.upsert <polars_writer.writer.Writer.upsert>`.
+
+The maintenance and upsert functions require the
+`deltalake <https://pypi.org/project/deltalake/>`_ package.
+"""
+
+import typing as T
+import math
+import time
+import datetime
+import threading
+import dataclasses
+from pathlib import Path
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    from deltalake import DeltaTable
+    from .writer import Writer
+
+DEFAULT_COALESCE_MAX_ROWS = 1_000_000
+DEFAULT_COALESCE_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_COALESCE_MAX_SECONDS = 60.0
+
+
+class DeltaAppendBuffer:
+    """
+    Buffer the incoming DataFrames in memory and append them to a Delta table
+    as one commit when any threshold is reached:
+
+    - ``max_rows``: the number of buffered rows.
+    - ``max_bytes``: the in-memory ``estimated_size`` of the buffered frames.
+    - ``max_seconds``: the age of the oldest buffered frame, it is checked on
+      :meth:`write` and :meth:`flush_if_due`, call the latter periodically
+      if the input can be idle.
+
+    The remaining frames are committed on :meth:`close`, use it as a context
+    manager. If a commit fails, the frames are kept in the buffer,
+    so the next flush retries them. All methods are thread safe.
+    """
+
+    def __init__(
+        self,
+        writer: "Writer",
+        table: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        max_rows: T.Optional[int] = DEFAULT_COALESCE_MAX_ROWS,
+        max_bytes: T.Optional[int] = DEFAULT_COALESCE_MAX_BYTES,
+        max_seconds: T.Optional[float] = DEFAULT_COALESCE_MAX_SECONDS,
+    ):
+        if writer.is_delta() is False:
+            raise ValueError(
+                f"delta append buffer only supports 'delta' format, "
+                f"got {writer.format!r}!"
+            )
+        self.method, self.kwargs = writer.to_method_and_kwargs()
+        if write_kwargs is not None:  # override default kwargs
+            self.kwargs.update(write_kwargs)
+        mode = self.kwargs.get("mode", "append")
+        if mode != "append":
+            raise ValueError(
+                f"delta append buffer only supports 'append' mode, got {mode!r}!"
+            )
+        self.kwargs["mode"] = "append"
+        self.writer = writer
+        self.table = table
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.n_rows = 0
+        self.n_batches = 0
+        self.n_commits = 0
+        self.pending_rows = 0
+        self.pending_bytes = 0
+        self._pending: T.List["pl.DataFrame"] = list()
+        self._first_pending_time: T.Optional[float] = None
+        self._lock = threading.RLock()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def is_due(self) -> bool:
+        """
+        Check if any threshold is reached.
+        """
+        if not self._pending:
+            return False
+        if self.max_rows is not None and self.pending_rows >= self.max_rows:
+            return True
+        if self.max_bytes is not None and self.pending_bytes >= self.max_bytes:
+            return True
+        if (
+            self.max_seconds is not None
+            and time.monotonic() - self._first_pending_time >= self.max_seconds
+        ):
+            return True
+        return False
+
+    def write(self, df: "pl.DataFrame"):
+        """
+        Buffer the DataFrame, commit the buffer if any threshold is reached.
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("delta append buffer is closed!")
+            if df.height == 0:
+                return
+            if not self._pending:
+                self._first_pending_time = time.monotonic()
+            self._pending.append(df)
+            self.pending_rows += df.height
+            self.pending_bytes += df.estimated_size()
+            self.n_batches += 1
+            if self.is_due():
+                self.flush()
+
+    def flush_if_due(self) -> bool:
+        """
+        Commit the buffer if any threshold is reached, return True if committed.
+        """
+        with self._lock:
+            if self.is_due():
+                self.flush()
+                return True
+            return False
+
+    def flush(self):
+        """
+        Commit all the buffered frames to the Delta table as one transaction,
+        the concatenated frame goes through the ``transform_*`` stage of
+        :meth:`Writer.write <polars_writer.writer.Writer.write>` first.
+        """
+        import polars as pl
+
+        with self._lock:
+            if not self._pending:
+                return
+            if len(self._pending) == 1:
+                df = self._pending[0]
+            else:
+                df = pl.concat(self._pending, how="vertical_relaxed", rechunk=True)
+            df, _, _ = self.writer._prepare(df)
+            self.writer._write_file(df, self.method, self.kwargs, [self.table])
+            self.n_rows += df.height
+            self.n_commits += 1
+            self._pending = list()
+            self._first_pending_time = None
+            self.pending_rows = 0
+            self.pending_bytes = 0
+
+    def close(self):
+        """
+        Commit the remaining frames and close the buffer.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+
+    def __enter__(self) -> "DeltaAppendBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _import_deltalake():
+    try:
+        import deltalake
+
+        return deltalake
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "delta table maintenance requires the 'deltalake' package, "
+            "you can install it with 'pip install deltalake'"
+        )
+
+
+def open_delta_table(
+    table: T.Union[str, Path],
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> "DeltaTable":
+    """
+    Open the Delta table, the same ``storage_options`` as ``write_delta``.
+    """
+    deltalake = _import_deltalake()
+    return deltalake.DeltaTable(str(table), storage_options=storage_options)
+
+
+def optimize_table(
+    table: T.Union[str, Path],
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    target_file_size: T.Optional[int] = None,
+    z_order_by: T.Optional[T.Sequence[str]] = None,
+    partition_filters: T.Optional[T.List[T.Tuple[str, str, T.Any]]] = None,
+    max_concurrent_tasks: T.Optional[int] = None,
+) -> T.Dict[str, T.Any]:
+    """
+    Rewrite the small files of the Delta table into files of about
+    ``target_file_size`` bytes. If ``z_order_by`` is given, the rows are also
+    clustered by the Z-order of these columns, so a filter on any of them
+    skips more files.
+
+    :return: The metrics of the optimize, for example ``numFilesAdded`` and
+        ``numFilesRemoved``.
+    """
+    dt = open_delta_table(table, storage_options)
+    if z_order_by:
+        return dt.optimize.z_order(
+            columns=list(z_order_by),
+            partition_filters=partition_filters,
+            target_size=target_file_size,
+            max_concurrent_tasks=max_concurrent_tasks,
+        )
+    return dt.optimize.compact(
+        partition_filters=partition_filters,
+        target_size=target_file_size,
+        max_concurrent_tasks=max_concurrent_tasks,
+    )
+
+
+def vacuum_table(
+    table: T.Union[str, Path],
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    retention_hours: T.Optional[int] = None,
+    dry_run: bool = False,
+    enforce_retention_duration: bool = True,
+) -> T.List[str]:
+    """
+    Delete the files that are no longer referenced by the Delta table and
+    older than ``retention_hours`` (the table setting, 7 days by default,
+    if None).
+
+    :param dry_run: If True, only list the files to delete. Unlike
+        ``DeltaTable.vacuum``, the default is to delete them.
+    :param enforce_retention_duration: If True, a ``retention_hours`` shorter
+        than the table setting raises an error.
+
+    :return: The list of deleted (or to be deleted) files.
+    """
+    dt = open_delta_table(table, storage_options)
+    return dt.vacuum(
+        retention_hours=retention_hours,
+        dry_run=dry_run,
+        enforce_retention_duration=enforce_retention_duration,
+    )
+
+
+def quote_identifier(name: str) -> str:
+    """
+    Quote a column name for a Delta predicate.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def to_sql_literal(value: T.Any) -> str:
+    """
+    Convert a Python value to a Delta predicate literal.
+
+    An infinite float is cast from a string, NaN is rejected because it's
+    not equal to itself, so it can't be matched by a predicate.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and not math.isfinite(value):
+        if math.isnan(value):
+            raise ValueError("NaN can't be used in a Delta predicate!")
+        return "CAST('inf' AS DOUBLE)" if value > 0 else "CAST('-inf' AS DOUBLE)"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    if isinstance(value, datetime.datetime):
+        return f"CAST('{value.isoformat()}' AS TIMESTAMP)"
+    if isinstance(value, datetime.date):
+        return f"CAST('{value.isoformat()}' AS DATE)"
+    raise TypeError(f"Unsupported predicate literal: {value!r}")
+
+
+def _is_range_value(value: T.Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, float):
+        return value == value  # not NaN
+    if isinstance(value, datetime.datetime):
+        return value.tzinfo is None
+    return isinstance(value, (int, str, datetime.date))
+
+
+def build_upsert_predicate(
+    df: "pl.DataFrame",
+    keys: T.Sequence[str],
+    partition_cols: T.Optional[T.Sequence[str]] = None,
+    source_alias: str = "s",
+    target_alias: str = "t",
+) -> str:
+    """
+    Build the merge predicate for an upsert of the source batch ``df``:
+
+    - ``t.key = s.key`` for each key column.
+    - ``t.col IN (...)`` with the distinct values of each partition column in
+      the batch, it prunes the partitions that are not in the batch.
+    - ``t.key >= min AND t.key <= max`` with the range of each key column in
+      the batch, it skips the files whose statistics are out of the range.
+    """
+    t = target_alias
+    s = source_alias
+    conditions = [
+        f"{t}.{quote_identifier(key)} = {s}.{quote_identifier(key)}" for key in keys
+    ]
+    for col in partition_cols or []:
+        values = df.get_column(col).unique().sort().to_list()
+        non_null = [to_sql_literal(v) for v in values if v is not None]
+        column = f"{t}.{quote_identifier(col)}"
+        parts = list()
+        if non_null:
+            parts.append(f"{column} IN ({', '.join(non_null)})")
+        if len(non_null) < len(values):
+            parts.append(f"{column} IS NULL")
+        conditions.append(parts[0] if len(parts) == 1 else f"({' OR '.join(parts)})")
+    for key in keys:
+        series = df.get_column(key)
+        lower, upper = series.min(), series.max()
+        if _is_range_value(lower) and _is_range_value(upper):
+            column = f"{t}.{quote_identifier(key)}"
+            conditions.append(f"{column} >= {to_sql_literal(lower)}")
+            conditions.append(f"{column} <= {to_sql_literal(upper)}")
+    return " AND ".join(conditions)
+
+
+def build_change_predicate(
+    columns: T.Sequence[str],
+    source_alias: str = "s",
+    target_alias: str = "t",
+) -> T.Optional[str]:
+    """
+    Build the predicate that is true if any of the columns changed,
+    None if there's no column to compare.
+    """
+    if not columns:
+        return None
+    return " OR ".join(
+        f"({target_alias}.{quote_identifier(col)} "
+        f"IS DISTINCT FROM {source_alias}.{quote_identifier(col)})"
+        for col in columns
+    )
+
+
+@dataclasses.dataclass
+class UpsertResult:
+    """
+    The result of :meth:`Writer.upsert <polars_writer.writer.Writer.upsert>`.
+
+    :param n_source_rows: The number of rows in the source batch.
+    :param n_inserted: The number of new rows.
+    :param n_updated: The number of existing rows that changed.
+    :param n_unchanged: The number of existing rows that are the same as
+        the source, they are not rewritten.
+    :param n_files_scanned: The number of target files scanned.
+    :param n_files_skipped: The number of target files skipped by the predicate.
+    :param n_files_added: The number of files written.
+    :param n_files_removed: The number of files rewritten (removed from the table).
+    :param predicate: The merge predicate.
+    :param metrics: The raw metrics of the merge, empty if the table is created.
+    """
+
+    n_source_rows: int = dataclasses.field()
+    n_inserted: int = dataclasses.field()
+    n_updated: int = dataclasses.field()
+    n_unchanged: int = dataclasses.field()
+    n_files_scanned: int = dataclasses.field()
+    n_files_skipped: int = dataclasses.field()
+    n_files_added: int = dataclasses.field()
+    n_files_removed: int = dataclasses.field()
+    predicate: T.Optional[str] = dataclasses.field()
+    metrics: T.Dict[str, T.Any] = dataclasses.field(default_factory=dict)
+
+
+def upsert_table(
+    df: "pl.DataFrame",
+    table: T.Union[str, Path],
+    keys: T.Sequence[str],
+    partition_cols: T.Optional[T.Sequence[str]] = None,
+    storage_options: T.Optional[T.Dict[str, T.Any]] = None,
+    merge_options: T.Optional[T.Dict[str, T.Any]] = None,
+    write_options: T.Optional[T.Dict[str, T.Any]] = None,
+) -> UpsertResult:
+    """
+    Insert the new rows of the source batch and update the changed ones,
+    matched by ``keys``. The rows of a key must live in the partitions given
+    by the source batch, because the other partitions are pruned.
+
+    If the table doesn't exist, it is created and partitioned by
+    ``partition_cols``.
+
+    :param merge_options: Extra options of ``DeltaTable.merge``, the
+        ``predicate`` and the aliases are always derived.
+    :param write_options: Extra options of ``write_deltalake`` when the table
+        is created.
+    """
+    deltalake = _import_deltalake()
+    if not keys:
+        raise ValueError("upsert requires at least one key column!")
+    if not deltalake.DeltaTable.is_deltatable(str(table), storage_options):
+        write_options = dict(write_options or dict())
+        if partition_cols:
+            write_options["partition_by"] = list(partition_cols)
+        df.write_delta(
+            table,
+            mode="error",
+            storage_options=storage_options,
+            delta_write_options=write_options,
+        )
+        return UpsertResult(
+            n_source_rows=df.height,
+            n_inserted=df.height,
+            n_updated=0,
+            n_unchanged=0,
+            n_files_scanned=0,
+            n_files_skipped=0,
+            n_files_added=len(open_delta_table(table, storage_options).files()),
+            n_files_removed=0,
+            predicate=None,
+        )
+
+    source_alias, target_alias = "s", "t"
+    predicate = build_upsert_predicate(
+        df,
+        keys=keys,
+        partition_cols=partition_cols,
+        source_alias=source_alias,
+        target_alias=target_alias,
+    )
+    merge_options = dict(merge_options or dict())
+    merge_options.update(
+        predicate=predicate,
+        source_alias=source_alias,
+        target_alias=target_alias,
+    )
+    merger = df.write_delta(
+        table,
+        mode="merge",
+        storage_options=storage_options,
+        delta_merge_options=merge_options,
+    )
+    change_predicate = build_change_predicate(
+        [col for col in df.columns if col not in keys],
+        source_alias=source_alias,
+        target_alias=target_alias,
+    )
+    if change_predicate is not None:
+        merger = merger.when_matched_update_all(predicate=change_predicate)
+    metrics = merger.when_not_matched_insert_all().execute()
+    n_inserted = metrics.get("num_target_rows_inserted", 0)
+    n_updated = metrics.get("num_target_rows_updated", 0)
+    return UpsertResult(
+        n_source_rows=metrics.get("num_source_rows", df.height),
+        n_inserted=n_inserted,
+        n_updated=n_updated,
+        n_unchanged=df.height - n_inserted - n_updated,
+        n_files_scanned=metrics.get("num_target_files_scanned", 0),
+        n_files_skipped=metrics.get("num_target_files_skipped_during_scan", 0),
+        n_files_added=metrics.get("num_target_files_added", 0),
+        n_files_removed=metrics.get("num_target_files_removed", 0),
+        predicate=predicate,
+        metrics=metrics,
+    )
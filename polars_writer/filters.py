@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+A JSON filter spec for :meth:`Writer.read <polars_writer.writer.Writer.read>`
+and :meth:`Writer.scan <polars_writer.writer.Writer.scan>`, translated into
+a polars expression, so polars pushes it down into ``scan_parquet``,
+``scan_delta``, ``scan_csv`` and ``scan_ndjson``, and skips the row groups
+and files whose statistics don't match.
+
+A comparison::
+
+    {"col": "amount", "op": "ge", "value": 100}
+    {"col": "country", "op": "in", "value": ["US", "CA"]}
+    {"col": "day", "op": "between", "value": ["2024-01-01", "2024-01-31"], "dtype": "date"}
+    {"col": "deleted_at", "op": "is_null"}
+
+A combination::
+
+    {"and": [<spec>, <spec>, ...]}
+    {"or": [<spec>, <spec>, ...]}
+    {"not": <spec>}
+
+``value`` is a JSON scalar (or a list for ``in``, ``not_in`` and ``between``),
+use ``"dtype": "date"`` or ``"dtype": "datetime"`` to compare a date /
+datetime column with ISO 8601 strings.
+"""
+
+import typing as T
+import enum
+import operator
+import datetime
+import functools
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+
+
+class FilterOpEnum(str, enum.Enum):
+    """
+    Enumeration of the comparison operators of the filter spec.
+    """
+
+    eq = "eq"
+    ne = "ne"
+    lt = "lt"
+    le = "le"
+    gt = "gt"
+    ge = "ge"
+    in_ = "in"
+    not_in = "not_in"
+    between = "between"
+    is_null = "is_null"
+    is_not_null = "is_not_null"
+
+
+class FilterDtypeEnum(str, enum.Enum):
+    """
+    Enumeration of the value types that are parsed from ISO 8601 strings.
+    """
+
+    date = "date"
+    datetime = "datetime"
+
+
+_op_values = {op.value for op in FilterOpEnum}
+_list_ops = {
+    FilterOpEnum.in_.value,
+    FilterOpEnum.not_in.value,
+    FilterOpEnum.between.value,
+}
+_null_ops = {
+    FilterOpEnum.is_null.value,
+    FilterOpEnum.is_not_null.value,
+}
+
+
+def validate_filter(spec: T.Dict[str, T.Any]):
+    """
+    Validate the filter spec without importing polars,
+    raise ``ValueError`` if it's invalid.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid filter: {spec!r}")
+    if "and" in spec or "or" in spec:
+        key = "and" if "and" in spec else "or"
+        if len(spec) != 1 or not isinstance(spec[key], list) or not spec[key]:
+            raise ValueError(f"Invalid filter: {spec!r}")
+        for sub_spec in spec[key]:
+            validate_filter(sub_spec)
+        return
+    if "not" in spec:
+        if len(spec) != 1:
+            raise ValueError(f"Invalid filter: {spec!r}")
+        validate_filter(spec["not"])
+        return
+    if not isinstance(spec.get("col"), str):
+        raise ValueError(f"Invalid filter, missing 'col': {spec!r}")
+    op = spec.get("op")
+    if op not in _op_values:
+        raise ValueError(f"Invalid filter op: {op!r}")
+    if op in _null_ops:
+        return
+    if "value" not in spec:
+        raise ValueError(f"Invalid filter, missing 'value': {spec!r}")
+    value = spec["value"]
+    if op in _list_ops and not isinstance(value, list):
+        raise ValueError(f"Invalid filter, {op!r} requires a list: {spec!r}")
+    if op == FilterOpEnum.between.value and len(value) != 2:
+        raise ValueError(f"Invalid filter, 'between' requires 2 values: {spec!r}")
+    dtype = spec.get("dtype")
+    if dtype is not None:
+        try:
+            FilterDtypeEnum[dtype]
+        except KeyError:
+            raise ValueError(f"Invalid filter dtype: {dtype!r}")
+
+
+def get_filter_columns(spec: T.Dict[str, T.Any]) -> T.List[str]:
+    """
+    Get the column names used in the filter spec, in order, without duplicates.
+    """
+    columns = list()
+    for key in ["and", "or"]:
+        if key in spec:
+            for sub_spec in spec[key]:
+                for col in get_filter_columns(sub_spec):
+                    if col not in columns:
+                        columns.append(col)
+            return columns
+    if "not" in spec:
+        return get_filter_columns(spec["not"])
+    return [spec["col"]]
+
+
+def _parse_value(value: T.Any, dtype: T.Optional[str]) -> T.Any:
+    if dtype is None or value is None:
+        return value
+    if dtype == FilterDtypeEnum.date.value:
+        return datetime.date.fromisoformat(value)
+    return datetime.datetime.fromisoformat(value)
+
+
+def to_expr(spec: T.Dict[str, T.Any]) -> "pl.Expr":
+    """
+    Translate the filter spec into a polars expression.
+    """
+    validate_filter(spec)
+    return _to_expr(spec)
+
+
+def _to_expr(spec: T.Dict[str, T.Any]) -> "pl.Expr":
+    import polars as pl
+
+    # chain with ``&`` / ``|`` instead of ``pl.all_horizontal``, the polars
+    # optimizer splits an ``&`` chain into predicates it can push down
+    if "and" in spec:
+        return functools.reduce(operator.and_, [_to_expr(s) for s in spec["and"]])
+    if "or" in spec:
+        return functools.reduce(operator.or_, [_to_expr(s) for s in spec["or"]])
+    if "not" in spec:
+        return _to_expr(spec["not"]).not_()
+
+    col = pl.col(spec["col"])
+    op = spec["op"]
+    if op == FilterOpEnum.is_null.value:
+        return col.is_null()
+    if op == FilterOpEnum.is_not_null.value:
+        return col.is_not_null()
+
+    dtype = spec.get("dtype")
+    if op in _list_ops:
+        value = [_parse_value(v, dtype) for v in spec["value"]]
+    else:
+        value = _parse_value(spec["value"], dtype)
+    if op == FilterOpEnum.eq.value:
+        return col == value
+    elif op == FilterOpEnum.ne.value:
+        return col != value
+    elif op == FilterOpEnum.lt.value:
+        return col < value
+    elif op == FilterOpEnum.le.value:
+        return col <= value
+    elif op == FilterOpEnum.gt.value:
+        return col > value
+    elif op == FilterOpEnum.ge.value:
+        return col >= value
+    elif op == FilterOpEnum.in_.value:
+        return col.is_in(value)
+    elif op == FilterOpEnum.not_in.value:
+        return col.is_in(value).not_()
+    else:  # between
+        return col.is_between(value[0], value[1], closed="both")
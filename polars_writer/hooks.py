@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+"""
+Write / read / scan instrumentation.
+
+- :class:`WriteResult` and :class:`ReadResult` describe one operation:
+  rows, columns, bytes, wall time, CPU time, format and resolved kwargs.
+- :class:`HookRegistry` lets you register ``on_start``, ``on_end`` and
+  ``on_error`` callbacks, for example to send per-export latency and
+  throughput to a metrics system::
+
+    from polars_writer.api import hook_registry
+
+    @hook_registry.register_on_end
+    def send_metrics(event, result):
+        statsd.timing(f"export.{result.format}", result.wall_time)
+
+When no hook is registered and no result is requested, the
+:class:`~polars_writer.writer.Writer` methods skip the instrumentation
+entirely.
+"""
+
+import typing as T
+import io
+import os
+import enum
+import warnings
+import dataclasses
+from pathlib import Path
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    from .transform import TransformResult
+
+
+class OperationEnum(str, enum.Enum):
+    """
+    Enumeration of the instrumented operations.
+    """
+
+    write = "write"
+    read = "read"
+    scan = "scan"
+
+
+@dataclasses.dataclass
+class IOEvent:
+    """
+    The context of one write / read / scan operation, passed to every hook.
+
+    :param operation: ``write``, ``read`` or ``scan``.
+    :param format: The format of the writer.
+    :param method: The resolved polars method name.
+    :param kwargs: The resolved keyword arguments.
+    :param file_args: The file arguments.
+    """
+
+    operation: str = dataclasses.field()
+    format: str = dataclasses.field()
+    method: str = dataclasses.field()
+    kwargs: T.Dict[str, T.Any] = dataclasses.field()
+    file_args: T.List[T.Any] = dataclasses.field()
+
+
+@dataclasses.dataclass
+class _BaseResult:
+    format: str = dataclasses.field()
+    method: str = dataclasses.field()
+    kwargs: T.Dict[str, T.Any] = dataclasses.field()
+    n_rows: T.Optional[int] = dataclasses.field()
+    n_columns: T.Optional[int] = dataclasses.field()
+    n_bytes: T.Optional[int] = dataclasses.field()
+    wall_time: float = dataclasses.field()
+    cpu_time: float = dataclasses.field()
+
+    @property
+    def rows_per_second(self) -> T.Optional[float]:
+        if self.n_rows is None or not self.wall_time:
+            return None
+        return self.n_rows / self.wall_time
+
+    @property
+    def mb_per_second(self) -> T.Optional[float]:
+        if self.n_bytes is None or not self.wall_time:
+            return None
+        return self.n_bytes / 1_000_000 / self.wall_time
+
+
+@dataclasses.dataclass
+class WriteResult(_BaseResult):
+    """
+    The result of :meth:`Writer.write <polars_writer.writer.Writer.write>`
+    with ``return_result=True``.
+
+    :param format: The format of the writer.
+    :param method: The resolved polars method name.
+    :param kwargs: The resolved keyword arguments.
+    :param n_rows: The number of rows written.
+    :param n_columns: The number of columns written.
+    :param n_bytes: The number of bytes written, None if it can't be measured,
+        for example for a remote path.
+    :param wall_time: The elapsed wall clock time in seconds.
+    :param cpu_time: The CPU time of the process in seconds, it includes all
+        the threads, so it could be larger than ``wall_time``.
+    :param output: The original return value of the write operation.
+    :param transform: The :class:`~polars_writer.transform.TransformResult`
+        of the pre-write transform stage, None if no transform is configured.
+    """
+
+    output: T.Any = dataclasses.field(default=None)
+    transform: T.Optional["TransformResult"] = dataclasses.field(default=None)
+
+
+@dataclasses.dataclass
+class ReadResult(_BaseResult):
+    """
+    The result of :meth:`Writer.read <polars_writer.writer.Writer.read>` or
+    :meth:`Writer.scan <polars_writer.writer.Writer.scan>` with
+    ``return_result=True``. For scan, ``df`` is a ``LazyFrame`` and
+    ``n_rows`` is None because nothing is collected yet.
+
+    :param n_bytes: The number of bytes of the source, None if it can't be
+        measured, for example for a remote path.
+    :param df: The DataFrame or LazyFrame.
+    """
+
+    df: T.Union["pl.DataFrame", "pl.LazyFrame", None] = dataclasses.field(
+        default=None
+    )
+
+
+def get_path_size(path: T.Union[str, Path]) -> T.Optional[int]:
+    """
+    Get the size in bytes of a local file, or the total size of a local
+    directory. Return None if the path doesn't exist locally.
+    """
+    try:
+        path = Path(path)
+        if path.is_file():
+            return path.stat().st_size
+        if path.is_dir():
+            total = 0
+            for dirpath, _, filenames in os.walk(path):
+                for filename in filenames:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+            return total
+    except (OSError, ValueError):  # pragma: no cover
+        pass
+    return None
+
+
+def get_source_size(source: T.Any) -> T.Optional[int]:
+    """
+    Get the size in bytes of a read source, local path, bytes or
+    seekable file object.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, Path)):
+        if "://" in str(source):
+            return None
+        return get_path_size(source)
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer().nbytes
+    return None
+
+
+class ByteCounter:
+    """
+    Measure how many bytes a write operation produced in its target,
+    a local path or a seekable file object.
+
+    A path is overwritten by the write, the count is its size after the
+    write, unless ``append`` is True (for example a delta table directory
+    that gets new files), then it's the growth of the size. For a file
+    object, it's the number of bytes written from the current position.
+
+    A rolling write puts its part files in a directory that may already
+    have other files, so if ``rolling`` is True, the count is the total
+    size of the part files in the manifest passed to :meth:`count`.
+
+    :param target: The path or the file object.
+    :param append: Whether the write adds to the existing content of a path.
+    :param rolling: Whether the target is the directory of a rolling write.
+    """
+
+    def __init__(self, target: T.Any, append: bool = False, rolling: bool = False):
+        self.target = target
+        self.append = append
+        self.rolling = rolling
+        self.before = None if rolling else self._measure()
+
+    def _is_path(self) -> bool:
+        return isinstance(self.target, (str, Path))
+
+    def _measure(self) -> T.Optional[int]:
+        target = self.target
+        if self._is_path():
+            if "://" in str(target):
+                return None
+            size = get_path_size(target)
+            return 0 if size is None else size
+        if hasattr(target, "tell"):
+            try:
+                return target.tell()
+            except (OSError, ValueError):
+                return None
+        return None
+
+    def _measure_files(self, files: T.Iterable[T.Any]) -> T.Optional[int]:
+        total = 0
+        for file in files:
+            path = file.path
+            if "://" in str(path):
+                return None
+            size = get_path_size(path)
+            if size is None:
+                return None
+            total += size
+        return total
+
+    def count(self, output: T.Any = None) -> T.Optional[int]:
+        """
+        :param output: The return value of the write, the list of
+            ``RolledFile`` of a rolling write.
+        """
+        if self.rolling:
+            return None if output is None else self._measure_files(output)
+        after = self._measure()
+        if after is None or self.before is None:
+            return None
+        if self._is_path() and not self.append:
+            return after
+        return after - self.before
+
+
+class HookRegistry:
+    """
+    A registry of instrumentation hooks.
+
+    - ``on_start(event)`` is called before the operation.
+    - ``on_end(event, result)`` is called after a successful operation,
+      ``result`` is a :class:`WriteResult` or :class:`ReadResult`.
+    - ``on_error(event, error)`` is called when the operation raises,
+      the exception is re-raised after the hooks.
+
+    An exception raised by a hook is turned into a warning, so a broken
+    metrics backend never fails an export.
+    """
+
+    def __init__(self):
+        self.on_start: T.List[T.Callable[[IOEvent], T.Any]] = list()
+        self.on_end: T.List[T.Callable[[IOEvent, _BaseResult], T.Any]] = list()
+        self.on_error: T.List[T.Callable[[IOEvent, Exception], T.Any]] = list()
+
+    def register_on_start(self, func: T.Callable) -> T.Callable:
+        self.on_start.append(func)
+        return func
+
+    def register_on_end(self, func: T.Callable) -> T.Callable:
+        self.on_end.append(func)
+        return func
+
+    def register_on_error(self, func: T.Callable) -> T.Callable:
+        self.on_error.append(func)
+        return func
+
+    def unregister(self, func: T.Callable):
+        """
+        Remove the function from all hook lists.
+        """
+        for hooks in [self.on_start, self.on_end, self.on_error]:
+            while func in hooks:
+                hooks.remove(func)
+
+    def clear(self):
+        self.on_start.clear()
+        self.on_end.clear()
+        self.on_error.clear()
+
+    def is_empty(self) -> bool:
+        return not (self.on_start or self.on_end or self.on_error)
+
+    def _call(self, hooks: T.List[T.Callable], *args):
+        for hook in hooks:
+            try:
+                hook(*args)
+            except Exception as e:
+                warnings.warn(f"polars_writer hook {hook!r} failed: {e!r}")
+
+    def emit_start(self, event: IOEvent):
+        self._call(self.on_start, event)
+
+    def emit_end(self, event: IOEvent, result: _BaseResult):
+        self._call(self.on_end, event, result)
+
+    def emit_error(self, event: IOEvent, error: Exception):
+        self._call(self.on_error, event, error)
+
+
+hook_registry = HookRegistry()
+"""
+The global hook registry used by all :class:`~polars_writer.writer.Writer`.
+"""
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compiled, immutable write / read / scan plans.
+
+:meth:`Writer.write <polars_writer.writer.Writer.write>` resolves the method
+name and keyword arguments from the config on every call. For workloads that
+write a huge number of tiny frames with the same config, compile the writer
+once and reuse the plan::
+
+    plan = writer.compile()
+    for df, path in items:
+        plan.execute(df, [path])
+
+A plan is validated once, holds the method name and a read-only kwargs
+mapping, and calls polars with a pre-built kwargs dict, per-call overrides
+are merged into a new small dict only when given. Plans are frozen and
+hashable, so they can be used as dict keys or cached.
+"""
+
+import typing as T
+import types
+import dataclasses
+
+from .hooks import hook_registry
+from .s3 import is_s3_uri
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+    from .writer import Writer
+
+
+def freeze(value: T.Any) -> T.Hashable:
+    """
+    Convert a JSON-like value to a hashable one, dict to sorted tuple of
+    items, list to tuple, set to frozenset.
+    """
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return tuple(sorted(((k, freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+@dataclasses.dataclass(frozen=True)
+class _BasePlan:
+    format: str = dataclasses.field()
+    method: str = dataclasses.field()
+    kwargs: T.Mapping[str, T.Any] = dataclasses.field()
+    # the writer snapshot for the operations that need the full Writer logic,
+    # for example rolling output and text compression
+    writer: "Writer" = dataclasses.field(repr=False, compare=False)
+    is_direct: bool = dataclasses.field(repr=False, compare=False)
+    # the frozen writer config, the plans of writers with the same method
+    # and kwargs may still write different output, for example compressed
+    # or rolling output
+    config: T.Hashable = dataclasses.field(init=False, repr=False)
+
+    def __post_init__(self):
+        # unpacking a plain dict with ``**`` is much faster than unpacking
+        # a read-only ``MappingProxyType``, this dict is never mutated
+        object.__setattr__(self, "_call_kwargs", dict(self.kwargs))
+        object.__setattr__(self, "config", freeze(self.writer.to_dict()))
+
+    def __hash__(self):
+        return hash(
+            (
+                type(self).__name__,
+                self.format,
+                self.method,
+                freeze(self.kwargs),
+                self.config,
+            )
+        )
+
+    def _merge(
+        self,
+        overrides: T.Optional[T.Mapping[str, T.Any]],
+    ) -> T.Dict[str, T.Any]:
+        if overrides is None:
+            return self._call_kwargs
+        return {**self._call_kwargs, **overrides}
+
+
+@dataclasses.dataclass(frozen=True, eq=True)
+class WritePlan(_BasePlan):
+    """
+    A compiled write plan, created by :meth:`Writer.compile
+    <polars_writer.writer.Writer.compile>`.
+    """
+
+    __hash__ = _BasePlan.__hash__
+
+    def execute(
+        self,
+        df: "pl.DataFrame",
+        file_args: T.List[T.Any],
+        overrides: T.Optional[T.Mapping[str, T.Any]] = None,
+    ):
+        """
+        Write the DataFrame, same as :meth:`Writer.write
+        <polars_writer.writer.Writer.write>`.
+
+        :param overrides: Optional keyword arguments to override the
+            compiled ones.
+        """
+        if (
+            self.is_direct
+            and hook_registry.is_empty()
+            and not (file_args and is_s3_uri(file_args[0]))
+        ):
+            return getattr(df, self.method)(*file_args, **self._merge(overrides))
+        return self.writer.write(
+            df,
+            file_args=file_args,
+            write_kwargs=None if overrides is None else dict(overrides),
+        )
+
+
+@dataclasses.dataclass(frozen=True, eq=True)
+class ReadPlan(_BasePlan):
+    """
+    A compiled read plan, created by :meth:`Writer.compile_read
+    <polars_writer.writer.Writer.compile_read>`.
+    """
+
+    __hash__ = _BasePlan.__hash__
+
+    func: T.Callable = dataclasses.field(default=None, repr=False, compare=False)
+
+    def execute(
+        self,
+        file_args: T.List[T.Any],
+        overrides: T.Optional[T.Mapping[str, T.Any]] = None,
+    ) -> "pl.DataFrame":
+        """
+        Read the data, same as :meth:`Writer.read
+        <polars_writer.writer.Writer.read>`.
+
+        :param overrides: Optional keyword arguments to override the
+            compiled ones.
+        """
+        if self.is_direct and hook_registry.is_empty():
+            return self.func(*file_args, **self._merge(overrides))
+        return self.writer.read(
+            file_args=file_args,
+            read_kwargs=None if overrides is None else dict(overrides),
+        )
+
+
+@dataclasses.dataclass(frozen=True, eq=True)
+class ScanPlan(_BasePlan):
+    """
+    A compiled scan plan, created by :meth:`Writer.compile_scan
+    <polars_writer.writer.Writer.compile_scan>`.
+    """
+
+    __hash__ = _BasePlan.__hash__
+
+    func: T.Callable = dataclasses.field(default=None, repr=False, compare=False)
+
+    def execute(
+        self,
+        file_args: T.List[T.Any],
+        overrides: T.Optional[T.Mapping[str, T.Any]] = None,
+    ) -> "pl.LazyFrame":
+        """
+        Scan the data, same as :meth:`Writer.scan
+        <polars_writer.writer.Writer.scan>`.
+
+        :param overrides: Optional keyword arguments to override the
+            compiled ones.
+        """
+        if self.is_direct and hook_registry.is_empty():
+            return self.func(*file_args, **self._merge(overrides))
+        return self.writer.scan(
+            file_args=file_args,
+            scan_kwargs=None if overrides is None else dict(overrides),
+        )
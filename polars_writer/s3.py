@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+
+"""
+Stream the encoded bytes straight to S3 compatible object storage with
+parallel multipart upload.
+
+:class:`S3MultipartUpload` is a writable binary file object, polars encodes
+into it, every ``part_size`` bytes are uploaded as one part on a thread pool
+while polars keeps encoding, at most ``max_concurrency`` parts are in flight,
+so the memory is bounded by about ``part_size * (max_concurrency + 1)``.
+An output smaller than one part is uploaded with a single ``put_object``.
+
+:meth:`Writer.write <polars_writer.writer.Writer.write>` uses it when
+``file_args[0]`` is a ``s3://bucket/key`` uri, the client is created from the
+``storage_options``, so it works with any S3 compatible storage, for example
+MinIO or moto server, by setting ``endpoint_url``.
+
+It requires the `boto3 <https://pypi.org/project/boto3/>`_ package.
+"""
+
+import typing as T
+import io
+import threading
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+"""
+The minimal size of a multipart upload part except the last one, see
+https://docs.aws.amazon.com/AmazonS3/latest/userguide/qfacts.html
+"""
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 8
+
+# storage_options key -> boto3 session / client argument, both the polars /
+# object_store style and the boto3 style keys are supported
+_session_key_mapper = {
+    "aws_access_key_id": "aws_access_key_id",
+    "access_key_id": "aws_access_key_id",
+    "aws_secret_access_key": "aws_secret_access_key",
+    "secret_access_key": "aws_secret_access_key",
+    "aws_session_token": "aws_session_token",
+    "session_token": "aws_session_token",
+    "token": "aws_session_token",
+    "aws_region": "region_name",
+    "region": "region_name",
+    "region_name": "region_name",
+    "profile_name": "profile_name",
+}
+_client_key_mapper = {
+    "aws_endpoint_url": "endpoint_url",
+    "aws_endpoint": "endpoint_url",
+    "endpoint_url": "endpoint_url",
+    "endpoint": "endpoint_url",
+}
+
+
+def is_s3_uri(value: T.Any) -> bool:
+    """
+    Check if the value is a ``s3://`` or ``s3a://`` uri.
+    """
+    return isinstance(value, str) and (
+        value.startswith("s3://") or value.startswith("s3a://")
+    )
+
+
+def split_s3_uri(uri: str) -> T.Tuple[str, str]:
+    """
+    Split ``s3://bucket/key`` into ``(bucket, key)``.
+    """
+    if is_s3_uri(uri) is False:
+        raise ValueError(f"Invalid s3 uri: {uri}")
+    bucket, _, key = uri.split("://", 1)[1].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid s3 uri: {uri}")
+    return bucket, key
+
+
+def _import_boto3():
+    try:
+        import boto3
+
+        return boto3
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "writing to s3 requires the 'boto3' package, "
+            "you can install it with 'pip install boto3'"
+        )
+
+
+def new_s3_client(storage_options: T.Optional[T.Dict[str, T.Any]] = None):
+    """
+    Create a boto3 S3 client from the polars style ``storage_options``,
+    unknown keys are ignored. Without credentials in ``storage_options``,
+    the boto3 default credential chain is used.
+    """
+    boto3 = _import_boto3()
+    session_kwargs = dict()
+    client_kwargs = dict()
+    for key, value in (storage_options or dict()).items():
+        key = key.lower()
+        if key in _session_key_mapper:
+            session_kwargs[_session_key_mapper[key]] = value
+        elif key in _client_key_mapper:
+            client_kwargs[_client_key_mapper[key]] = value
+    # the client is shared by the upload threads, boto3 clients are thread safe
+    # but the default connection pool (10) may be too small
+    from botocore.config import Config
+
+    client_kwargs["config"] = Config(max_pool_connections=32)
+    return boto3.session.Session(**session_kwargs).client("s3", **client_kwargs)
+
+
+class S3MultipartUpload(io.RawIOBase):
+    """
+    A writable binary file object that uploads its content to S3 with
+    parallel multipart upload, the object is created when the file object is
+    closed. Leaving the ``with`` block with an exception aborts the upload,
+    no partial object is created.
+
+    :param client: A boto3 S3 client.
+    :param bucket: The bucket name.
+    :param key: The object key.
+    :param part_size: The size of each part in bytes, at least 5 MiB.
+    :param max_concurrency: The max number of parts uploading at the same time.
+    :param extra_args: Optional extra arguments for ``put_object`` and
+        ``create_multipart_upload``, for example ``ContentType``.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        extra_args: T.Optional[T.Dict[str, T.Any]] = None,
+    ):
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(
+                f"part_size must be at least {MIN_PART_SIZE} bytes, got {part_size}"
+            )
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be greater than 0, got {max_concurrency}"
+            )
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self.extra_args = extra_args or dict()
+        self.upload_id: T.Optional[str] = None
+        self.n_bytes = 0
+        self._buffer = bytearray()
+        self._executor = None
+        self._futures = list()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.n_bytes
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        n = len(data)
+        self._buffer += data
+        self.n_bytes += n
+        while len(self._buffer) >= self.part_size:
+            body = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit_part(body)
+        return n
+
+    def _upload_part(self, part_number: int, body: bytes) -> T.Dict[str, T.Any]:
+        try:
+            res = self.client.upload_part(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"PartNumber": part_number, "ETag": res["ETag"]}
+        finally:
+            self._slots.release()
+
+    def _submit_part(self, body: bytes):
+        if self.upload_id is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            res = self.client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                **self.extra_args,
+            )
+            self.upload_id = res["UploadId"]
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # block the encoder when too many parts are in flight
+        self._slots.acquire()
+        # fail fast if a previous part failed
+        for future in self._futures:
+            if future.done() and future.exception() is not None:
+                self._slots.release()
+                raise future.exception()
+        part_number = len(self._futures) + 1
+        self._futures.append(
+            self._executor.submit(self._upload_part, part_number, body)
+        )
+
+    def _complete(self):
+        if self.upload_id is None:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                **self.extra_args,
+            )
+            self._buffer.clear()
+            return
+        if self._buffer:
+            self._submit_part(bytes(self._buffer))
+            self._buffer.clear()
+        parts = [future.result() for future in self._futures]
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def abort(self):
+        """
+        Abort the upload and discard the buffered and uploaded parts.
+        """
+        if self.closed:
+            return
+        try:
+            self._shutdown()
+            if self.upload_id is not None:
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    UploadId=self.upload_id,
+                )
+        finally:
+            self._buffer.clear()
+            super().close()
+
+    def close(self):
+        """
+        Upload the remaining bytes and create the object.
+        """
+        if self.closed:
+            return
+        try:
+            self._complete()
+        except Exception:
+            self.abort()
+            raise
+        self._shutdown()
+        super().close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
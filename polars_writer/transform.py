@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+A JSON configurable pre-write transform stage for
+:meth:`Writer.write <polars_writer.writer.Writer.write>`, applied in order:
+
+1. projection, keep ``columns`` and drop ``exclude``.
+2. explicit casts, for example ``{"id": "Int32", "country": "Categorical"}``.
+3. opt-in shrink of the other columns, lossless only:
+
+   - integers are downcast to the smallest integer type of the same
+     signedness that holds the values.
+   - ``Float64`` is downcast to ``Float32`` if every value round trips exactly.
+   - a ``String`` column with ``n_unique / n_rows <= categorical_threshold``
+     is cast to ``Categorical``.
+
+Narrower integers and dictionary encoded strings make parquet and IPC output
+smaller and faster to encode.
+"""
+
+import typing as T
+import enum
+import dataclasses
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import polars as pl
+
+
+class DtypeEnum(str, enum.Enum):
+    """
+    Enumeration of the polars data types that can be used in the casts.
+    """
+
+    Int8 = "Int8"
+    Int16 = "Int16"
+    Int32 = "Int32"
+    Int64 = "Int64"
+    UInt8 = "UInt8"
+    UInt16 = "UInt16"
+    UInt32 = "UInt32"
+    UInt64 = "UInt64"
+    Float32 = "Float32"
+    Float64 = "Float64"
+    Boolean = "Boolean"
+    String = "String"
+    Categorical = "Categorical"
+    Binary = "Binary"
+    Date = "Date"
+    Datetime = "Datetime"
+
+
+DEFAULT_CATEGORICAL_THRESHOLD = 0.1
+"""
+The default ``n_unique / n_rows`` ratio under which a string column is
+cast to ``Categorical`` by the shrink.
+"""
+
+
+def validate_casts(casts: T.Dict[str, str]):
+    """
+    Validate the casts without importing polars,
+    raise ``ValueError`` if it's invalid.
+    """
+    if not isinstance(casts, dict):
+        raise ValueError(f"Invalid casts: {casts!r}")
+    for col, dtype in casts.items():
+        if not isinstance(col, str):
+            raise ValueError(f"Invalid casts, column name must be str: {col!r}")
+        try:
+            DtypeEnum[dtype]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid casts dtype: {dtype!r}")
+
+
+@dataclasses.dataclass
+class TransformResult:
+    """
+    The result of :meth:`Writer.transform <polars_writer.writer.Writer.transform>`
+    with ``return_result=True``.
+
+    :param df: The transformed DataFrame.
+    :param size_before: The ``estimated_size`` before the transform.
+    :param size_after: The ``estimated_size`` after the transform.
+    :param dtypes: The new data type of each column whose type is changed,
+        by the explicit casts or the shrink.
+    """
+
+    df: "pl.DataFrame" = dataclasses.field()
+    size_before: int = dataclasses.field()
+    size_after: int = dataclasses.field()
+    dtypes: T.Dict[str, str] = dataclasses.field(default_factory=dict)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.size_before - self.size_after
+
+
+def get_shrink_casts(
+    df: "pl.DataFrame",
+    categorical_threshold: float = DEFAULT_CATEGORICAL_THRESHOLD,
+    exclude: T.Optional[T.Iterable[str]] = None,
+) -> T.Dict[str, "pl.DataType"]:
+    """
+    Get the lossless narrower data type of each column that can be shrunk,
+    the statistics of all the columns are computed in one pass.
+
+    :param exclude: The columns to leave as they are.
+    """
+    import polars as pl
+
+    exclude = set() if exclude is None else set(exclude)
+    exprs = list()
+    for name, dtype in df.schema.items():
+        if name in exclude:
+            continue
+        col = pl.col(name)
+        if dtype.is_integer():
+            exprs.append(col.min().alias(f"min:{name}"))
+            exprs.append(col.max().alias(f"max:{name}"))
+        elif dtype == pl.Float64:
+            roundtrip = col.cast(pl.Float32).cast(pl.Float64)
+            exprs.append(roundtrip.eq_missing(col).all().alias(f"f32:{name}"))
+        elif dtype == pl.String and df.height:
+            exprs.append(col.n_unique().alias(f"n_unique:{name}"))
+    if not exprs:
+        return dict()
+    stats = df.select(exprs).row(0, named=True)
+
+    casts = dict()
+    for name, dtype in df.schema.items():
+        if name in exclude:
+            continue
+        if dtype.is_integer():
+            target = _get_int_dtype(
+                dtype, stats[f"min:{name}"], stats[f"max:{name}"]
+            )
+            if target is not None and target != dtype:
+                casts[name] = target
+        elif dtype == pl.Float64:
+            if stats[f"f32:{name}"]:
+                casts[name] = pl.Float32
+        elif dtype == pl.String and df.height:
+            if stats[f"n_unique:{name}"] / df.height <= categorical_threshold:
+                casts[name] = pl.Categorical
+    return casts
+
+
+def _get_int_dtype(
+    dtype: "pl.DataType",
+    lower: T.Optional[int],
+    upper: T.Optional[int],
+) -> T.Optional["pl.DataType"]:
+    """
+    Get the smallest integer type of the same signedness that holds
+    ``lower`` and ``upper``, a signed column stays signed so the output
+    is still readable by engines without unsigned types. None for an all
+    null column.
+    """
+    import polars as pl
+
+    if lower is None or upper is None:
+        return None
+    if dtype.is_unsigned_integer():
+        for target, n_bits in [(pl.UInt8, 8), (pl.UInt16, 16), (pl.UInt32, 32)]:
+            if upper < 2**n_bits:
+                return target
+        return pl.UInt64
+    for target, n_bits in [(pl.Int8, 8), (pl.Int16, 16), (pl.Int32, 32)]:
+        if -(2 ** (n_bits - 1)) <= lower and upper < 2 ** (n_bits - 1):
+            return target
+    return pl.Int64
+
+
+def project_and_cast(
+    data,
+    columns: T.Optional[T.List[str]] = None,
+    exclude: T.Optional[T.List[str]] = None,
+    casts: T.Optional[T.Dict[str, str]] = None,
+):
+    """
+    Apply the projection and the explicit casts to a ``DataFrame`` or a
+    ``LazyFrame``, the steps of the transform that don't need the data.
+    """
+    import polars as pl
+
+    if columns:
+        data = data.select(columns)
+    if exclude:
+        data = data.drop(exclude)
+    if casts:
+        data = data.cast({col: getattr(pl, dtype) for col, dtype in casts.items()})
+    return data
+
+
+def transform_frame(
+    df: "pl.DataFrame",
+    columns: T.Optional[T.List[str]] = None,
+    exclude: T.Optional[T.List[str]] = None,
+    casts: T.Optional[T.Dict[str, str]] = None,
+    shrink: bool = False,
+    categorical_threshold: float = DEFAULT_CATEGORICAL_THRESHOLD,
+) -> TransformResult:
+    """
+    Apply the projection, the explicit casts and the optional shrink.
+
+    :param columns: Only keep these columns, in this order.
+    :param exclude: Drop these columns.
+    :param casts: Mapping from column name to :class:`DtypeEnum` value.
+    :param shrink: Shrink the other columns to lossless narrower types.
+    :param categorical_threshold: The ``n_unique / n_rows`` ratio under which
+        a string column is cast to ``Categorical`` by the shrink.
+    """
+    import polars as pl
+
+    size_before = df.estimated_size()
+    schema_before = df.schema
+    df = project_and_cast(df, columns=columns, exclude=exclude, casts=casts)
+    if shrink:
+        shrink_casts = get_shrink_casts(df, categorical_threshold, exclude=casts)
+        if shrink_casts:
+            df = df.cast(shrink_casts)
+    dtypes = {
+        name: dtype.base_type().__name__
+        for name, dtype in df.schema.items()
+        if schema_before.get(name) != dtype
+    }
+    return TransformResult(
+        df=df,
+        size_before=size_before,
+        size_after=df.estimated_size(),
+        dtypes=dtypes,
+    )
@@ -10,20 +10,91 @@ Classes:
 
 - :class:`FormatEnum`
 - :class:`WriteMethodEnum`
+- :class:`SinkMethodEnum`
 - :class:`ParquetCompressionEnum`
+- :class:`ParquetEncodingEnum`
 - :class:`DeltaModeEnum`
+- :class:`BatchItemResult`
+- :class:`RolledFile`
+- :class:`AppendSession`
 - :class:`Writer`: Main class for configuring and executing write operations.
 """
 
 import typing as T
+import io
+import os
 import enum
+import contextlib
+import time
+import types
+import math
+import tempfile
 import dataclasses
+import urllib.parse
+from pathlib import Path
 
-import polars as pl
 from func_args import NOTHING, resolve_kwargs
 
+from .compression import (
+    TextCompressionEnum,
+    file_ext_mapper,
+    open_compressor,
+    decompress_to_buffer,
+)
+from .aio import ConcurrencyLimiter, get_global_limiter, run_in_thread
+from .autotune import ObjectiveEnum, autotune
+from .hooks import (
+    OperationEnum,
+    IOEvent,
+    WriteResult,
+    ReadResult,
+    ByteCounter,
+    get_source_size,
+    hook_registry,
+)
+from .plan import freeze, WritePlan, ReadPlan, ScanPlan
+from .s3 import (
+    DEFAULT_PART_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    MIN_PART_SIZE,
+    is_s3_uri,
+    split_s3_uri,
+    new_s3_client,
+    S3MultipartUpload,
+)
+from .filters import validate_filter, to_expr, get_filter_columns
+from .cache import (
+    ParquetMetadataCache,
+    ReadCache,
+    select_row_groups,
+    get_filesystem,
+    is_remote_path,
+    has_io_source,
+    _import_pyarrow_parquet,
+)
+from .transform import (
+    DEFAULT_CATEGORICAL_THRESHOLD,
+    validate_casts,
+    TransformResult,
+    project_and_cast,
+    transform_frame,
+)
+from .cluster import sort_by_z_order, to_sorting_columns
+from .delta import (
+    DEFAULT_COALESCE_MAX_ROWS,
+    DEFAULT_COALESCE_MAX_BYTES,
+    DEFAULT_COALESCE_MAX_SECONDS,
+    DeltaAppendBuffer,
+    optimize_table,
+    vacuum_table,
+    UpsertResult,
+    upsert_table,
+)
+
 if T.TYPE_CHECKING:  # pragma: no cover
     import polars as pl
+    import pyarrow
+    import pyarrow.parquet
 
 
 class FormatEnum(str, enum.Enum):
@@ -36,6 +107,8 @@ class FormatEnum(str, enum.Enum):
     ndjson = "ndjson"
     parquet = "parquet"
     delta = "delta"
+    ipc = "ipc"
+    ipc_stream = "ipc_stream"
 
 
 class WriteMethodEnum(str, enum.Enum):
@@ -48,6 +121,24 @@ class WriteMethodEnum(str, enum.Enum):
     write_ndjson = "write_ndjson"
     write_parquet = "write_parquet"
     write_delta = "write_delta"
+    write_ipc = "write_ipc"
+    write_ipc_stream = "write_ipc_stream"
+
+
+class SinkMethodEnum(str, enum.Enum):
+    """
+    Enumeration of corresponding sink methods in Polars ``LazyFrame``
+    for each supported format.
+
+    .. note::
+
+        polars doesn't support ``sink_json``, ``sink_delta`` and ``sink_ipc_stream``.
+    """
+
+    sink_csv = "sink_csv"
+    sink_ndjson = "sink_ndjson"
+    sink_parquet = "sink_parquet"
+    sink_ipc = "sink_ipc"
 
 
 class ReadMethodEnum(str, enum.Enum):
@@ -60,11 +151,17 @@ class ReadMethodEnum(str, enum.Enum):
     read_ndjson = "read_ndjson"
     read_parquet = "read_parquet"
     read_delta = "read_delta"
+    read_ipc = "read_ipc"
+    read_ipc_stream = "read_ipc_stream"
 
 
 class ScanMethodEnum(str, enum.Enum):
     """
     Enumeration of corresponding scan methods in Polars for each supported format.
+
+    .. note::
+
+        polars doesn't support ``scan_ipc_stream``.
     """
 
     scan_csv = "scan_csv"
@@ -72,6 +169,7 @@ class ScanMethodEnum(str, enum.Enum):
     scan_ndjson = "scan_ndjson"
     scan_parquet = "scan_parquet"
     scan_delta = "scan_delta"
+    scan_ipc = "scan_ipc"
 
 
 class ParquetCompressionEnum(str, enum.Enum):
@@ -88,6 +186,93 @@ class ParquetCompressionEnum(str, enum.Enum):
     zstd = "zstd"
 
 
+class ParquetEncodingEnum(str, enum.Enum):
+    """
+    Enumeration of the parquet column encodings that can be set per column
+    by ``parquet_column_encoding``, a column with an explicit encoding is
+    not dictionary encoded.
+    """
+
+    PLAIN = "PLAIN"
+    BYTE_STREAM_SPLIT = "BYTE_STREAM_SPLIT"
+    DELTA_BINARY_PACKED = "DELTA_BINARY_PACKED"
+    DELTA_LENGTH_BYTE_ARRAY = "DELTA_LENGTH_BYTE_ARRAY"
+    DELTA_BYTE_ARRAY = "DELTA_BYTE_ARRAY"
+
+
+parquet_compression_level_codecs = {
+    ParquetCompressionEnum.gzip.value,
+    ParquetCompressionEnum.brotli.value,
+    ParquetCompressionEnum.zstd.value,
+}
+"""
+The parquet codecs that take a compression level.
+"""
+
+
+class IpcCompressionEnum(str, enum.Enum):
+    """
+    Enumeration of supported compression algorithms for Arrow IPC files
+    and streams. Only an uncompressed file can be read with zero copy
+    by memory mapping.
+    """
+
+    uncompressed = "uncompressed"
+    lz4 = "lz4"
+    zstd = "zstd"
+
+
+format_file_ext_mapper = {
+    FormatEnum.ipc.value: "arrow",
+    FormatEnum.ipc_stream.value: "arrows",
+}
+"""
+The file extension of the formats whose extension is not the format name,
+``.arrow`` for the Arrow IPC file format and ``.arrows`` for the stream format.
+"""
+
+
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+"""
+The hive partition directory value for null, same as polars and spark.
+"""
+
+DEFAULT_PARTITION_CHUNK_SIZE_BYTES = 4_294_967_296
+"""
+The default ``partition_chunk_size_bytes`` of ``polars.DataFrame.write_parquet``.
+"""
+
+
+def _is_valid_bloom_filter_option(value: T.Any) -> bool:
+    """
+    Check a ``parquet_bloom_filters`` value, True, or a dict of the target
+    false positive probability ``fpp`` and the expected number of distinct
+    values ``ndv`` of a row group.
+    """
+    if value is True:
+        return True
+    if not isinstance(value, dict) or not set(value) <= {"fpp", "ndv"}:
+        return False
+    fpp = value.get("fpp", 0.05)
+    ndv = value.get("ndv", 1)
+    return (
+        isinstance(fpp, float)
+        and 0 < fpp < 1
+        and isinstance(ndv, int)
+        and not isinstance(ndv, bool)
+        and ndv > 0
+    )
+
+
+def _to_hive_value(value: T.Any) -> str:
+    """
+    Encode a partition value as a hive partition directory value.
+    """
+    if value is None:
+        return HIVE_DEFAULT_PARTITION
+    return urllib.parse.quote(str(value), safe="")
+
+
 class DeltaModeEnum(str, enum.Enum):
     """
     Enumeration of write modes for Delta Lake operations.
@@ -100,6 +285,159 @@ class DeltaModeEnum(str, enum.Enum):
     merge = "merge"
 
 
+class _WriteStages(T.NamedTuple):
+    """
+    The pre-write stages of a :class:`Writer` config, see :meth:`Writer._prepare`.
+    """
+
+    has_sort: bool
+    has_transform: bool
+    is_pyarrow_writer: bool
+
+
+@dataclasses.dataclass
+class BatchItemResult:
+    """
+    The result of one item in a batch operation such as :meth:`Writer.write_many`.
+
+    :param index: The index of the item in the input sequence.
+    :param file_args: The file arguments of the item.
+    :param result: The return value of the operation, if succeeded.
+    :param error: The exception raised by the operation, if failed.
+    """
+
+    index: int = dataclasses.field()
+    file_args: T.List[T.Any] = dataclasses.field()
+    result: T.Any = dataclasses.field(default=None)
+    error: T.Optional[Exception] = dataclasses.field(default=None)
+
+    @property
+    def is_succeeded(self) -> bool:
+        return self.error is None
+
+    @property
+    def is_failed(self) -> bool:
+        return self.error is not None
+
+
+DEFAULT_FILE_NAME_TEMPLATE = "part-{index:05d}.{ext}"
+"""
+The default file name template for rolling output, ``{index}`` is the
+0-based file index, ``{ext}`` is the file extension of the format.
+"""
+
+DEFAULT_ITER_CHUNK_ROWS = 10_000
+"""
+The default number of rows encoded per chunk by :meth:`Writer.iter_bytes`.
+"""
+
+
+@dataclasses.dataclass
+class RolledFile:
+    """
+    One file in the manifest of a rolling output, see :meth:`Writer.write_rolling`.
+
+    :param path: The path of the file, a ``s3://`` uri string for a S3 output.
+    :param offset: The row offset of the first row of this file in the source.
+    :param n_rows: The number of rows in this file.
+    """
+
+    path: T.Union[Path, str] = dataclasses.field()
+    offset: int = dataclasses.field()
+    n_rows: int = dataclasses.field()
+
+
+class AppendSession:
+    """
+    A persistent append session for CSV / NDJSON output, created by
+    :meth:`Writer.open_append`. It keeps one buffered file handle open and
+    streams each DataFrame onto the end of the file, so the cost of an append
+    is proportional to the batch, not to the file.
+
+    The CSV header is written only once, and skipped if the file
+    already has content. If the format is compressed, each batch is appended
+    as a new gzip member / zstd frame / lz4 frame.
+    """
+
+    def __init__(
+        self,
+        writer: "Writer",
+        path: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+    ):
+        if not (writer.is_csv() or writer.is_ndjson()):
+            raise ValueError(
+                f"append session only supports 'csv' and 'ndjson' format, "
+                f"got {writer.format!r}!"
+            )
+        self.writer = writer
+        self.path = Path(path)
+        self.method, self.kwargs = writer.to_method_and_kwargs()
+        if write_kwargs is not None:  # override default kwargs
+            self.kwargs.update(write_kwargs)
+        self.buffer_size = buffer_size
+        self.n_rows = 0
+        self.n_batches = 0
+        self._file: T.Optional[T.BinaryIO] = None
+        # the user's choice, kept apart from the kwargs so that re-opening
+        # the session on a new / empty file writes the header again
+        self._include_header = self.kwargs.get("include_header", True)
+        self._need_header = False
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def open(self):
+        if self._file is not None:
+            return
+        has_content = self.path.exists() and self.path.stat().st_size > 0
+        if self.writer.is_csv():
+            self._need_header = self._include_header and (has_content is False)
+        self._file = open(self.path, "ab", buffering=self.buffer_size)
+
+    def write(self, df: "pl.DataFrame"):
+        """
+        Append the given Polars DataFrame to the end of the file, it goes
+        through the ``transform_*`` stage of :meth:`Writer.write` first.
+        """
+        if self._file is None:
+            raise ValueError("append session is closed!")
+        df, _, _ = self.writer._prepare(df)
+        write_method = getattr(df, self.method)
+        kwargs = self.kwargs
+        if self.writer.is_csv():
+            kwargs = {**self.kwargs, "include_header": self._need_header}
+            self._need_header = False
+        compression, level = self.writer.get_text_compression()
+        if compression is None:
+            write_method(self._file, **kwargs)
+        else:
+            # each batch is a new gzip member / zstd frame / lz4 frame,
+            # concatenated members / frames are still a valid compressed file
+            with open_compressor(self._file, compression, level) as stream:
+                write_method(stream, **kwargs)
+        self.n_rows += df.height
+        self.n_batches += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "AppendSession":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 @dataclasses.dataclass
 class Writer:
     """
@@ -123,8 +461,14 @@ class Writer:
     csv_float_precision: int = dataclasses.field(default=NOTHING)
     csv_null_value: str = dataclasses.field(default=NOTHING)
     csv_quote_style: str = dataclasses.field(default=NOTHING)
+    csv_compression: str = dataclasses.field(default=NOTHING)
+    csv_compression_level: int = dataclasses.field(default=NOTHING)
     # json
+    json_compression: str = dataclasses.field(default=NOTHING)
+    json_compression_level: int = dataclasses.field(default=NOTHING)
     # ndjson
+    ndjson_compression: str = dataclasses.field(default=NOTHING)
+    ndjson_compression_level: int = dataclasses.field(default=NOTHING)
     # parquet
     parquet_compression: str = dataclasses.field(default=NOTHING)
     parquet_compression_level: int = dataclasses.field(default=NOTHING)
@@ -135,11 +479,52 @@ class Writer:
     parquet_pyarrow_options: T.Optional[T.Dict[str, T.Any]] = dataclasses.field(default=NOTHING)
     parquet_partition_by: T.Optional[T.Union[str, T.Sequence[str]]] = dataclasses.field(default=NOTHING)
     parquet_partition_chunk_size_bytes: int = dataclasses.field(default=NOTHING)
+    parquet_sort_by: T.Union[str, T.List[str]] = dataclasses.field(default=NOTHING)
+    parquet_sort_descending: T.Union[bool, T.List[bool]] = dataclasses.field(default=NOTHING)
+    parquet_sort_nulls_last: bool = dataclasses.field(default=NOTHING)
+    parquet_cluster_by: T.List[str] = dataclasses.field(default=NOTHING)
+    parquet_bloom_filters: T.Dict[str, T.Union[bool, T.Dict[str, T.Any]]] = dataclasses.field(default=NOTHING)
+    parquet_write_page_index: bool = dataclasses.field(default=NOTHING)
+    parquet_use_dictionary: T.Dict[str, bool] = dataclasses.field(default=NOTHING)
+    parquet_column_compression: T.Dict[str, str] = dataclasses.field(default=NOTHING)
+    parquet_column_encoding: T.Dict[str, str] = dataclasses.field(default=NOTHING)
     # delta
     delta_mode: str = dataclasses.field(default=NOTHING)
     delta_overwrite_schema: bool = dataclasses.field(default=NOTHING)
     delta_write_options: T.Dict[str, T.Any] = dataclasses.field(default=NOTHING)
     delta_merge_options: T.Dict[str, T.Any] = dataclasses.field(default=NOTHING)
+    delta_optimize_target_file_size: int = dataclasses.field(default=NOTHING)
+    delta_optimize_z_order_by: T.List[str] = dataclasses.field(default=NOTHING)
+    delta_optimize_max_concurrent_tasks: int = dataclasses.field(default=NOTHING)
+    delta_vacuum_retention_hours: int = dataclasses.field(default=NOTHING)
+    delta_vacuum_dry_run: bool = dataclasses.field(default=NOTHING)
+    delta_vacuum_enforce_retention_duration: bool = dataclasses.field(default=NOTHING)
+    # ipc
+    ipc_compression: str = dataclasses.field(default=NOTHING)
+    ipc_memory_map: bool = dataclasses.field(default=NOTHING)
+    # ipc_stream
+    ipc_stream_compression: str = dataclasses.field(default=NOTHING)
+    # pre-write transform
+    transform_columns: T.List[str] = dataclasses.field(default=NOTHING)
+    transform_exclude: T.List[str] = dataclasses.field(default=NOTHING)
+    transform_casts: T.Dict[str, str] = dataclasses.field(default=NOTHING)
+    transform_shrink: bool = dataclasses.field(default=NOTHING)
+    transform_categorical_threshold: float = dataclasses.field(default=NOTHING)
+    # rolling output
+    max_rows_per_file: int = dataclasses.field(default=NOTHING)
+    max_bytes_per_file: int = dataclasses.field(default=NOTHING)
+    file_name_template: str = dataclasses.field(default=NOTHING)
+    # read / scan
+    read_columns: T.List[str] = dataclasses.field(default=NOTHING)
+    read_filter: T.Dict[str, T.Any] = dataclasses.field(default=NOTHING)
+    # s3 multipart upload
+    s3_part_size: int = dataclasses.field(default=NOTHING)
+    s3_max_concurrency: int = dataclasses.field(default=NOTHING)
+    # runtime only, not part of the JSON config
+    async_limiter: T.Optional[ConcurrencyLimiter] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    s3_client: T.Any = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    metadata_cache: T.Optional[ParquetMetadataCache] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    read_cache: T.Optional[ReadCache] = dataclasses.field(default=None, init=False, repr=False, compare=False)
     # fmt: on
 
     def __post_init__(self):
@@ -160,6 +545,126 @@ class Writer:
                 DeltaModeEnum[self.delta_mode]
             except KeyError:
                 raise ValueError(f"Invalid delta_mode: {self.delta_mode}")
+        for name in ["csv_compression", "json_compression", "ndjson_compression"]:
+            value = getattr(self, name)
+            if value is not NOTHING:
+                try:
+                    TextCompressionEnum[value]
+                except KeyError:
+                    raise ValueError(f"Invalid {name}: {value}")
+        for name in ["ipc_compression", "ipc_stream_compression"]:
+            value = getattr(self, name)
+            if value is not NOTHING:
+                try:
+                    IpcCompressionEnum[value]
+                except KeyError:
+                    raise ValueError(f"Invalid {name}: {value}")
+        for name in ["max_rows_per_file", "max_bytes_per_file"]:
+            value = getattr(self, name)
+            if value is not NOTHING and value < 1:
+                raise ValueError(f"Invalid {name}: {value}")
+        if self.is_rolling() and self.is_delta():
+            raise ValueError("delta format doesn't support rolling output!")
+        if (self.parquet_sort_by is not NOTHING) and (
+            self.parquet_cluster_by is not NOTHING
+        ):
+            raise ValueError(
+                "parquet_sort_by and parquet_cluster_by can't be used together!"
+            )
+        if self.parquet_cluster_by is not NOTHING and not self.parquet_cluster_by:
+            raise ValueError(f"Invalid parquet_cluster_by: {self.parquet_cluster_by}")
+        for name in [
+            "parquet_cluster_by",
+            "read_columns",
+            "transform_columns",
+            "transform_exclude",
+        ]:
+            value = getattr(self, name)
+            if value is not NOTHING and not (
+                isinstance(value, list) and all(isinstance(col, str) for col in value)
+            ):
+                raise ValueError(f"Invalid {name}: {value}")
+        self._validate_parquet_column_options()
+        self._validate_parquet_statistics()
+        if self.transform_casts is not NOTHING:
+            validate_casts(self.transform_casts)
+        if self.transform_categorical_threshold is not NOTHING and not (
+            0 <= self.transform_categorical_threshold <= 1
+        ):
+            raise ValueError(
+                "Invalid transform_categorical_threshold: "
+                f"{self.transform_categorical_threshold}"
+            )
+        if self.read_filter is not NOTHING:
+            validate_filter(self.read_filter)
+        if self.s3_part_size is not NOTHING and self.s3_part_size < MIN_PART_SIZE:
+            raise ValueError(f"Invalid s3_part_size: {self.s3_part_size}")
+        if self.s3_max_concurrency is not NOTHING and self.s3_max_concurrency < 1:
+            raise ValueError(f"Invalid s3_max_concurrency: {self.s3_max_concurrency}")
+        # the config is not changed after init, the flags checked on every
+        # write are computed once
+        self._stages = self._get_stages()
+        self._is_rolling = self.is_rolling()
+        self._text_compression = self.get_text_compression()
+        self._method_and_kwargs = self.to_method_and_kwargs()
+        self._is_direct = not (
+            self._is_rolling
+            or self._text_compression[0] is not None
+            or any(self._stages)
+        )
+
+    def _validate_parquet_column_options(self):
+        """
+        Validate the parquet options that only the pyarrow writer supports.
+        """
+        for name, validate in [
+            ("parquet_bloom_filters", _is_valid_bloom_filter_option),
+            ("parquet_use_dictionary", lambda v: isinstance(v, bool)),
+            (
+                "parquet_column_compression",
+                lambda v: v in ParquetCompressionEnum.__members__,
+            ),
+            (
+                "parquet_column_encoding",
+                lambda v: v in ParquetEncodingEnum.__members__,
+            ),
+        ]:
+            value = getattr(self, name)
+            if value is not NOTHING and not (
+                isinstance(value, dict)
+                and all(
+                    isinstance(col, str) and validate(v) for col, v in value.items()
+                )
+            ):
+                raise ValueError(f"Invalid {name}: {value}")
+        if not self.has_pyarrow_write_options():
+            return
+        if self.parquet_use_pyarrow is False:
+            raise ValueError(
+                "parquet bloom filters, page index, per column dictionary, "
+                "compression and encoding require parquet_use_pyarrow!"
+            )
+        if self.parquet_partition_by is not NOTHING:
+            raise ValueError(
+                "parquet bloom filters, page index, per column dictionary, "
+                "compression and encoding can't be used with parquet_partition_by!"
+            )
+
+    def _validate_parquet_statistics(self):
+        """
+        The pyarrow writer only supports boolean ``parquet_statistics``,
+        check it for every config that writes parquet through pyarrow,
+        including a ``parquet_sort_by`` recorded in the ``sorting_columns``.
+        """
+        if not (self.is_parquet() and self.is_pyarrow_writer()):
+            return
+        if not isinstance(self.parquet_statistics, bool) and (
+            self.parquet_statistics is not NOTHING
+        ):
+            raise ValueError(
+                f"Invalid parquet_statistics: {self.parquet_statistics}, "
+                f"the pyarrow writer only supports True or False"
+            )
 
     @classmethod
     def from_dict(cls, dct: T.Dict[str, T.Any]):
@@ -179,6 +684,12 @@ class Writer:
             csv_float_precision=self.csv_float_precision,
             csv_null_value=self.csv_null_value,
             csv_quote_style=self.csv_quote_style,
+            csv_compression=self.csv_compression,
+            csv_compression_level=self.csv_compression_level,
+            json_compression=self.json_compression,
+            json_compression_level=self.json_compression_level,
+            ndjson_compression=self.ndjson_compression,
+            ndjson_compression_level=self.ndjson_compression_level,
             parquet_compression=self.parquet_compression,
             parquet_compression_level=self.parquet_compression_level,
             parquet_statistics=self.parquet_statistics,
@@ -188,10 +699,40 @@ class Writer:
             parquet_pyarrow_options=self.parquet_pyarrow_options,
             parquet_partition_by=self.parquet_partition_by,
             parquet_partition_chunk_size_bytes=self.parquet_partition_chunk_size_bytes,
+            parquet_sort_by=self.parquet_sort_by,
+            parquet_sort_descending=self.parquet_sort_descending,
+            parquet_sort_nulls_last=self.parquet_sort_nulls_last,
+            parquet_cluster_by=self.parquet_cluster_by,
+            parquet_bloom_filters=self.parquet_bloom_filters,
+            parquet_write_page_index=self.parquet_write_page_index,
+            parquet_use_dictionary=self.parquet_use_dictionary,
+            parquet_column_compression=self.parquet_column_compression,
+            parquet_column_encoding=self.parquet_column_encoding,
             delta_mode=self.delta_mode,
             delta_overwrite_schema=self.delta_overwrite_schema,
             delta_write_options=self.delta_write_options,
             delta_merge_options=self.delta_merge_options,
+            delta_optimize_target_file_size=self.delta_optimize_target_file_size,
+            delta_optimize_z_order_by=self.delta_optimize_z_order_by,
+            delta_optimize_max_concurrent_tasks=self.delta_optimize_max_concurrent_tasks,
+            delta_vacuum_retention_hours=self.delta_vacuum_retention_hours,
+            delta_vacuum_dry_run=self.delta_vacuum_dry_run,
+            delta_vacuum_enforce_retention_duration=self.delta_vacuum_enforce_retention_duration,
+            ipc_compression=self.ipc_compression,
+            ipc_memory_map=self.ipc_memory_map,
+            ipc_stream_compression=self.ipc_stream_compression,
+            transform_columns=self.transform_columns,
+            transform_exclude=self.transform_exclude,
+            transform_casts=self.transform_casts,
+            transform_shrink=self.transform_shrink,
+            transform_categorical_threshold=self.transform_categorical_threshold,
+            max_rows_per_file=self.max_rows_per_file,
+            max_bytes_per_file=self.max_bytes_per_file,
+            file_name_template=self.file_name_template,
+            read_columns=self.read_columns,
+            read_filter=self.read_filter,
+            s3_part_size=self.s3_part_size,
+            s3_max_concurrency=self.s3_max_concurrency,
         )
 
     def is_csv(self) -> bool:
@@ -209,6 +750,80 @@ class Writer:
     def is_delta(self) -> bool:
         return self.format == FormatEnum.delta.value
 
+    def is_ipc(self) -> bool:
+        return self.format == FormatEnum.ipc.value
+
+    def is_ipc_stream(self) -> bool:
+        return self.format == FormatEnum.ipc_stream.value
+
+    def is_rolling(self) -> bool:
+        """
+        Check if the output should be split into multiple files.
+        """
+        return (self.max_rows_per_file is not NOTHING) or (
+            self.max_bytes_per_file is not NOTHING
+        )
+
+    def get_text_compression(self) -> T.Tuple[T.Optional[str], T.Optional[int]]:
+        """
+        Get the streaming compression algorithm and level of the
+        CSV / JSON / NDJSON format, ``(None, None)`` if not compressed.
+        """
+        if self.is_csv():
+            compression = self.csv_compression
+            level = self.csv_compression_level
+        elif self.is_json():
+            compression = self.json_compression
+            level = self.json_compression_level
+        elif self.is_ndjson():
+            compression = self.ndjson_compression
+            level = self.ndjson_compression_level
+        else:
+            return None, None
+        if compression is NOTHING:
+            return None, None
+        return compression, (None if level is NOTHING else level)
+
+    def is_text_compressed(self) -> bool:
+        """
+        Check if the CSV / JSON / NDJSON output is compressed.
+        """
+        return self.get_text_compression()[0] is not None
+
+    def get_file_ext(self) -> str:
+        """
+        Get the file extension of the format, for example ``csv``,
+        ``csv.gz`` if it is compressed, ``arrow`` for the ``ipc`` format.
+        """
+        compression, _ = self.get_text_compression()
+        if compression is None:
+            return format_file_ext_mapper.get(self.format, self.format)
+        return f"{self.format}.{file_ext_mapper[compression]}"
+
+    def get_ipc_memory_map(self) -> bool:
+        """
+        Check if a local Arrow IPC file is read by memory mapping. An
+        uncompressed file is then read with zero copy, the columns point to
+        the page cache instead of the Python heap. It defaults to True unless
+        ``ipc_compression`` is lz4 / zstd, a compressed file can't be mapped.
+        """
+        if self.ipc_memory_map is NOTHING:
+            return self.ipc_compression in (
+                NOTHING,
+                IpcCompressionEnum.uncompressed.value,
+            )
+        return self.ipc_memory_map
+
+    def get_file_name(self, index: int) -> str:
+        """
+        Get the file name of the ``index`` th file of a rolling output.
+        """
+        if self.file_name_template is NOTHING:
+            template = DEFAULT_FILE_NAME_TEMPLATE
+        else:
+            template = self.file_name_template
+        return template.format(index=index, ext=self.get_file_ext())
+
     def to_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
         """
         Get the appropriate write method and keyword arguments for the chosen format.
@@ -237,15 +852,22 @@ class Writer:
             return (WriteMethodEnum.write_ndjson.value, dict())
         elif self.is_parquet():
             return (
-                WriteMethodEnum.write_parquet,
+                WriteMethodEnum.write_parquet.value,
                 resolve_kwargs(
                     compression=self.parquet_compression,
                     compression_level=self.parquet_compression_level,
+                    statistics=self.parquet_statistics,
+                    row_group_size=self.parquet_row_group_size,
+                    data_page_size=self.parquet_data_page_size,
+                    use_pyarrow=self.parquet_use_pyarrow,
+                    pyarrow_options=self.parquet_pyarrow_options,
+                    partition_by=self.parquet_partition_by,
+                    partition_chunk_size_bytes=self.parquet_partition_chunk_size_bytes,
                 ),
             )
         elif self.is_delta():
             return (
-                WriteMethodEnum.write_delta,
+                WriteMethodEnum.write_delta.value,
                 resolve_kwargs(
                     mode=self.delta_mode,
                     overwrite_schema=self.delta_overwrite_schema,
@@ -254,6 +876,20 @@ class Writer:
                     storage_options=self.storage_options,
                 ),
             )
+        elif self.is_ipc():
+            return (
+                WriteMethodEnum.write_ipc.value,
+                resolve_kwargs(
+                    compression=self.ipc_compression,
+                ),
+            )
+        elif self.is_ipc_stream():
+            return (
+                WriteMethodEnum.write_ipc_stream.value,
+                resolve_kwargs(
+                    compression=self.ipc_stream_compression,
+                ),
+            )
         else:  # pragma: no cover
             raise NotImplementedError
 
@@ -266,139 +902,1682 @@ class Writer:
         method, kwargs = self.to_method_and_kwargs()
         return kwargs
 
-    def write(
+    def _run_instrumented(
         self,
-        df: "pl.DataFrame",
-        file_args: T.List[T.Any],
-        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        event: IOEvent,
+        func: T.Callable[[], T.Any],
+        make_result: T.Callable[[T.Any, float, float], T.Any],
     ):
         """
-        Write the given Polars DataFrame to the specified output.
+        Run the operation, measure the wall / CPU time and call the hooks.
+        """
+        hook_registry.emit_start(event)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            output = func()
+        except Exception as e:
+            hook_registry.emit_error(event, e)
+            raise
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+        result = make_result(output, wall_time, cpu_time)
+        hook_registry.emit_end(event, result)
+        return result
 
-        :param df: The Polars DataFrame to write.
-        :param file_args: Arguments for the file path or location.
-        :param write_kwargs: Optional keyword arguments for the write method.
+    def has_transform(self) -> bool:
+        """
+        Check if any ``transform_*`` field is set.
+        """
+        return (
+            (self.transform_columns is not NOTHING)
+            or (self.transform_exclude is not NOTHING)
+            or (self.transform_casts is not NOTHING)
+            or (self.transform_shrink is True)
+        )
 
-        :return: The result of the write operation (format-dependent).
+    def transform(
+        self,
+        df: "pl.DataFrame",
+        return_result: bool = False,
+    ):
         """
-        method, kwargs = self.to_method_and_kwargs()
-        write_method = getattr(df, method)
-        if write_kwargs is not None:  # override default kwargs
-            kwargs.update(write_kwargs)
-        # print(f"{file_args = }")
-        # print("kwargs: ")
-        # for k, v in kwargs.items():
-        #     print(f"  {k} = {v}")
-        return write_method(*file_args, **kwargs)
+        Apply the pre-write transform stage of :meth:`Writer.write`,
+        the ``transform_columns`` / ``transform_exclude`` projection, the
+        ``transform_casts`` and the opt-in ``transform_shrink``,
+        see :mod:`polars_writer.transform`.
 
-    def to_read_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
+        :param df: The Polars DataFrame to transform.
+        :param return_result: If True, return a
+            :class:`~polars_writer.transform.TransformResult` with the
+            ``estimated_size`` before and after the transform.
         """
-        Get the appropriate read method and keyword arguments for the chosen format.
+        def get(value, default=None):
+            return default if value is NOTHING else value
 
-        :return: A tuple containing the read method name and a dictionary of keyword arguments.
+        result = transform_frame(
+            df,
+            columns=get(self.transform_columns),
+            exclude=get(self.transform_exclude),
+            casts=get(self.transform_casts),
+            shrink=get(self.transform_shrink, False),
+            categorical_threshold=get(
+                self.transform_categorical_threshold,
+                DEFAULT_CATEGORICAL_THRESHOLD,
+            ),
+        )
+        if return_result:
+            return result
+        return result.df
+
+    def has_sort(self) -> bool:
         """
-        if self.is_csv():
-            return (
-                ReadMethodEnum.read_csv.value,
-                resolve_kwargs(
-                    has_header=self.csv_include_header,
-                    separator=self.csv_delimiter,
-                    eol_char=self.csv_line_terminator,
-                    quote_char=self.csv_quote_char,
-                    storage_options=self.storage_options,
-                ),
-            )
-        elif self.is_json():
-            return (ReadMethodEnum.read_json.value, dict())
-        elif self.is_ndjson():
-            return (ReadMethodEnum.read_ndjson.value, dict())
-        elif self.is_parquet():
-            return (
-                ReadMethodEnum.read_parquet,
-                resolve_kwargs(
-                    use_pyarrow=self.parquet_use_pyarrow,
-                    storage_options=self.storage_options,
-                ),
-            )
-        elif self.is_delta():
-            return (
-                ReadMethodEnum.read_delta,
-                resolve_kwargs(
-                    storage_options=self.storage_options,
+        Check if the parquet output is sorted by ``parquet_sort_by`` or
+        clustered by ``parquet_cluster_by``.
+        """
+        return self.is_parquet() and (
+            (self.parquet_sort_by is not NOTHING)
+            or (self.parquet_cluster_by is not NOTHING)
+        )
+
+    def _get_transform_key(self) -> T.Hashable:
+        """
+        Get a hashable key of the resolved ``transform_*`` config, the writers
+        with the same key produce the same transformed DataFrame.
+        """
+        def get(value, default=None):
+            return default if value is NOTHING else value
+
+        return freeze(
+            (
+                get(self.transform_columns),
+                get(self.transform_exclude),
+                get(self.transform_casts),
+                get(self.transform_shrink, False),
+                get(
+                    self.transform_categorical_threshold,
+                    DEFAULT_CATEGORICAL_THRESHOLD,
                 ),
             )
-        else:  # pragma: no cover
-            raise NotImplementedError
+        )
 
-    def to_read_kwargs(self) -> T.Dict[str, T.Any]:  # pragma: no cover
+    def has_pyarrow_write_options(self) -> bool:
         """
-        Get the appropriate read method and keyword arguments for the chosen format.
+        Check if any of ``parquet_bloom_filters``, ``parquet_write_page_index``,
+        ``parquet_use_dictionary``, ``parquet_column_compression`` and
+        ``parquet_column_encoding`` is set. The native polars writer
+        doesn't support them, the parquet output is written by pyarrow.
 
-        :return: A tuple containing the read method name and a dictionary of keyword arguments.
+        .. note::
+
+            The page index is written for the other readers (for example
+            DuckDB or Spark), :meth:`Writer.read` and :meth:`Writer.scan`
+            prune at the row group level only, by the statistics and the
+            bloom filters, they don't skip pages.
         """
-        method, kwargs = self.to_read_method_and_kwargs()
-        return kwargs
+        return self.is_parquet() and any(
+            getattr(self, name) is not NOTHING
+            for name in [
+                "parquet_bloom_filters",
+                "parquet_write_page_index",
+                "parquet_use_dictionary",
+                "parquet_column_compression",
+                "parquet_column_encoding",
+            ]
+        )
 
-    def read(
-        self,
-        file_args: T.List[T.Any],
-        read_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
-    ) -> pl.DataFrame:
+    def is_pyarrow_writer(self) -> bool:
         """
-        todo: docstring
+        Check if the parquet output is written by pyarrow, either the user
+        opted in with ``parquet_use_pyarrow=True``, or one of
+        :meth:`Writer.has_pyarrow_write_options` is set.
         """
-        method, kwargs = self.to_read_method_and_kwargs()
-        read_method = getattr(pl, method)
-        if read_kwargs is not None:  # override default kwargs
-            kwargs.update(read_kwargs)
-            # print(f"{file_args = }")
-            # print("kwargs: ")
-            # for k, v in kwargs.items():
-            #     print(f"  {k} = {v}")
-        return read_method(*file_args, **kwargs)
+        return (self.parquet_use_pyarrow is True) or self.has_pyarrow_write_options()
 
-    def to_scan_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
+    def apply_sort(self, data):
         """
-        Get the appropriate scan method and keyword arguments for the chosen format.
-
-        :return: A tuple containing the scan method name and a dictionary of keyword arguments.
+        Sort a ``DataFrame`` (or ``LazyFrame``) by ``parquet_sort_by``, or by
+        the Z-order key of ``parquet_cluster_by``,
+        see :mod:`polars_writer.cluster`.
         """
-        if self.is_csv():
-            return (
-                ScanMethodEnum.scan_csv.value,
-                resolve_kwargs(
-                    has_header=self.csv_include_header,
-                    separator=self.csv_delimiter,
-                    eol_char=self.csv_line_terminator,
-                    quote_char=self.csv_quote_char,
-                    storage_options=self.storage_options,
-                ),
-            )
-        elif self.is_json():  # pragma: no cover
-            raise ValueError("polars doesn't support 'scan_json'!")
-        elif self.is_ndjson():
-            return (ScanMethodEnum.scan_ndjson.value, dict())
-        elif self.is_parquet():
-            return (
-                ScanMethodEnum.scan_parquet,
-                resolve_kwargs(
-                    use_pyarrow=self.parquet_use_pyarrow,
-                    storage_options=self.storage_options,
+        if self.parquet_sort_by is not NOTHING:
+            return data.sort(
+                self.parquet_sort_by,
+                descending=(
+                    False
+                    if self.parquet_sort_descending is NOTHING
+                    else self.parquet_sort_descending
                 ),
-            )
-        elif self.is_delta():
-            return (
-                ScanMethodEnum.scan_delta,
-                resolve_kwargs(
-                    storage_options=self.storage_options,
+                nulls_last=(
+                    False
+                    if self.parquet_sort_nulls_last is NOTHING
+                    else self.parquet_sort_nulls_last
                 ),
             )
-        else:  # pragma: no cover
-            raise NotImplementedError
+        if self.parquet_cluster_by is not NOTHING:
+            return sort_by_z_order(data, self.parquet_cluster_by)
+        return data
 
-    def to_scan_kwargs(self) -> T.Dict[str, T.Any]:  # pragma: no cover
+    def _get_pyarrow_write_kwargs(self, df: "pl.DataFrame") -> T.Dict[str, T.Any]:
         """
-        Get the scan arguments for the write operation.
+        Get the write kwargs of the parquet options that only the pyarrow
+        writer supports:
+
+        - the ``parquet_sort_by`` order, recorded in the ``sorting_columns``
+          of every row group. It's only recorded if the output is written
+          by pyarrow anyway (see :meth:`Writer.is_pyarrow_writer`) and not
+          partitioned, otherwise the sorted frame goes to the native writer.
+        - see :meth:`Writer.has_pyarrow_write_options`.
+
+        polars overwrites ``compression`` and ``compression_level`` of the
+        ``pyarrow_options``, so the per column compression is passed as the
+        ``compression`` kwarg. The configured ``parquet_pyarrow_options`` is
+        copied, polars changes the dict it's given.
+        """
+        if (
+            not self.is_parquet()
+            or self.parquet_use_pyarrow is False
+            or self.parquet_partition_by is not NOTHING
+        ):
+            return dict()
+        kwargs = dict()
+        pyarrow_options = dict()
+        if self.parquet_sort_by is not NOTHING and self.is_pyarrow_writer():
+            sorting_columns = to_sorting_columns(
+                df.head(0).to_arrow().schema,
+                by=self.parquet_sort_by,
+                descending=(
+                    False
+                    if self.parquet_sort_descending is NOTHING
+                    else self.parquet_sort_descending
+                ),
+                nulls_last=(
+                    False
+                    if self.parquet_sort_nulls_last is NOTHING
+                    else self.parquet_sort_nulls_last
+                ),
+            )
+            if sorting_columns:
+                pyarrow_options["sorting_columns"] = sorting_columns
+        if self.parquet_bloom_filters is not NOTHING:
+            pyarrow_options["bloom_filter_options"] = {
+                col: value if value is True else dict(value)
+                for col, value in self.parquet_bloom_filters.items()
+                if col in df.columns
+            }
+        if self.parquet_write_page_index is not NOTHING:
+            pyarrow_options["write_page_index"] = self.parquet_write_page_index
+        if self.parquet_column_encoding is not NOTHING:
+            pyarrow_options["column_encoding"] = {
+                col: encoding
+                for col, encoding in self.parquet_column_encoding.items()
+                if col in df.columns
+            }
+        if (self.parquet_use_dictionary is not NOTHING) or (
+            self.parquet_column_encoding is not NOTHING
+        ):
+            use_dictionary = (
+                dict()
+                if self.parquet_use_dictionary is NOTHING
+                else self.parquet_use_dictionary
+            )
+            column_encoding = pyarrow_options.get("column_encoding", dict())
+            pyarrow_options["use_dictionary"] = [
+                col
+                for col in df.columns
+                if use_dictionary.get(col, True) and col not in column_encoding
+            ]
+        if self.parquet_column_compression is not NOTHING:
+            default = (
+                ParquetCompressionEnum.zstd.value
+                if self.parquet_compression is NOTHING
+                else self.parquet_compression
+            )
+            codecs = {
+                col: self.parquet_column_compression.get(col, default)
+                for col in df.columns
+            }
+            kwargs["compression"] = {
+                col: "none" if codec == ParquetCompressionEnum.uncompressed.value else codec
+                for col, codec in codecs.items()
+            }
+            if self.parquet_compression_level is not NOTHING:
+                kwargs["compression_level"] = {
+                    col: self.parquet_compression_level
+                    for col, codec in codecs.items()
+                    if codec == default and codec in parquet_compression_level_codecs
+                }
+        if not (kwargs or pyarrow_options):
+            return dict()
+        if self.parquet_pyarrow_options not in (NOTHING, None):
+            pyarrow_options = {**self.parquet_pyarrow_options, **pyarrow_options}
+        kwargs.update(use_pyarrow=True, pyarrow_options=pyarrow_options)
+        return kwargs
+
+    def _get_stages(self) -> _WriteStages:
+        """
+        Get the pre-write stages applied by :meth:`Writer._prepare`.
+        """
+        return _WriteStages(
+            has_sort=self.has_sort(),
+            has_transform=self.has_transform(),
+            is_pyarrow_writer=self.is_parquet() and self.is_pyarrow_writer(),
+        )
+
+    def _resolve_write(
+        self,
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> T.Tuple[str, T.Dict[str, T.Any]]:
+        """
+        Get the write method and keyword arguments, overridden by ``write_kwargs``.
+        """
+        method, kwargs = self._method_and_kwargs
+        kwargs = dict(kwargs)
+        if write_kwargs is not None:  # override default kwargs
+            kwargs.update(write_kwargs)
+        return method, kwargs
+
+    def _prepare(
+        self,
+        df: "pl.DataFrame",
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        transform_result: T.Optional[TransformResult] = None,
+        stages: T.Optional[_WriteStages] = None,
+    ) -> T.Tuple[
+        "pl.DataFrame",
+        T.Optional[T.Dict[str, T.Any]],
+        T.Optional[TransformResult],
+    ]:
+        """
+        Apply the pre-write stages, the sort (before the transform, so a
+        string column is still sorted lexically) then the transform.
+
+        :param transform_result: The result of the same transform of ``df``
+            already computed, for example shared by :meth:`Writer.fan_out`,
+            used instead of transforming again. It's ignored if the output
+            is sorted, the sort comes first.
+        :param stages: The stages resolved once by :meth:`Writer._get_stages`,
+            for example by :meth:`Writer.write_many` for the whole batch.
+
+        :return: The DataFrame to write, the write kwargs (``write_kwargs``
+            itself unless the pyarrow writer adds kwargs for ``df``) and the
+            :class:`~polars_writer.transform.TransformResult` (None if
+            no transform is configured).
+        """
+        if stages is None:
+            stages = self._stages
+        if stages.has_sort:
+            df = self.apply_sort(df)
+            transform_result = None
+        if stages.has_transform:
+            if transform_result is None:
+                transform_result = self.transform(df, return_result=True)
+            df = transform_result.df
+        else:
+            transform_result = None
+        if stages.is_pyarrow_writer:
+            pyarrow_write_kwargs = self._get_pyarrow_write_kwargs(df)
+            if pyarrow_write_kwargs:
+                if write_kwargs is not None:
+                    pyarrow_write_kwargs.update(write_kwargs)
+                write_kwargs = pyarrow_write_kwargs
+        return df, write_kwargs, transform_result
+
+    def write(
+        self,
+        df: "pl.DataFrame",
+        file_args: T.List[T.Any],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        return_result: bool = False,
+    ):
+        """
+        Write the given Polars DataFrame to the specified output.
+
+        :param df: The Polars DataFrame to write.
+        :param file_args: Arguments for the file path or location.
+        :param write_kwargs: Optional keyword arguments for the write method.
+        :param return_result: If True, return a :class:`~polars_writer.hooks.WriteResult`
+            with rows, bytes written and timing, the original return value
+            is in ``WriteResult.output``.
+
+        The parquet output is sorted by :meth:`Writer.apply_sort` first if
+        ``parquet_sort_by`` or ``parquet_cluster_by`` is set, then the
+        DataFrame goes through :meth:`Writer.transform` if any
+        ``transform_*`` field is set.
+
+        :return: The result of the write operation (format-dependent).
+            For rolling output, ``file_args[0]`` is the output directory
+            and the list of :class:`RolledFile` is returned,
+            see :meth:`Writer.write_rolling`.
+        """
+        if (
+            self._is_direct
+            and return_result is False
+            and hook_registry.is_empty()
+            and not (file_args and is_s3_uri(file_args[0]))
+        ):
+            # no pre-write stage, hook, rolling or compressed output
+            method, kwargs = self._resolve_write(write_kwargs)
+            return getattr(df, method)(*file_args, **kwargs)
+        df, write_kwargs, transform_result = self._prepare(df, write_kwargs)
+        method, kwargs = self._resolve_write(write_kwargs)
+        return self._write_prepared(
+            df, file_args, method, kwargs, transform_result, return_result
+        )
+
+    def _write_prepared(
+        self,
+        df: "pl.DataFrame",
+        file_args: T.List[T.Any],
+        method: str,
+        kwargs: T.Dict[str, T.Any],
+        transform_result: T.Optional[TransformResult],
+        return_result: bool,
+    ):
+        """
+        The rest of :meth:`Writer.write` after :meth:`Writer._prepare`,
+        write with the resolved method and kwargs and report the result
+        to the hooks.
+        """
+        if return_result is False and hook_registry.is_empty():
+            return self._write(df, file_args, method, kwargs)
+
+        event = IOEvent(
+            operation=OperationEnum.write.value,
+            format=self.format,
+            method=method,
+            kwargs=kwargs,
+            file_args=file_args,
+        )
+        counter = ByteCounter(
+            file_args[0] if file_args else None,
+            append=self.is_delta(),
+            rolling=self._is_rolling,
+        )
+        result = self._run_instrumented(
+            event=event,
+            func=lambda: self._write(df, file_args, method, kwargs),
+            make_result=lambda output, wall_time, cpu_time: WriteResult(
+                format=self.format,
+                method=method,
+                kwargs=kwargs,
+                n_rows=df.height,
+                n_columns=df.width,
+                n_bytes=counter.count(output),
+                wall_time=wall_time,
+                cpu_time=cpu_time,
+                output=output,
+                transform=transform_result,
+            ),
+        )
+        if return_result:
+            return result
+        return result.output
+
+    def _write(
+        self,
+        df: "pl.DataFrame",
+        file_args: T.List[T.Any],
+        method: str,
+        kwargs: T.Dict[str, T.Any],
+    ):
+        if self._is_rolling:
+            return self._write_rolling(
+                df,
+                dir_root=file_args[0],
+                method=method,
+                kwargs=kwargs,
+            )
+        # print(f"{file_args = }")
+        # print("kwargs: ")
+        # for k, v in kwargs.items():
+        #     print(f"  {k} = {v}")
+        return self._write_file(df, method, kwargs, file_args)
+
+    def _write_file(
+        self,
+        df: "pl.DataFrame",
+        method: str,
+        kwargs: T.Dict[str, T.Any],
+        file_args: T.List[T.Any],
+    ):
+        """
+        Call the resolved write method, if the CSV / JSON / NDJSON output
+        is compressed, polars encodes straight into a streaming compressor
+        wrapping ``file_args[0]``. If ``file_args[0]`` is a ``s3://`` uri
+        (except for delta), polars encodes into a parallel multipart upload,
+        see :meth:`Writer.open_s3_upload`.
+        """
+        if file_args and is_s3_uri(file_args[0]) and not self.is_delta():
+            with self.open_s3_upload(file_args[0]) as upload:
+                return self._write_file(
+                    df, method, kwargs, [upload, *file_args[1:]]
+                )
+        compression, level = self._text_compression
+        if compression is None:
+            return getattr(df, method)(*file_args, **kwargs)
+        with open_compressor(file_args[0], compression, level) as stream:
+            return getattr(df, method)(stream, *file_args[1:], **kwargs)
+
+    def to_bytes(
+        self,
+        df: "pl.DataFrame",
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> memoryview:
+        """
+        Encode the given Polars DataFrame in memory and return the encoded
+        content. It's a view of the internal buffer of the ``io.BytesIO``
+        polars writes into, so the payload is not copied again like
+        ``getvalue()`` does, call ``bytes()`` on it if a copy is needed.
+        The rolling output config is ignored, the output is always one payload.
+
+        :param df: The Polars DataFrame to encode.
+        :param write_kwargs: Optional keyword arguments for the write method.
+        """
+        if self.is_delta():
+            raise ValueError("delta format doesn't support to_bytes!")
+        df, write_kwargs, _ = self._prepare(df, write_kwargs)
+        method, kwargs = self._resolve_write(write_kwargs)
+        buffer = io.BytesIO()
+        self._write_file(df, method, kwargs, [buffer])
+        return buffer.getbuffer()
+
+    def iter_bytes(
+        self,
+        df: "pl.DataFrame",
+        chunk_rows: int = DEFAULT_ITER_CHUNK_ROWS,
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> T.Iterator[bytes]:
+        """
+        Encode the given Polars DataFrame ``chunk_rows`` rows at a time and
+        yield the encoded chunks, the concatenated chunks are the same as
+        the :meth:`Writer.to_bytes` output. The first chunk is ready as soon
+        as the first rows are encoded, and only one chunk is in memory,
+        for example to stream an HTTP response.
+
+        - CSV: the header is only in the first chunk.
+        - NDJSON: each chunk is a block of lines.
+        - JSON: ``[``, then the rows of each chunk separated by ``,``, then ``]``.
+        - compressed CSV / JSON / NDJSON: the chunks of one compressed stream.
+        - parquet / ipc / ipc_stream: the whole payload is one chunk,
+          the file can't be encoded in independent pieces.
+
+        :param df: The Polars DataFrame to encode.
+        :param chunk_rows: The number of rows encoded per chunk.
+        :param write_kwargs: Optional keyword arguments for the write method.
+        """
+        if chunk_rows < 1:
+            raise ValueError(f"Invalid chunk_rows: {chunk_rows}")
+        if not (self.is_csv() or self.is_json() or self.is_ndjson()):
+            yield bytes(self.to_bytes(df, write_kwargs))
+            return
+
+        df, write_kwargs, _ = self._prepare(df, write_kwargs)
+        method, kwargs = self._resolve_write(write_kwargs)
+        sink = io.BytesIO()
+
+        def drain() -> bytes:
+            data = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return data
+
+        compression, level = self.get_text_compression()
+        with contextlib.ExitStack() as stack:
+            if compression is None:
+                stream = sink
+            else:
+                stream = stack.enter_context(
+                    open_compressor(sink, compression, level)
+                )
+            if self.is_json():
+                stream.write(b"[")
+            # an empty DataFrame is still one chunk, the CSV header or ``[]``
+            offsets = range(0, max(df.height, 1), chunk_rows)
+            for ith, offset in enumerate(offsets):
+                chunk = df.slice(offset, chunk_rows)
+                if self.is_csv():
+                    if ith:
+                        chunk.write_csv(stream, **{**kwargs, "include_header": False})
+                    else:
+                        chunk.write_csv(stream, **kwargs)
+                elif self.is_json():
+                    # strip the ``[`` and ``]`` of each chunk
+                    data = chunk.write_json(**kwargs).encode("utf-8")[1:-1]
+                    if ith and data:
+                        stream.write(b",")
+                    stream.write(data)
+                else:
+                    chunk.write_ndjson(stream, **kwargs)
+                data = drain()
+                if data:
+                    yield data
+            if self.is_json():
+                stream.write(b"]")
+        # closing the compressor flushes the rest of the compressed stream
+        data = drain()
+        if data:
+            yield data
+
+    def get_s3_client(self):
+        """
+        Get the boto3 S3 client, it is created from ``storage_options``
+        on the first call and reused, you can also assign your own client to
+        ``Writer.s3_client``.
+        """
+        if self.s3_client is None:
+            self.s3_client = new_s3_client(
+                None if self.storage_options is NOTHING else self.storage_options
+            )
+        return self.s3_client
+
+    def open_s3_upload(
+        self,
+        uri: str,
+        extra_args: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> S3MultipartUpload:
+        """
+        Open a writable binary file object that streams to ``s3://bucket/key``
+        with parallel multipart upload, the part size and the number of
+        concurrent part uploads are ``s3_part_size`` and ``s3_max_concurrency``.
+        The object is created when it is closed, leaving the ``with`` block
+        with an exception aborts the upload.
+        """
+        bucket, key = split_s3_uri(uri)
+        return S3MultipartUpload(
+            client=self.get_s3_client(),
+            bucket=bucket,
+            key=key,
+            part_size=(
+                DEFAULT_PART_SIZE
+                if self.s3_part_size is NOTHING
+                else self.s3_part_size
+            ),
+            max_concurrency=(
+                DEFAULT_MAX_CONCURRENCY
+                if self.s3_max_concurrency is NOTHING
+                else self.s3_max_concurrency
+            ),
+            extra_args=extra_args,
+        )
+
+    def get_rows_per_file(self, df: "pl.DataFrame") -> int:
+        """
+        Get the number of rows per file for rolling output. ``max_bytes_per_file``
+        is converted to rows based on the in-memory ``estimated_size``
+        of the DataFrame, the encoded size is usually smaller for parquet
+        and could be slightly larger for text formats.
+        """
+        rows_per_file = None
+        if self.max_rows_per_file is not NOTHING:
+            rows_per_file = self.max_rows_per_file
+        if self.max_bytes_per_file is not NOTHING and df.height:
+            bytes_per_row = df.estimated_size() / df.height
+            rows = max(1, int(self.max_bytes_per_file // max(bytes_per_row, 1)))
+            if rows_per_file is None:
+                rows_per_file = rows
+            else:
+                rows_per_file = min(rows_per_file, rows)
+        if rows_per_file is None:
+            rows_per_file = max(df.height, 1)
+        return rows_per_file
+
+    def write_rolling(
+        self,
+        df: "pl.DataFrame",
+        dir_root: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        max_workers: T.Optional[int] = None,
+    ) -> T.List[RolledFile]:
+        """
+        Split the given Polars DataFrame into multiple files of at most
+        ``max_rows_per_file`` rows / ``max_bytes_per_file`` bytes, named by
+        ``file_name_template``, for example ``part-00000.csv``,
+        ``part-00001.csv``. Each file is a complete file of its format,
+        so the CSV header is repeated in every file.
+        The slices are zero-copy and written in parallel on a thread pool.
+
+        If ``dir_root`` is a ``s3://bucket/prefix`` uri, each file is uploaded
+        to ``s3://bucket/prefix/${file_name}`` by a multipart upload, see
+        :meth:`Writer.open_s3_upload`. Other remote uris are not supported.
+
+        :param df: The Polars DataFrame to write.
+        :param dir_root: The output directory.
+        :param write_kwargs: Optional keyword arguments for the write method.
+        :param max_workers: The max number of threads.
+
+        :return: The manifest, a list of :class:`RolledFile` in row order.
+        """
+        method, kwargs = self._resolve_write(write_kwargs)
+        return self._write_rolling(df, dir_root, method, kwargs, max_workers)
+
+    def _write_rolling(
+        self,
+        df: "pl.DataFrame",
+        dir_root: T.Union[str, Path],
+        method: str,
+        kwargs: T.Dict[str, T.Any],
+        max_workers: T.Optional[int] = None,
+    ) -> T.List[RolledFile]:
+        """
+        :meth:`Writer.write_rolling` with the resolved method and kwargs.
+        """
+        if self.is_delta():
+            raise ValueError("delta format doesn't support rolling output!")
+        self._check_local_dir(dir_root, "write_rolling", allow_s3=True)
+
+        if is_s3_uri(dir_root):
+            prefix = str(dir_root).rstrip("/")
+
+            def get_path(index: int) -> str:
+                return f"{prefix}/{self.get_file_name(index)}"
+
+        else:
+            dir_root = Path(dir_root)
+            dir_root.mkdir(parents=True, exist_ok=True)
+
+            def get_path(index: int) -> Path:
+                return dir_root.joinpath(self.get_file_name(index))
+
+        rows_per_file = self.get_rows_per_file(df)
+        manifest = list()
+        for index, offset in enumerate(range(0, max(df.height, 1), rows_per_file)):
+            n_rows = min(rows_per_file, df.height - offset)
+            path = get_path(index)
+            manifest.append(RolledFile(path=path, offset=offset, n_rows=n_rows))
+
+        def write_one(rolled_file: RolledFile):
+            sub_df = df.slice(rolled_file.offset, rolled_file.n_rows)
+            self._write_file(sub_df, method, kwargs, [rolled_file.path])
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(write_one, manifest))
+        return manifest
+
+    def _check_local_dir(
+        self,
+        dir_root: T.Any,
+        method: str,
+        allow_s3: bool = False,
+    ):
+        """
+        Raise ``ValueError`` if the output directory is a remote uri,
+        the methods that write many files only support a local directory
+        (and ``s3://`` if ``allow_s3``).
+        """
+        if is_remote_path(dir_root) and not (allow_s3 and is_s3_uri(dir_root)):
+            raise ValueError(
+                f"{method} doesn't support the remote output directory {dir_root!r}!"
+            )
+
+    def open_append(
+        self,
+        path: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+    ) -> AppendSession:
+        """
+        Open a persistent :class:`AppendSession` to append multiple DataFrames
+        to the end of a CSV / NDJSON file. Use it as a context manager::
+
+            with writer.open_append("data.csv") as session:
+                for df in batches:
+                    session.write(df)
+
+        :param path: The path of the file to append to, it will be created
+            if not exists.
+        :param write_kwargs: Optional keyword arguments for the write method.
+        :param buffer_size: The buffer size of the file handle.
+        """
+        return AppendSession(
+            writer=self,
+            path=path,
+            write_kwargs=write_kwargs,
+            buffer_size=buffer_size,
+        )
+
+    def open_delta_append(
+        self,
+        table: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        max_rows: T.Optional[int] = DEFAULT_COALESCE_MAX_ROWS,
+        max_bytes: T.Optional[int] = DEFAULT_COALESCE_MAX_BYTES,
+        max_seconds: T.Optional[float] = DEFAULT_COALESCE_MAX_SECONDS,
+    ) -> DeltaAppendBuffer:
+        """
+        Open a :class:`~polars_writer.delta.DeltaAppendBuffer` that coalesces
+        many small appends to a Delta table into fewer commits.
+        Use it as a context manager::
+
+            with writer.open_delta_append("s3://bucket/table") as buffer:
+                for df in events:
+                    buffer.write(df)
+
+        :param table: The Delta table uri.
+        :param write_kwargs: Optional keyword arguments for ``write_delta``.
+        :param max_rows: Commit when the buffered rows reach this number,
+            None to disable.
+        :param max_bytes: Commit when the in-memory size of the buffered
+            frames reach this number, None to disable.
+        :param max_seconds: Commit when the oldest buffered frame is older
+            than this number of seconds, None to disable.
+        """
+        return DeltaAppendBuffer(
+            writer=self,
+            table=table,
+            write_kwargs=write_kwargs,
+            max_rows=max_rows,
+            max_bytes=max_bytes,
+            max_seconds=max_seconds,
+        )
+
+    def delta_optimize(
+        self,
+        table: T.Union[str, Path],
+        target_file_size: T.Optional[int] = NOTHING,
+        z_order_by: T.Optional[T.List[str]] = NOTHING,
+        partition_filters: T.Optional[T.List[T.Tuple[str, str, T.Any]]] = None,
+        max_concurrent_tasks: T.Optional[int] = NOTHING,
+    ) -> T.Dict[str, T.Any]:
+        """
+        Compact the small files of the Delta table, and Z-order them if
+        ``z_order_by`` is given, see :func:`~polars_writer.delta.optimize_table`.
+        The arguments default to the ``delta_optimize_*`` config fields,
+        the table is opened with ``storage_options``.
+
+        :return: The metrics of the optimize.
+        """
+        if self.is_delta() is False:
+            raise ValueError("delta_optimize only supports 'delta' format!")
+        if target_file_size is NOTHING:
+            target_file_size = self.delta_optimize_target_file_size
+        if z_order_by is NOTHING:
+            z_order_by = self.delta_optimize_z_order_by
+        if max_concurrent_tasks is NOTHING:
+            max_concurrent_tasks = self.delta_optimize_max_concurrent_tasks
+        return optimize_table(
+            table=table,
+            storage_options=(
+                None if self.storage_options is NOTHING else self.storage_options
+            ),
+            target_file_size=None if target_file_size is NOTHING else target_file_size,
+            z_order_by=None if z_order_by is NOTHING else z_order_by,
+            partition_filters=partition_filters,
+            max_concurrent_tasks=(
+                None if max_concurrent_tasks is NOTHING else max_concurrent_tasks
+            ),
+        )
+
+    def delta_vacuum(
+        self,
+        table: T.Union[str, Path],
+        retention_hours: T.Optional[int] = NOTHING,
+        dry_run: bool = NOTHING,
+        enforce_retention_duration: bool = NOTHING,
+    ) -> T.List[str]:
+        """
+        Delete the files no longer referenced by the Delta table, see
+        :func:`~polars_writer.delta.vacuum_table`. The arguments default to
+        the ``delta_vacuum_*`` config fields, the table is opened with
+        ``storage_options``.
+
+        :return: The list of deleted (or to be deleted if ``dry_run``) files.
+        """
+        if self.is_delta() is False:
+            raise ValueError("delta_vacuum only supports 'delta' format!")
+        if retention_hours is NOTHING:
+            retention_hours = self.delta_vacuum_retention_hours
+        if dry_run is NOTHING:
+            dry_run = self.delta_vacuum_dry_run
+        if enforce_retention_duration is NOTHING:
+            enforce_retention_duration = self.delta_vacuum_enforce_retention_duration
+        return vacuum_table(
+            table=table,
+            storage_options=(
+                None if self.storage_options is NOTHING else self.storage_options
+            ),
+            retention_hours=None if retention_hours is NOTHING else retention_hours,
+            dry_run=False if dry_run is NOTHING else dry_run,
+            enforce_retention_duration=(
+                True
+                if enforce_retention_duration is NOTHING
+                else enforce_retention_duration
+            ),
+        )
+
+    def upsert(
+        self,
+        df: "pl.DataFrame",
+        table: T.Union[str, Path],
+        keys: T.List[str],
+        partition_cols: T.Optional[T.List[str]] = None,
+    ) -> UpsertResult:
+        """
+        Upsert the DataFrame into the Delta table by ``keys``, see
+        :func:`~polars_writer.delta.upsert_table`. The merge predicate is
+        derived from the batch, the partition values of ``partition_cols``
+        plus the min / max of each key, so the merge only scans and rewrites
+        the affected files. Matched rows without any change are not rewritten.
+
+        ``storage_options`` and ``delta_merge_options`` are used for the merge,
+        ``delta_write_options`` is used if the table is created. The
+        DataFrame goes through the ``transform_*`` stage of
+        :meth:`Writer.write` first.
+
+        :return: A :class:`~polars_writer.delta.UpsertResult` with the rows
+            inserted, updated and unchanged, and the files rewritten.
+        """
+        if self.is_delta() is False:
+            raise ValueError("upsert only supports 'delta' format!")
+        df, _, _ = self._prepare(df)
+        return upsert_table(
+            df,
+            table=table,
+            keys=keys,
+            partition_cols=partition_cols,
+            storage_options=(
+                None if self.storage_options is NOTHING else self.storage_options
+            ),
+            merge_options=(
+                None
+                if self.delta_merge_options is NOTHING
+                else self.delta_merge_options
+            ),
+            write_options=(
+                None
+                if self.delta_write_options is NOTHING
+                else self.delta_write_options
+            ),
+        )
+
+    def autotune(
+        self,
+        sample_df: "pl.DataFrame",
+        objective: str = ObjectiveEnum.balanced.value,
+        budget_seconds: float = 10.0,
+        compression_candidates: T.Optional[
+            T.List[T.Tuple[str, T.Optional[int]]]
+        ] = None,
+        row_group_size_candidates: T.Optional[T.List[int]] = None,
+    ) -> "Writer":
+        """
+        Pick ``parquet_compression``, ``parquet_compression_level`` and
+        ``parquet_row_group_size`` by trial-encoding a sample DataFrame in
+        memory, see :func:`polars_writer.autotune.autotune`.
+        The tuned config can be stored with :meth:`Writer.to_dict`
+        and reused for the full size writes.
+
+        :param sample_df: A representative sample of the data.
+        :param objective: One of :class:`~polars_writer.autotune.ObjectiveEnum`,
+            ``size``, ``write_speed``, ``read_speed`` or ``balanced``.
+        :param budget_seconds: No new trial starts after this many seconds.
+        :param compression_candidates: Optional list of
+            ``(compression, compression_level)`` to try.
+        :param row_group_size_candidates: Optional list of row group sizes to try.
+
+        :return: A new :class:`Writer` with the tuned parquet settings.
+        """
+        tuned_writer, _ = autotune(
+            writer=self,
+            sample_df=sample_df,
+            objective=objective,
+            budget_seconds=budget_seconds,
+            compression_candidates=compression_candidates,
+            row_group_size_candidates=row_group_size_candidates,
+        )
+        return tuned_writer
+
+    def write_many(
+        self,
+        items: T.Iterable[T.Tuple["pl.DataFrame", T.List[T.Any]]],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        max_workers: T.Optional[int] = None,
+        ordered: bool = False,
+    ) -> T.List[BatchItemResult]:
+        """
+        Write many Polars DataFrames with the same configuration concurrently.
+
+        The write method, keyword arguments and the pre-write stages are
+        resolved only once, then the writes are fanned out on a bounded
+        thread pool (polars releases the GIL while encoding), each item goes
+        through the same stages as :meth:`Writer.write`, the sort, the
+        transform, the rolling output and the hooks. A failed item doesn't abort the batch, the exception
+        is captured in its :class:`BatchItemResult`.
+
+        :param items: An iterable of ``(df, file_args)`` pairs.
+        :param write_kwargs: Optional keyword arguments for the write method,
+            applied to every item.
+        :param max_workers: The max number of threads.
+        :param ordered: If True, the results follow the input order,
+            otherwise they come in completion order.
+
+        :return: A list of :class:`BatchItemResult`, one for each item.
+        """
+        # resolved once for the whole batch
+        stages = self._stages
+        method, kwargs = self._resolve_write(write_kwargs)
+
+        def write_one(
+            index: int,
+            df: "pl.DataFrame",
+            file_args: T.List[T.Any],
+        ) -> BatchItemResult:
+            try:
+                # the same DataFrame may appear in multiple items, polars
+                # doesn't allow writing one DataFrame object from multiple
+                # threads at the same time, clone is cheap (no data copy)
+                df, item_write_kwargs, transform_result = self._prepare(
+                    df.clone(), write_kwargs, stages=stages
+                )
+                item_kwargs = kwargs
+                if item_write_kwargs is not write_kwargs:
+                    # the pyarrow writer kwargs of this DataFrame
+                    item_kwargs = {**kwargs, **item_write_kwargs}
+                result = self._write_prepared(
+                    df,
+                    file_args,
+                    method,
+                    item_kwargs,
+                    transform_result,
+                    return_result=False,
+                )
+                return BatchItemResult(index=index, file_args=file_args, result=result)
+            except Exception as e:
+                return BatchItemResult(index=index, file_args=file_args, error=e)
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(write_one, index, df, file_args)
+                for index, (df, file_args) in enumerate(items)
+            ]
+            if ordered:
+                return [future.result() for future in futures]
+            else:
+                return [future.result() for future in as_completed(futures)]
+
+    @classmethod
+    def fan_out(
+        cls,
+        df: "pl.DataFrame",
+        targets: T.Iterable[T.Tuple["Writer", T.List[T.Any]]],
+        max_workers: T.Optional[int] = None,
+    ) -> T.List[BatchItemResult]:
+        """
+        Write one Polars DataFrame to many targets concurrently, for example
+        the same frame as parquet for analysts, CSV for end users and NDJSON
+        for an API cache.
+
+        The targets with the same ``transform_*`` config share one
+        :meth:`Writer.transform` of the DataFrame, computed once before the
+        fan out (a sorted parquet target transforms its own sorted copy).
+        Then every target is encoded on a bounded thread pool (polars
+        releases the GIL while encoding), so the total latency is about that
+        of the slowest target instead of the sum. A failed target doesn't
+        abort the others, the exception is captured in its
+        :class:`BatchItemResult`.
+
+        :param df: The Polars DataFrame to write.
+        :param targets: An iterable of ``(writer, file_args)`` pairs.
+        :param max_workers: The max number of threads, default to the
+            number of targets.
+
+        :return: A list of :class:`BatchItemResult` in the order of the
+            targets, the ``result`` is the
+            :class:`~polars_writer.hooks.WriteResult` of the target.
+        """
+        targets = list(targets)
+        if not targets:
+            return []
+        transform_results = dict()
+        for writer, _ in targets:
+            if writer.has_transform() and not writer.has_sort():
+                key = writer._get_transform_key()
+                if key not in transform_results:
+                    try:
+                        transform_results[key] = writer.transform(
+                            df, return_result=True
+                        )
+                    except Exception as e:
+                        transform_results[key] = e
+
+        def write_one(
+            index: int,
+            writer: "Writer",
+            file_args: T.List[T.Any],
+        ) -> BatchItemResult:
+            try:
+                transform_result = None
+                if writer.has_transform() and not writer.has_sort():
+                    transform_result = transform_results[writer._get_transform_key()]
+                    if isinstance(transform_result, Exception):
+                        raise transform_result
+                # polars doesn't allow writing one DataFrame object from
+                # multiple threads at the same time, clone is cheap
+                # (no data copy)
+                if transform_result is not None:
+                    transform_result = dataclasses.replace(
+                        transform_result, df=transform_result.df.clone()
+                    )
+                target_df, write_kwargs, transform_result = writer._prepare(
+                    df.clone(), transform_result=transform_result
+                )
+                method, kwargs = writer._resolve_write(write_kwargs)
+                result = writer._write_prepared(
+                    target_df,
+                    file_args,
+                    method,
+                    kwargs,
+                    transform_result,
+                    return_result=True,
+                )
+                return BatchItemResult(index=index, file_args=file_args, result=result)
+            except Exception as e:
+                return BatchItemResult(index=index, file_args=file_args, error=e)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers or len(targets)) as executor:
+            futures = [
+                executor.submit(write_one, index, writer, file_args)
+                for index, (writer, file_args) in enumerate(targets)
+            ]
+            return [future.result() for future in futures]
+
+    def write_partitioned(
+        self,
+        df: "pl.DataFrame",
+        dir_root: T.Union[str, Path],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        max_workers: T.Optional[int] = None,
+    ) -> T.List[Path]:
+        """
+        Write the given Polars DataFrame as a hive partitioned parquet dataset,
+        partitioned by ``parquet_partition_by``. Unlike
+        ``write_parquet(..., partition_by=...)``, each partition (and each
+        ``parquet_partition_chunk_size_bytes`` chunk of it) is encoded
+        and written in parallel on a thread pool.
+
+        The layout is the same as polars, for example
+        ``${dir_root}/year=2024/month=1/00000000.parquet``.
+
+        The DataFrame is sorted and transformed first, like :meth:`Writer.write`.
+
+        :param df: The Polars DataFrame to write.
+        :param dir_root: The root directory of the dataset.
+        :param write_kwargs: Optional keyword arguments for ``write_parquet``.
+        :param max_workers: The max number of threads to write partitions.
+
+        :return: The list of parquet files written.
+        """
+        if self.is_parquet() is False:
+            raise ValueError("write_partitioned only supports 'parquet' format!")
+        if self.parquet_partition_by is NOTHING or not self.parquet_partition_by:
+            raise ValueError("parquet_partition_by is not defined!")
+        self._check_local_dir(dir_root, "write_partitioned")
+        if isinstance(self.parquet_partition_by, str):
+            partition_by = [self.parquet_partition_by]
+        else:
+            partition_by = list(self.parquet_partition_by)
+        if self.parquet_partition_chunk_size_bytes is NOTHING:
+            chunk_size = DEFAULT_PARTITION_CHUNK_SIZE_BYTES
+        else:
+            chunk_size = self.parquet_partition_chunk_size_bytes
+
+        df, write_kwargs, _ = self._prepare(df, write_kwargs)
+        method, kwargs = self.to_method_and_kwargs()
+        kwargs.pop("partition_by", None)
+        kwargs.pop("partition_chunk_size_bytes", None)
+        if write_kwargs is not None:  # override default kwargs
+            kwargs.update(write_kwargs)
+
+        dir_root = Path(dir_root)
+        tasks = list()
+        partitions = df.partition_by(partition_by, as_dict=True, include_key=False)
+        for key, sub_df in partitions.items():
+            dir_partition = dir_root.joinpath(
+                *[
+                    f"{col}={_to_hive_value(value)}"
+                    for col, value in zip(partition_by, key)
+                ]
+            )
+            # at least one row per chunk, no empty file
+            n_chunks = min(
+                max(1, math.ceil(sub_df.estimated_size() / chunk_size)),
+                max(1, sub_df.height),
+            )
+            chunk_rows = max(1, math.ceil(sub_df.height / n_chunks))
+            offsets = range(0, sub_df.height, chunk_rows) if sub_df.height else [0]
+            for ith, offset in enumerate(offsets):
+                path = dir_partition.joinpath(f"{ith:08d}.parquet")
+                tasks.append((sub_df.slice(offset, chunk_rows), path))
+
+        def write_one(task: T.Tuple["pl.DataFrame", Path]) -> Path:
+            sub_df, path = task
+            path.parent.mkdir(parents=True, exist_ok=True)
+            getattr(sub_df, method)(path, **kwargs)
+            return path
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(write_one, tasks))
+
+    def has_sink(self) -> bool:
+        """
+        Check if the chosen format can be written by a ``LazyFrame.sink_*`` method.
+        polars sinks can only write to a path, so compressed CSV / NDJSON
+        can't be sunk either, nor with ``transform_shrink``. The parquet sink
+        only writes one file with the native writer, so the parquet output
+        written by pyarrow (see :meth:`Writer.is_pyarrow_writer`), with
+        ``parquet_pyarrow_options`` or partitioned by ``parquet_partition_by``
+        can't be sunk either.
+        """
+        if (
+            self.is_text_compressed()
+            or self.transform_shrink is True
+        ):
+            return False
+        if self.is_parquet() and (
+            self.is_pyarrow_writer()
+            or self.parquet_pyarrow_options not in (NOTHING, None)
+            or self.parquet_partition_by not in (NOTHING, None)
+        ):
+            return False
+        return self.is_csv() or self.is_ndjson() or self.is_parquet() or self.is_ipc()
+
+    def to_sink_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
+        """
+        Get the appropriate ``LazyFrame`` sink method and keyword arguments
+        for the chosen format.
+
+        :return: A tuple containing the sink method name and a dictionary of keyword arguments.
+        """
+        if self.is_csv():
+            return (
+                SinkMethodEnum.sink_csv.value,
+                resolve_kwargs(
+                    include_header=self.csv_include_header,
+                    separator=self.csv_delimiter,
+                    line_terminator=self.csv_line_terminator,
+                    quote_char=self.csv_quote_char,
+                    datetime_format=self.csv_datetime_format,
+                    date_format=self.csv_date_format,
+                    float_scientific=self.csv_float_scientific,
+                    float_precision=self.csv_float_precision,
+                    null_value=self.csv_null_value,
+                    quote_style=self.csv_quote_style,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_json():
+            raise ValueError("polars doesn't support 'sink_json'!")
+        elif self.is_ndjson():
+            return (
+                SinkMethodEnum.sink_ndjson.value,
+                resolve_kwargs(
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_parquet():
+            return (
+                SinkMethodEnum.sink_parquet.value,
+                resolve_kwargs(
+                    compression=self.parquet_compression,
+                    compression_level=self.parquet_compression_level,
+                    statistics=self.parquet_statistics,
+                    row_group_size=self.parquet_row_group_size,
+                    data_page_size=self.parquet_data_page_size,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_delta():
+            raise ValueError("polars doesn't support 'sink_delta'!")
+        elif self.is_ipc():
+            return (
+                SinkMethodEnum.sink_ipc.value,
+                resolve_kwargs(
+                    # polars sink_ipc defaults to zstd and uses None for
+                    # uncompressed, write_ipc defaults to uncompressed
+                    compression=(
+                        None
+                        if self.ipc_compression
+                        in (NOTHING, IpcCompressionEnum.uncompressed.value)
+                        else self.ipc_compression
+                    ),
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_ipc_stream():
+            raise ValueError("polars doesn't support 'sink_ipc_stream'!")
+        else:  # pragma: no cover
+            raise NotImplementedError
+
+    def to_sink_kwargs(self) -> T.Dict[str, T.Any]:  # pragma: no cover
+        """
+        Get the keyword arguments for the sink operation.
+
+        A dictionary of keyword arguments for the sink method.
+        """
+        method, kwargs = self.to_sink_method_and_kwargs()
+        return kwargs
+
+    def sink(
+        self,
+        lf: "pl.LazyFrame",
+        file_args: T.List[T.Any],
+        sink_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        collect_fallback: bool = True,
+    ):
+        """
+        Stream the given Polars LazyFrame to the specified output using the
+        polars streaming engine, so the full result never has to be
+        materialized in memory.
+
+        For the configs that polars cannot sink (``json``, ``delta``,
+        compressed ``csv`` / ``ndjson``, see :meth:`Writer.has_sink`), the
+        LazyFrame is collected and written by :meth:`Writer.write` when
+        ``collect_fallback`` is True, otherwise a ``ValueError`` is raised.
+
+        The ``parquet_sort_by`` / ``parquet_cluster_by`` sort is added to the
+        query, the polars sink doesn't record the ``sorting_columns``. So are
+        the ``transform_columns`` / ``transform_exclude`` projection and the
+        ``transform_casts``. The ``transform_shrink`` needs the statistics of
+        the whole result, the LazyFrame is collected and written then.
+
+        :param lf: The Polars LazyFrame to write.
+        :param file_args: Arguments for the file path or location.
+        :param sink_kwargs: Optional keyword arguments for the sink method
+            (or the write method, when falling back to collect).
+        :param collect_fallback: Whether to fall back to ``collect`` + ``write``
+            for the formats that don't support sink.
+
+        :return: The result of the sink operation (format-dependent).
+        """
+        if self.has_sink() is False:
+            if collect_fallback:
+                return self.write(
+                    lf.collect(),
+                    file_args=file_args,
+                    write_kwargs=sink_kwargs,
+                )
+            else:
+                raise ValueError(
+                    f"format {self.format!r} doesn't support sink, "
+                    f"set collect_fallback=True to collect and write it instead!"
+                )
+        if self.has_sort():
+            lf = self.apply_sort(lf)
+        if self.has_transform():
+            def get(value):
+                return None if value is NOTHING else value
+
+            lf = project_and_cast(
+                lf,
+                columns=get(self.transform_columns),
+                exclude=get(self.transform_exclude),
+                casts=get(self.transform_casts),
+            )
+        if self.is_rolling():
+            return self.sink_rolling(
+                lf,
+                dir_root=file_args[0],
+                sink_kwargs=sink_kwargs,
+                collect_fallback=collect_fallback,
+            )
+        method, kwargs = self.to_sink_method_and_kwargs()
+        sink_method = getattr(lf, method)
+        if sink_kwargs is not None:  # override default kwargs
+            kwargs.update(sink_kwargs)
+        return sink_method(*file_args, **kwargs)
+
+    def sink_rolling(
+        self,
+        lf: "pl.LazyFrame",
+        dir_root: T.Union[str, Path],
+        sink_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        collect_fallback: bool = True,
+    ) -> T.List[RolledFile]:
+        """
+        The streaming version of :meth:`Writer.write_rolling`. The query
+        runs only once, it's sunk to a temporary uncompressed Arrow IPC file
+        in ``dir_root``, then each file is sunk from a slice of
+        ``max_rows_per_file`` rows of it (memory mapped), so memory stays
+        bounded and the parts never overlap or miss a row, even if the row
+        order of the query is not deterministic. The temporary file needs as much disk
+        space as the result, it's removed at the end.
+
+        .. note::
+
+            The byte size of a row is unknown before the query runs,
+            so only ``max_rows_per_file`` is supported here. Without it,
+            the LazyFrame is collected and written by
+            :meth:`Writer.write_rolling` when ``collect_fallback`` is True,
+            otherwise a ``ValueError`` is raised.
+
+        :param lf: The Polars LazyFrame to write.
+        :param dir_root: The output directory.
+        :param sink_kwargs: Optional keyword arguments for the sink method
+            (or the write method, when falling back to collect).
+        :param collect_fallback: Whether to fall back to ``collect`` +
+            :meth:`Writer.write_rolling` if ``max_rows_per_file`` is not set.
+
+        :return: The manifest, a list of :class:`RolledFile` in row order.
+        """
+        if self.max_rows_per_file is NOTHING:
+            if collect_fallback:
+                return self.write_rolling(
+                    lf.collect(),
+                    dir_root=dir_root,
+                    write_kwargs=sink_kwargs,
+                )
+            raise ValueError(
+                "sink_rolling requires max_rows_per_file, "
+                "set collect_fallback=True to collect and write it instead!"
+            )
+        self._check_local_dir(dir_root, "sink_rolling")
+        method, kwargs = self.to_sink_method_and_kwargs()
+        if sink_kwargs is not None:  # override default kwargs
+            kwargs.update(sink_kwargs)
+
+        dir_root = Path(dir_root)
+        dir_root.mkdir(parents=True, exist_ok=True)
+        rows_per_file = self.max_rows_per_file
+        import polars as pl
+
+        with tempfile.TemporaryDirectory(
+            prefix=".sink-rolling-", dir=dir_root
+        ) as dir_tmp:
+            path_tmp = Path(dir_tmp).joinpath("result.arrow")
+            lf.sink_ipc(path_tmp, compression=None)
+            # memory mapped, zero copy, only the pages of a slice are loaded
+            staged = pl.read_ipc(path_tmp, memory_map=True)
+            total = staged.height
+            manifest = list()
+            for index, offset in enumerate(range(0, max(total, 1), rows_per_file)):
+                n_rows = min(rows_per_file, total - offset)
+                path = dir_root.joinpath(self.get_file_name(index))
+                getattr(staged.lazy().slice(offset, n_rows), method)(path, **kwargs)
+                manifest.append(RolledFile(path=path, offset=offset, n_rows=n_rows))
+            del staged  # release the memory map before removing the file
+        return manifest
+
+    def has_read_pushdown(self) -> bool:
+        """
+        Check if ``read_columns`` or ``read_filter`` is set.
+        """
+        return (self.read_columns is not NOTHING) or (self.read_filter is not NOTHING)
+
+    def apply_read_pushdown(self, data):
+        """
+        Apply ``read_filter`` and then ``read_columns`` to a ``LazyFrame``
+        (or ``DataFrame``). On a ``LazyFrame`` returned by a ``scan_*`` method,
+        polars pushes them down into the scan, only the selected columns are
+        decoded, and the row groups / files that can't match are skipped.
+        """
+        if self.read_filter is not NOTHING:
+            data = data.filter(to_expr(self.read_filter))
+        if self.read_columns is not NOTHING:
+            data = data.select(self.read_columns)
+        return data
+
+    def to_read_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
+        """
+        Get the appropriate read method and keyword arguments for the chosen format.
+
+        :return: A tuple containing the read method name and a dictionary of keyword arguments.
+        """
+        if self.is_csv():
+            return (
+                ReadMethodEnum.read_csv.value,
+                resolve_kwargs(
+                    has_header=self.csv_include_header,
+                    separator=self.csv_delimiter,
+                    eol_char=self.csv_line_terminator,
+                    quote_char=self.csv_quote_char,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_json():
+            return (ReadMethodEnum.read_json.value, dict())
+        elif self.is_ndjson():
+            return (ReadMethodEnum.read_ndjson.value, dict())
+        elif self.is_parquet():
+            return (
+                ReadMethodEnum.read_parquet.value,
+                resolve_kwargs(
+                    use_pyarrow=self.parquet_use_pyarrow,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_delta():
+            return (
+                ReadMethodEnum.read_delta.value,
+                resolve_kwargs(
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_ipc():
+            return (
+                ReadMethodEnum.read_ipc.value,
+                resolve_kwargs(
+                    memory_map=self.get_ipc_memory_map(),
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_ipc_stream():
+            return (
+                ReadMethodEnum.read_ipc_stream.value,
+                resolve_kwargs(
+                    storage_options=self.storage_options,
+                ),
+            )
+        else:  # pragma: no cover
+            raise NotImplementedError
+
+    def to_read_kwargs(self) -> T.Dict[str, T.Any]:  # pragma: no cover
+        """
+        Get the appropriate read method and keyword arguments for the chosen format.
+
+        :return: A tuple containing the read method name and a dictionary of keyword arguments.
+        """
+        method, kwargs = self.to_read_method_and_kwargs()
+        return kwargs
+
+    def read(
+        self,
+        file_args: T.List[T.Any],
+        read_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        return_result: bool = False,
+    ) -> T.Union["pl.DataFrame", ReadResult]:
+        """
+        Read the given input into a Polars DataFrame with the read method
+        of the chosen format, see :meth:`Writer.to_read_method_and_kwargs`.
+
+        :param file_args: Arguments for the file path, location or bytes.
+        :param read_kwargs: Optional keyword arguments for the read method.
+
+        If ``read_columns`` or ``read_filter`` is set, the data is read by
+        the scan method and collected, so the projection and the filter are
+        pushed down into the reader, ``read_kwargs`` are passed to the scan
+        method in this case. JSON has no scan method, it is filtered after read.
+
+        :param return_result: If True, return a :class:`~polars_writer.hooks.ReadResult`
+            with rows, bytes read and timing, the DataFrame is in ``ReadResult.df``.
+        """
+        if return_result is False and hook_registry.is_empty():
+            return self._read(file_args, read_kwargs)
+
+        method, kwargs = self.to_read_method_and_kwargs()
+        if read_kwargs is not None:  # override default kwargs
+            kwargs.update(read_kwargs)
+        event = IOEvent(
+            operation=OperationEnum.read.value,
+            format=self.format,
+            method=method,
+            kwargs=kwargs,
+            file_args=file_args,
+        )
+        result = self._run_instrumented(
+            event=event,
+            func=lambda: self._read(file_args, read_kwargs),
+            make_result=lambda df, wall_time, cpu_time: ReadResult(
+                format=self.format,
+                method=method,
+                kwargs=kwargs,
+                n_rows=df.height,
+                n_columns=df.width,
+                n_bytes=get_source_size(file_args[0]) if file_args else None,
+                wall_time=wall_time,
+                cpu_time=cpu_time,
+                df=df,
+            ),
+        )
+        if return_result:
+            return result
+        return result.df
+
+    def _read(
+        self,
+        file_args: T.List[T.Any],
+        read_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pl.DataFrame":
+        if self.read_cache is not None:
+            sources = self._get_file_sources(file_args)
+            if sources is not None:
+                method, kwargs = self.to_read_method_and_kwargs()
+                if read_kwargs is not None:  # override default kwargs
+                    kwargs.update(read_kwargs)
+                # everything else that changes the result
+                params = freeze(
+                    dict(
+                        method=method,
+                        kwargs=kwargs,
+                        file_args=file_args[1:],
+                        text_compression=self.get_text_compression(),
+                        read_columns=self.read_columns,
+                        read_filter=self.read_filter,
+                    )
+                )
+                return self.read_cache.get_or_read(
+                    sources=sources,
+                    params=params,
+                    read=lambda: self._read_source(file_args, read_kwargs),
+                    storage_options=(
+                        None
+                        if self.storage_options is NOTHING
+                        else self.storage_options
+                    ),
+                )
+        return self._read_source(file_args, read_kwargs)
+
+    def _read_source(
+        self,
+        file_args: T.List[T.Any],
+        read_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pl.DataFrame":
+        if (
+            self.metadata_cache is not None
+            and self.is_parquet()
+            and read_kwargs is None
+        ):
+            sources = self._get_file_sources(file_args)
+            if sources is not None:
+                return self._read_parquet_cached(sources)
+        if self.has_read_pushdown() and self.has_scan():
+            # read through the scan method, so the projection and the filter
+            # are pushed down into the reader
+            return self._scan(file_args, read_kwargs).collect()
+        method, kwargs = self.to_read_method_and_kwargs()
+        import polars as pl
+
+        read_method = getattr(pl, method)
+        compression, _ = self.get_text_compression()
+        if compression is not None:
+            file_args = [
+                decompress_to_buffer(
+                    file_args[0],
+                    compression,
+                    storage_options=(
+                        None
+                        if self.storage_options is NOTHING
+                        else self.storage_options
+                    ),
+                ),
+                *file_args[1:],
+            ]
+        if read_kwargs is not None:  # override default kwargs
+            kwargs.update(read_kwargs)
+            # print(f"{file_args = }")
+            # print("kwargs: ")
+            # for k, v in kwargs.items():
+            #     print(f"  {k} = {v}")
+        df = read_method(*file_args, **kwargs)
+        if self.has_read_pushdown():
+            df = self.apply_read_pushdown(df)
+        return df
+
+    def has_scan(self) -> bool:
+        """
+        Check if the chosen format can be read by a ``polars.scan_*`` method.
+        """
+        return not (self.is_json() or self.is_ipc_stream())
+
+    def to_scan_method_and_kwargs(self) -> T.Tuple[str, T.Dict[str, T.Any]]:
+        """
+        Get the appropriate scan method and keyword arguments for the chosen format.
+
+        :return: A tuple containing the scan method name and a dictionary of keyword arguments.
+        """
+        if self.is_csv():
+            return (
+                ScanMethodEnum.scan_csv.value,
+                resolve_kwargs(
+                    has_header=self.csv_include_header,
+                    separator=self.csv_delimiter,
+                    eol_char=self.csv_line_terminator,
+                    quote_char=self.csv_quote_char,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_json():  # pragma: no cover
+            raise ValueError("polars doesn't support 'scan_json'!")
+        elif self.is_ndjson():
+            return (ScanMethodEnum.scan_ndjson.value, dict())
+        elif self.is_parquet():
+            return (
+                ScanMethodEnum.scan_parquet.value,
+                resolve_kwargs(
+                    use_pyarrow=self.parquet_use_pyarrow,
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_delta():
+            return (
+                ScanMethodEnum.scan_delta.value,
+                resolve_kwargs(
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_ipc():
+            return (
+                ScanMethodEnum.scan_ipc.value,
+                resolve_kwargs(
+                    memory_map=self.get_ipc_memory_map(),
+                    storage_options=self.storage_options,
+                ),
+            )
+        elif self.is_ipc_stream():
+            raise ValueError("polars doesn't support 'scan_ipc_stream'!")
+        else:  # pragma: no cover
+            raise NotImplementedError
+
+    def to_scan_kwargs(self) -> T.Dict[str, T.Any]:  # pragma: no cover
+        """
+        Get the scan arguments for the write operation.
 
         A dictionary of scan arguments for the write method.
         """
@@ -409,16 +2588,450 @@ class Writer:
         self,
         file_args: T.List[T.Any],
         scan_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
-    ) -> pl.LazyFrame:
+        return_result: bool = False,
+    ) -> T.Union["pl.LazyFrame", ReadResult]:
         """
-        todo: docstring
+        Lazily scan the given input into a Polars LazyFrame with the scan
+        method of the chosen format, see :meth:`Writer.to_scan_method_and_kwargs`.
+
+        :param file_args: Arguments for the file path, location or bytes.
+        :param scan_kwargs: Optional keyword arguments for the scan method.
+
+        ``read_filter`` and ``read_columns`` are applied to the ``LazyFrame``,
+        see :meth:`Writer.apply_read_pushdown`.
+
+        With a :attr:`Writer.metadata_cache`, a scan of parquet file paths
+        is a polars IO source that reads only the row groups that may match
+        ``read_filter`` with the cached footers, no footer is fetched again.
+
+        .. note::
+
+            polars can't scan a compressed CSV / JSON / NDJSON file, it's
+            decompressed as a stream into memory when the scan is created,
+            so the scan of a compressed text file is not lazy and holds
+            the whole decompressed content.
+
+        :param return_result: If True, return a :class:`~polars_writer.hooks.ReadResult`
+            with timing, the LazyFrame is in ``ReadResult.df``.
         """
+        if return_result is False and hook_registry.is_empty():
+            return self._scan(file_args, scan_kwargs)
+
+        method, kwargs = self.to_scan_method_and_kwargs()
+        if scan_kwargs is not None:  # override default kwargs
+            kwargs.update(scan_kwargs)
+        event = IOEvent(
+            operation=OperationEnum.scan.value,
+            format=self.format,
+            method=method,
+            kwargs=kwargs,
+            file_args=file_args,
+        )
+        result = self._run_instrumented(
+            event=event,
+            func=lambda: self._scan(file_args, scan_kwargs),
+            make_result=lambda lf, wall_time, cpu_time: ReadResult(
+                format=self.format,
+                method=method,
+                kwargs=kwargs,
+                n_rows=None,
+                n_columns=None,
+                n_bytes=get_source_size(file_args[0]) if file_args else None,
+                wall_time=wall_time,
+                cpu_time=cpu_time,
+                df=lf,
+            ),
+        )
+        if return_result:
+            return result
+        return result.df
+
+    def _scan(
+        self,
+        file_args: T.List[T.Any],
+        scan_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pl.LazyFrame":
         method, kwargs = self.to_scan_method_and_kwargs()
+        import polars as pl
+
         scan_method = getattr(pl, method)
+        compression, _ = self.get_text_compression()
+        if compression is not None:
+            # polars can't scan a compressed text file, it's decompressed
+            # into memory first, the scan is not lazy
+            file_args = [
+                decompress_to_buffer(
+                    file_args[0],
+                    compression,
+                    storage_options=(
+                        None
+                        if self.storage_options is NOTHING
+                        else self.storage_options
+                    ),
+                ),
+                *file_args[1:],
+            ]
         if scan_kwargs is not None:  # override default kwargs
             kwargs.update(scan_kwargs)
             # print(f"{file_args = }")
             # print("kwargs: ")
             # for k, v in kwargs.items():
             #     print(f"  {k} = {v}")
-        return scan_method(*file_args, **kwargs)
+        if (
+            self.metadata_cache is not None
+            and self.is_parquet()
+            and scan_kwargs is None
+            and has_io_source()
+        ):
+            sources = self._get_file_sources(file_args)
+            if sources is not None:
+                return self._scan_parquet_cached(sources)
+        if (
+            self.metadata_cache is not None
+            and self.is_parquet()
+            and self.read_filter is not NOTHING
+        ):
+            # polars without IO source plugins, only whole files are pruned,
+            # scan_parquet reads the footers of the remaining files again
+            sources = self._get_file_sources(file_args)
+            if sources is not None:
+                sources = [
+                    source
+                    for source in sources
+                    if self._select_row_groups(
+                        source,
+                        self._get_parquet_metadata(source),
+                        self.read_filter,
+                    )
+                ]
+                if not sources:
+                    return self.apply_read_pushdown(
+                        self._empty_parquet_frame(file_args).lazy()
+                    )
+                file_args = [sources, *file_args[1:]]
+        lf = scan_method(*file_args, **kwargs)
+        if self.has_read_pushdown():
+            lf = self.apply_read_pushdown(lf)
+        return lf
+
+    def _get_file_sources(
+        self,
+        file_args: T.List[T.Any],
+    ) -> T.Optional[T.List[str]]:
+        """
+        Get the list of file paths of the read / scan, None if the
+        source is not a path or a list of paths, for example a buffer,
+        a glob pattern or a directory.
+        """
+        if not file_args:  # pragma: no cover
+            return None
+        source = file_args[0]
+        if isinstance(source, (str, Path)):
+            source = [source]
+        if not isinstance(source, (list, tuple)) or not source:
+            return None
+        sources = list()
+        for path in source:
+            if not isinstance(path, (str, Path)):
+                return None
+            path = str(path)
+            if "*" in path or "?" in path or "[" in path:
+                return None
+            if is_remote_path(path) is False and os.path.isfile(path) is False:
+                return None
+            sources.append(path)
+        return sources
+
+    def _get_parquet_metadata(self, path: str):
+        return self.metadata_cache.get_metadata(
+            path,
+            storage_options=(
+                None if self.storage_options is NOTHING else self.storage_options
+            ),
+        )
+
+    def _select_row_groups(
+        self,
+        path: str,
+        metadata: "pyarrow.parquet.FileMetaData",
+        read_filter: T.Optional[T.Dict[str, T.Any]],
+    ) -> T.List[int]:
+        """
+        Get the row groups of the file that may match the filter, by the
+        statistics and the bloom filters, see
+        :func:`~polars_writer.cache.select_row_groups`.
+        """
+        with self.metadata_cache.get_bloom_filter_reader(
+            path,
+            metadata,
+            storage_options=(
+                None if self.storage_options is NOTHING else self.storage_options
+            ),
+        ) as bloom_filter:
+            return select_row_groups(metadata, read_filter, bloom_filter=bloom_filter)
+
+    def _empty_parquet_frame(self, file_args: T.List[T.Any]) -> "pl.DataFrame":
+        import polars as pl
+
+        sources = self._get_file_sources(file_args)
+        metadata = self._get_parquet_metadata(sources[0])
+        return pl.from_arrow(metadata.schema.to_arrow_schema().empty_table())
+
+    def _read_parquet_cached(self, sources: T.List[str]) -> "pl.DataFrame":
+        """
+        Read the parquet files with the cached footers, only the row groups
+        that may match ``read_filter`` and the columns needed by
+        ``read_columns`` and ``read_filter`` are read.
+        """
+        import polars as pl
+        import pyarrow as pa
+
+        columns = None
+        if self.read_columns is not NOTHING:
+            columns = list(self.read_columns)
+            if self.read_filter is not NOTHING:
+                for col in get_filter_columns(self.read_filter):
+                    if col not in columns:
+                        columns.append(col)
+        tables = list(self._iter_parquet_cached(sources, columns=columns))
+        if tables:
+            df = pl.from_arrow(pa.concat_tables(tables))
+        else:
+            df = self._empty_parquet_frame([sources])
+            if columns is not None:
+                df = df.select(columns)
+        if self.has_read_pushdown():
+            df = self.apply_read_pushdown(df)
+        return df
+
+    def _iter_parquet_cached(
+        self,
+        sources: T.List[str],
+        columns: T.Optional[T.List[str]] = None,
+    ) -> T.Iterator["pyarrow.Table"]:
+        """
+        Read the parquet files with the cached footers, yield the table of
+        each file, only the row groups that may match ``read_filter`` and
+        the given columns are read.
+        """
+        pq = _import_pyarrow_parquet()
+        read_filter = None if self.read_filter is NOTHING else self.read_filter
+        storage_options = (
+            None if self.storage_options is NOTHING else self.storage_options
+        )
+        for path in sources:
+            metadata = self._get_parquet_metadata(path)
+            row_groups = self._select_row_groups(path, metadata, read_filter)
+            if not row_groups:
+                continue
+            fs, fs_path = get_filesystem(path, storage_options)
+            with fs.open_input_file(fs_path) as f:
+                yield pq.ParquetFile(f, metadata=metadata).read_row_groups(
+                    row_groups,
+                    columns=columns,
+                )
+
+    def _scan_parquet_cached(self, sources: T.List[str]) -> "pl.LazyFrame":
+        """
+        Scan the parquet files with the cached footers, a polars IO source
+        that reads only the row groups that may match ``read_filter``, by
+        :meth:`Writer._iter_parquet_cached`. polars pushes the projection,
+        the predicate and the row limit into it, so a repeated scan neither
+        fetches a footer nor reads a pruned row group.
+        """
+        import polars as pl
+        from polars.io.plugins import register_io_source
+
+        empty = self._empty_parquet_frame([sources])
+
+        def read(
+            with_columns: T.Optional[T.List[str]],
+            predicate: T.Optional["pl.Expr"],
+            n_rows: T.Optional[int],
+            batch_size: T.Optional[int],
+        ) -> T.Iterator["pl.DataFrame"]:
+            n_batches = 0
+            for table in self._iter_parquet_cached(sources, columns=with_columns):
+                df = pl.from_arrow(table)
+                if predicate is not None:
+                    df = df.filter(predicate)
+                if n_rows is not None:
+                    df = df.head(n_rows)
+                    n_rows -= df.height
+                n_batches += 1
+                yield df
+                if n_rows == 0:
+                    return
+            # polars expects at least one batch, all row groups are pruned
+            if n_batches == 0:
+                yield empty if with_columns is None else empty.select(with_columns)
+
+        lf = register_io_source(read, schema=empty.schema)
+        if self.has_read_pushdown():
+            lf = self.apply_read_pushdown(lf)
+        return lf
+
+    def _get_async_limiter(
+        self,
+        limiter: T.Optional[ConcurrencyLimiter] = None,
+    ) -> T.Optional[ConcurrencyLimiter]:
+        """
+        Resolve the limiter to use, the explicit one wins, then the per-Writer
+        ``async_limiter``, then the global one.
+        """
+        if limiter is not None:
+            return limiter
+        if self.async_limiter is not None:
+            return self.async_limiter
+        return get_global_limiter()
+
+    async def awrite(
+        self,
+        df: "pl.DataFrame",
+        file_args: T.List[T.Any],
+        write_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        limiter: T.Optional[ConcurrencyLimiter] = None,
+    ):
+        """
+        The async version of :meth:`Writer.write`, the write runs in the
+        default executor so it doesn't block the event loop.
+
+        :param limiter: Optional :class:`~polars_writer.aio.ConcurrencyLimiter`
+            to bound the concurrency, default to ``Writer.async_limiter``
+            then the global limiter.
+        """
+        return await run_in_thread(
+            self._get_async_limiter(limiter),
+            self.write,
+            # polars doesn't allow writing one DataFrame object from multiple
+            # threads at the same time, clone is cheap (no data copy)
+            df.clone(),
+            file_args=file_args,
+            write_kwargs=write_kwargs,
+        )
+
+    async def aread(
+        self,
+        file_args: T.List[T.Any],
+        read_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        limiter: T.Optional[ConcurrencyLimiter] = None,
+    ) -> "pl.DataFrame":
+        """
+        The async version of :meth:`Writer.read`, the read runs in the
+        default executor so it doesn't block the event loop.
+
+        :param limiter: Optional :class:`~polars_writer.aio.ConcurrencyLimiter`
+            to bound the concurrency, default to ``Writer.async_limiter``
+            then the global limiter.
+        """
+        return await run_in_thread(
+            self._get_async_limiter(limiter),
+            self.read,
+            file_args=file_args,
+            read_kwargs=read_kwargs,
+        )
+
+    def _scan_collect(
+        self,
+        file_args: T.List[T.Any],
+        scan_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        collect_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+    ) -> "pl.DataFrame":
+        if collect_kwargs is None:
+            collect_kwargs = dict()
+        lf = self.scan(file_args=file_args, scan_kwargs=scan_kwargs)
+        return lf.collect(**collect_kwargs)
+
+    async def ascan_collect(
+        self,
+        file_args: T.List[T.Any],
+        scan_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        collect_kwargs: T.Optional[T.Dict[str, T.Any]] = None,
+        limiter: T.Optional[ConcurrencyLimiter] = None,
+    ) -> "pl.DataFrame":
+        """
+        Run :meth:`Writer.scan` and collect the ``LazyFrame`` in the default
+        executor so it doesn't block the event loop.
+
+        :param collect_kwargs: Optional keyword arguments for ``LazyFrame.collect``.
+        :param limiter: Optional :class:`~polars_writer.aio.ConcurrencyLimiter`
+            to bound the concurrency, default to ``Writer.async_limiter``
+            then the global limiter.
+        """
+        return await run_in_thread(
+            self._get_async_limiter(limiter),
+            self._scan_collect,
+            file_args=file_args,
+            scan_kwargs=scan_kwargs,
+            collect_kwargs=collect_kwargs,
+        )
+
+    def _snapshot(self) -> "Writer":
+        """
+        Copy the writer, the runtime only fields (limiter, client and caches)
+        are shared with the copy.
+        """
+        writer = dataclasses.replace(self)
+        for field in dataclasses.fields(self):
+            if field.init is False:
+                setattr(writer, field.name, getattr(self, field.name))
+        return writer
+
+    def compile(self) -> WritePlan:
+        """
+        Validate the config and compile it into a frozen, hashable
+        :class:`~polars_writer.plan.WritePlan`, which skips the per-call
+        method and kwargs resolution of :meth:`Writer.write`.
+
+        The plan is a snapshot, later changes to this writer don't affect it.
+        """
+        writer = self._snapshot()
+        method, kwargs = writer.to_method_and_kwargs()
+        return WritePlan(
+            format=writer.format,
+            method=method,
+            kwargs=types.MappingProxyType(kwargs),
+            writer=writer,
+            is_direct=writer._is_direct,
+        )
+
+    def compile_read(self) -> ReadPlan:
+        """
+        Validate the config and compile it into a frozen, hashable
+        :class:`~polars_writer.plan.ReadPlan`, see :meth:`Writer.compile`.
+        """
+        import polars as pl
+
+        writer = self._snapshot()
+        method, kwargs = writer.to_read_method_and_kwargs()
+        return ReadPlan(
+            format=writer.format,
+            method=method,
+            kwargs=types.MappingProxyType(kwargs),
+            writer=writer,
+            is_direct=not (
+                writer.is_text_compressed()
+                or writer.has_read_pushdown()
+                or writer.read_cache is not None
+                or writer.metadata_cache is not None
+            ),
+            func=getattr(pl, method),
+        )
+
+    def compile_scan(self) -> ScanPlan:
+        """
+        Validate the config and compile it into a frozen, hashable
+        :class:`~polars_writer.plan.ScanPlan`, see :meth:`Writer.compile`.
+        """
+        import polars as pl
+
+        writer = self._snapshot()
+        method, kwargs = writer.to_scan_method_and_kwargs()
+        return ScanPlan(
+            format=writer.format,
+            method=method,
+            kwargs=types.MappingProxyType(kwargs),
+            writer=writer,
+            is_direct=not (writer.is_text_compressed() or writer.has_read_pushdown()),
+            func=getattr(pl, method),
+        )
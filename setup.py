@@ -159,6 +159,11 @@ if __name__ == "__main__":
     except:
         print("'requirements-test.txt' not found!")
 
+    # optional, the pyarrow parquet writer (parquet_use_pyarrow, the recorded
+    # sort order, bloom filters, page index) and the parquet metadata cache,
+    # xxhash speeds up the bloom filter lookup
+    EXTRA_REQUIRE["pyarrow"] = ["pyarrow", "xxhash"]
+
     try:
         EXTRA_REQUIRE["docs"] = read_requirements_file("requirements-doc.txt")
     except:
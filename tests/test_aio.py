@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+
+import pytest
+import polars as pl
+
+from polars_writer.aio import (
+    ConcurrencyLimiter,
+    set_global_concurrency,
+    get_global_limiter,
+    run_in_thread,
+)
+from polars_writer.writer import Writer
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __call__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        threading.Event().wait(0.02)
+        with self.lock:
+            self.current -= 1
+
+
+def test_concurrency_limiter():
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(0)
+
+    limiter = ConcurrencyLimiter(2)
+    counter = Counter()
+
+    async def main():
+        await asyncio.gather(*[run_in_thread(limiter, counter) for _ in range(8)])
+
+    # the same limiter works across different event loops
+    asyncio.run(main())
+    asyncio.run(main())
+    assert counter.peak <= 2
+
+
+def test_global_concurrency():
+    try:
+        set_global_concurrency(3)
+        assert get_global_limiter().limit == 3
+        writer = Writer(format="csv")
+        assert writer._get_async_limiter() is get_global_limiter()
+        writer.async_limiter = ConcurrencyLimiter(1)
+        assert writer._get_async_limiter() is writer.async_limiter
+        limiter = ConcurrencyLimiter(5)
+        assert writer._get_async_limiter(limiter) is limiter
+    finally:
+        set_global_concurrency(None)
+    assert get_global_limiter() is None
+
+
+def test_awrite_aread_ascan_collect(tmp_path):
+    df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+    writer = Writer(format="parquet")
+    writer.async_limiter = ConcurrencyLimiter(2)
+    paths = [tmp_path / f"{i}.parquet" for i in range(4)]
+
+    async def main():
+        await asyncio.gather(
+            *[writer.awrite(df, file_args=[path]) for path in paths]
+        )
+        df_list = await asyncio.gather(
+            *[writer.aread(file_args=[path]) for path in paths]
+        )
+        df_list.extend(
+            await asyncio.gather(
+                *[writer.ascan_collect(file_args=[path]) for path in paths]
+            )
+        )
+        return df_list
+
+    for df1 in asyncio.run(main()):
+        assert df1.to_dicts() == df.to_dicts()
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.aio", preview=False)
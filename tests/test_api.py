@@ -5,16 +5,80 @@ from polars_writer import api
 
 def test():
     _ = api
+    _ = api.TextCompressionEnum
+    _ = api.ConcurrencyLimiter
+    _ = api.set_global_concurrency
+    _ = api.get_global_limiter
+    _ = api.ObjectiveEnum
+    _ = api.IOEvent
+    _ = api.WriteResult
+    _ = api.ReadResult
+    _ = api.HookRegistry
+    _ = api.hook_registry
+    _ = api.WritePlan
+    _ = api.ReadPlan
+    _ = api.ScanPlan
+    _ = api.S3MultipartUpload
+    _ = api.DeltaAppendBuffer
+    _ = api.UpsertResult
+    _ = api.FilterOpEnum
+    _ = api.ParquetMetadataCache
+    _ = api.ReadCache
+    _ = api.DtypeEnum
+    _ = api.TransformResult
+    _ = api.BatchItemResult
+    _ = api.RolledFile
+    _ = api.AppendSession
     _ = api.Writer
     _ = api.Writer.to_method_and_kwargs
     _ = api.Writer.to_kwargs
     _ = api.Writer.write
+    _ = api.Writer.write_many
+    _ = api.Writer.autotune
+    _ = api.Writer.get_text_compression
+    _ = api.Writer.is_text_compressed
+    _ = api.Writer.get_file_ext
+    _ = api.Writer.open_append
+    _ = api.Writer.is_rolling
+    _ = api.Writer.write_rolling
+    _ = api.Writer.sink_rolling
+    _ = api.Writer.write_partitioned
+    _ = api.Writer.has_sink
+    _ = api.Writer.to_sink_method_and_kwargs
+    _ = api.Writer.to_sink_kwargs
+    _ = api.Writer.sink
+    _ = api.Writer.has_read_pushdown
+    _ = api.Writer.apply_read_pushdown
     _ = api.Writer.to_read_method_and_kwargs
     _ = api.Writer.to_read_kwargs
     _ = api.Writer.read
     _ = api.Writer.to_scan_method_and_kwargs
     _ = api.Writer.to_scan_kwargs
     _ = api.Writer.scan
+    _ = api.Writer.awrite
+    _ = api.Writer.aread
+    _ = api.Writer.ascan_collect
+    _ = api.Writer.compile
+    _ = api.Writer.compile_read
+    _ = api.Writer.compile_scan
+    _ = api.Writer.get_s3_client
+    _ = api.Writer.open_s3_upload
+    _ = api.Writer.open_delta_append
+    _ = api.Writer.delta_optimize
+    _ = api.Writer.delta_vacuum
+    _ = api.Writer.upsert
+    _ = api.Writer.is_ipc
+    _ = api.Writer.is_ipc_stream
+    _ = api.Writer.get_ipc_memory_map
+    _ = api.Writer.has_scan
+    _ = api.Writer.to_bytes
+    _ = api.Writer.iter_bytes
+    _ = api.Writer.has_transform
+    _ = api.Writer.transform
+    _ = api.Writer.has_sort
+    _ = api.Writer.apply_sort
+    _ = api.Writer.has_pyarrow_write_options
+    _ = api.Writer.fan_out
 
 
 if __name__ == "__main__":
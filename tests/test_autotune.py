@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import polars as pl
+
+from polars_writer.autotune import (
+    ObjectiveEnum,
+    Trial,
+    run_trial,
+    pick_best,
+    autotune,
+)
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame(
+    {
+        "id": list(range(5000)),
+        "category": [f"category-{i % 7}" for i in range(5000)],
+    }
+)
+
+
+def test_run_trial():
+    trial = run_trial(df, "zstd", 3, 1000)
+    assert trial.output_bytes > 0
+    assert trial.write_seconds > 0
+    assert trial.read_seconds > 0
+
+
+def test_pick_best():
+    trials = [
+        Trial("zstd", 3, None, output_bytes=100, write_seconds=2.0, read_seconds=2.0),
+        Trial("snappy", None, None, output_bytes=200, write_seconds=1.0, read_seconds=3.0),
+        Trial("lz4", None, None, output_bytes=300, write_seconds=3.0, read_seconds=1.0),
+    ]
+    assert pick_best(trials, "size").compression == "zstd"
+    assert pick_best(trials, "write_speed").compression == "snappy"
+    assert pick_best(trials, "read_speed").compression == "lz4"
+    assert pick_best(trials, "balanced").compression == "zstd"
+    with pytest.raises(ValueError):
+        pick_best(trials, "invalid")
+
+
+def test_autotune():
+    with pytest.raises(ValueError):
+        autotune(Writer(format="csv"), df)
+    with pytest.raises(ValueError):
+        autotune(Writer(format="parquet"), df, objective="invalid")
+
+    writer = Writer(format="parquet", parquet_statistics=False)
+    for objective in ObjectiveEnum:
+        tuned_writer, trials = autotune(
+            writer,
+            df,
+            objective=objective.value,
+            row_group_size_candidates=[1000, 100_000],
+        )
+        # the row group size larger than the sample is skipped
+        assert len(trials) == 11
+        assert tuned_writer.is_parquet()
+        assert tuned_writer.parquet_statistics is False
+        Writer.from_dict(tuned_writer.to_dict())
+
+    smallest = min(trials, key=lambda t: t.output_bytes)
+    tuned_writer = writer.autotune(df, objective="size")
+    assert tuned_writer.parquet_compression == smallest.compression
+
+    # at least one trial runs
+    tuned_writer, trials = autotune(writer, df, budget_seconds=0)
+    assert len(trials) == 1
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.autotune", preview=False)
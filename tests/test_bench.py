@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from polars_writer.bench.data import DataShapeEnum, make_frame
+from polars_writer.bench.memory import PeakMemorySampler
+from polars_writer.bench.runner import (
+    iter_writers,
+    BenchmarkConfig,
+    run_suite,
+)
+from polars_writer.bench.dispatch import run_dispatch_benchmark
+from polars_writer.bench.__main__ import main
+
+
+def test_make_frame():
+    for shape in DataShapeEnum:
+        df = make_frame(shape.value, 100)
+        assert df.height == 100
+        assert df.equals(make_frame(shape.value, 100))
+    assert make_frame("wide", 10).width == 100
+    assert make_frame("nulls", 1000).null_count().sum_horizontal().item() > 0
+    with pytest.raises(ValueError):
+        make_frame("invalid", 10)
+
+
+def test_peak_memory_sampler():
+    with PeakMemorySampler() as sampler:
+        data = bytearray(50_000_000)
+        data[-1] = 1
+    assert sampler.peak_delta is None or sampler.peak_delta >= 0
+
+
+def test_iter_writers():
+    pairs = list(iter_writers(["csv", "parquet"]))
+    assert (None, "csv") in [(c, w.format) for c, w in pairs]
+    assert ("gzip", "csv") in [(c, w.format) for c, w in pairs]
+    assert ("zstd", "parquet") in [(c, w.format) for c, w in pairs]
+    pairs = list(iter_writers(["ipc"]))
+    assert [c for c, w in pairs] == ["uncompressed", "lz4", "zstd"]
+
+
+def test_run_suite(tmp_path):
+    config = BenchmarkConfig(
+        shapes=["narrow"],
+        row_counts=[100],
+        formats=["csv", "json", "parquet", "delta"],
+        repeat=1,
+    )
+    report = run_suite(config, dir_tmp=tmp_path)
+    json.dumps(report)
+    assert report["environment"]["polars_version"]
+    results = {(r["format"], r["compression"]): r for r in report["results"]}
+    for key in [("csv", None), ("csv", "gzip"), ("parquet", "zstd"), ("delta", None)]:
+        result = results[key]
+        assert result["write_rows_per_second"] > 0
+        assert result["read_mb_per_second"] > 0
+        assert result["scan_seconds"] > 0
+        assert result["output_bytes"] > 0
+    assert "scan_seconds" not in results[("json", None)]
+    # polars doesn't support lzo, the error is recorded
+    assert "error" in results[("parquet", "lzo")]
+
+
+def test_dispatch_benchmark():
+    result = run_dispatch_benchmark(n_calls=2000)
+    # both the writer and the compiled plan resolve the method and kwargs
+    # once, the timings are too close to compare reliably
+    assert result["dispatch_plan_ns"] > 0
+    assert result["dispatch_writer_ns"] > 0
+    assert result["end_to_end_plan_ns"] > 0
+
+
+def test_main(tmp_path):
+    path = tmp_path / "report.json"
+    main(
+        [
+            "--shapes", "numeric",
+            "--rows", "1e2",
+            "--formats", "ndjson",
+            "--repeat", "1",
+            "--output", str(path),
+            "--quiet",
+        ]
+    )
+    report = json.loads(path.read_text())
+    assert report["results"][0]["n_rows"] == 100
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.bench", is_folder=True, preview=False)
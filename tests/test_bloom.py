@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import struct
+
+import pytest
+
+from polars_writer import bloom
+from polars_writer.bloom import (
+    _xxh64_py,
+    _parse_bloom_filter_header,
+    xxh64,
+    bloom_filter_hash,
+    bloom_filter_may_contain,
+)
+
+
+def test_xxh64():
+    for data in [b"", b"a", b"abcd", bytes(range(7)), bytes(range(100))]:
+        assert xxh64(data) == _xxh64_py(data)
+    assert _xxh64_py(b"") == 0xEF46DB3751D8E999
+    assert _xxh64_py(b"a") == 0xD24EC4F1A98C6E5B
+
+
+def test_xxh64_without_xxhash(monkeypatch):
+    monkeypatch.setattr(bloom, "_xxh64_intdigest", None)
+    assert xxh64(b"a") == 0xD24EC4F1A98C6E5B
+
+
+def test_bloom_filter_hash():
+    assert bloom_filter_hash(1, "INT32") == xxh64(b"\x01\x00\x00\x00")
+    assert bloom_filter_hash(-1, "INT64") == xxh64(b"\xff" * 8)
+    assert bloom_filter_hash(2.0, "INT64") == bloom_filter_hash(2, "INT64")
+    assert bloom_filter_hash(1.5, "DOUBLE") == xxh64(struct.pack("<d", 1.5))
+    assert bloom_filter_hash("a", "BYTE_ARRAY") == xxh64(b"a")
+    # can't be hashed like the writer, never pruned
+    for value, physical_type in [
+        (True, "INT32"),
+        (2**40, "INT32"),
+        (1.5, "INT64"),
+        (0.0, "DOUBLE"),
+        (float("nan"), "DOUBLE"),
+        ("a", "INT64"),
+        (1, "BYTE_ARRAY"),
+        (1, "BOOLEAN"),
+    ]:
+        assert bloom_filter_hash(value, physical_type) is None
+
+
+def test_bloom_filter_header_and_bitset():
+    # BloomFilterHeader {1: numBytes = 32, 2: algorithm {}, 3: hash {}, 4: compression {}}
+    header = bytes(
+        [0x15, 0x40]  # i32 field 1, zigzag varint
+        + [0x1C, 0x1C, 0x00, 0x00] * 3  # struct fields 2, 3, 4 of an empty struct
+        + [0x00]  # stop
+    )
+    assert _parse_bloom_filter_header(header) == (32, len(header))
+    with pytest.raises(ValueError):
+        _parse_bloom_filter_header(bytes([0x00]))
+
+    # an empty filter has no value, a full filter may have any value
+    hash_ = bloom_filter_hash("a", "BYTE_ARRAY")
+    assert bloom_filter_may_contain(bytes(32), hash_) is False
+    assert bloom_filter_may_contain(b"\xff" * 32, hash_) is True
+    assert bloom_filter_may_contain(b"", hash_) is True
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.bloom", preview=False)
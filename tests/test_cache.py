@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+from unittest.mock import patch
+
+import pytest
+import polars as pl
+import pyarrow.parquet as pq
+
+from polars_writer.cache import (
+    get_file_identity,
+    get_filesystem,
+    ParquetMetadataCache,
+    ReadCache,
+    select_row_groups,
+)
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame(
+    {
+        "id": range(100),
+        "name": [f"name-{i:03d}" for i in range(100)],
+        "note": [None] * 50 + ["x"] * 50,
+    }
+)
+
+
+def test_select_row_groups(tmp_path):
+    path = tmp_path / "data.parquet"
+    df.write_parquet(path, row_group_size=10)
+    metadata = pq.read_metadata(path)
+    assert metadata.num_row_groups == 10
+
+    def select(spec):
+        return select_row_groups(metadata, spec)
+
+    assert select(None) == list(range(10))
+    assert select({"col": "id", "op": "eq", "value": 15}) == [1]
+    assert select({"col": "id", "op": "ne", "value": 15}) == list(range(10))
+    assert select({"col": "id", "op": "lt", "value": 10}) == [0]
+    assert select({"col": "id", "op": "le", "value": 10}) == [0, 1]
+    assert select({"col": "id", "op": "gt", "value": 89}) == [9]
+    assert select({"col": "id", "op": "ge", "value": 89}) == [8, 9]
+    assert select({"col": "id", "op": "in", "value": [5, 95]}) == [0, 9]
+    assert select({"col": "id", "op": "between", "value": [25, 35]}) == [2, 3]
+    assert select({"col": "name", "op": "eq", "value": "name-042"}) == [4]
+    assert select({"col": "note", "op": "is_null"}) == [0, 1, 2, 3, 4]
+    assert select({"col": "note", "op": "is_not_null"}) == [5, 6, 7, 8, 9]
+    assert select({"col": "note", "op": "eq", "value": "x"}) == [5, 6, 7, 8, 9]
+    assert select(
+        {
+            "or": [
+                {"col": "id", "op": "lt", "value": 10},
+                {
+                    "and": [
+                        {"col": "id", "op": "ge", "value": 50},
+                        {"col": "id", "op": "lt", "value": 60},
+                    ]
+                },
+            ]
+        }
+    ) == [0, 5]
+    # not is never pruned, a not comparable value is never pruned
+    assert select({"not": {"col": "id", "op": "lt", "value": 10}}) == list(range(10))
+    assert select({"col": "id", "op": "eq", "value": "a"}) == list(range(10))
+    assert select({"col": "unknown", "op": "eq", "value": 1}) == list(range(10))
+
+
+def test_parquet_metadata_cache(tmp_path):
+    with pytest.raises(ValueError):
+        ParquetMetadataCache(max_bytes=0)
+
+    path = tmp_path / "data.parquet"
+    df.write_parquet(path, row_group_size=10)
+    cache = ParquetMetadataCache(max_bytes=10_000_000)
+    metadata = cache.get_metadata(path)
+    assert metadata.num_row_groups == 10
+    assert cache.get_metadata(path) is metadata
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.current_bytes == metadata.serialized_size
+
+    # a changed file is a new identity, the old entry is dropped
+    identity = get_file_identity(path)
+    df.write_parquet(path, row_group_size=50)
+    os.utime(path, ns=(identity.mtime + 1_000_000_000,) * 2)
+    assert cache.get_metadata(path).num_row_groups == 2
+    assert len(cache) == 1
+
+    # LRU eviction by the byte budget
+    paths = list()
+    for i in range(3):
+        p = tmp_path / f"data-{i}.parquet"
+        df.write_parquet(p, row_group_size=10)
+        paths.append(p)
+    size = pq.read_metadata(paths[0]).serialized_size
+    cache = ParquetMetadataCache(max_bytes=size * 2)
+    cache.get_metadata(paths[0])
+    cache.get_metadata(paths[1])
+    cache.get_metadata(paths[0])  # paths[1] is the least recently used
+    cache.get_metadata(paths[2])
+    assert cache.evictions == 1
+    assert len(cache) == 2
+    cache.get_metadata(paths[0])
+    assert cache.hits == 2
+    cache.get_metadata(paths[1])
+    assert cache.misses == 4
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.current_bytes == 0
+
+
+def test_writer_with_metadata_cache(tmp_path):
+    paths = list()
+    for i in range(3):
+        path = tmp_path / f"data-{i}.parquet"
+        df.with_columns(pl.col("id") + i * 100).write_parquet(path, row_group_size=10)
+        paths.append(str(path))
+
+    read_filter = {"col": "id", "op": "between", "value": [115, 124]}
+    writer = Writer(format="parquet", read_columns=["id"], read_filter=read_filter)
+    expected = writer.read(file_args=[paths]).to_dicts()
+    assert len(expected) == 10
+
+    writer.metadata_cache = ParquetMetadataCache(max_bytes=10_000_000)
+    for _ in range(2):
+        assert writer.read(file_args=[paths]).to_dicts() == expected
+        assert writer.scan(file_args=[paths]).collect().to_dicts() == expected
+    # the scan also takes the schema from the cached footer of the first file
+    assert writer.metadata_cache.misses == 3
+    assert writer.metadata_cache.hits == 11
+
+    # the scan never fetches a footer again, polars doesn't read any
+    with patch.object(pq, "read_metadata", side_effect=AssertionError):
+        lf = writer.scan(file_args=[paths])
+        assert lf.collect().to_dicts() == expected
+        assert lf.select(pl.len()).collect().item() == 10
+
+    # all files are pruned, no file is scanned
+    writer = Writer(
+        format="parquet",
+        read_columns=["name"],
+        read_filter={"col": "id", "op": "gt", "value": 1000},
+    )
+    writer.metadata_cache = ParquetMetadataCache(max_bytes=10_000_000)
+    df1 = writer.read(file_args=[paths])
+    assert df1.height == 0
+    assert df1.columns == ["name"]
+    df2 = writer.scan(file_args=[paths]).collect()
+    assert df2.height == 0
+    assert df2.columns == ["name"]
+
+    # without filter, all row groups
+    writer = Writer(format="parquet")
+    writer.metadata_cache = ParquetMetadataCache(max_bytes=10_000_000)
+    assert writer.read(file_args=[paths[0]]).equals(df)
+    # not a path, the cache is not used
+    with open(paths[0], "rb") as f:
+        assert writer.read(file_args=[f]).equals(df)
+    assert writer.read(file_args=[str(tmp_path / "*.parquet")]).height == 300
+    assert writer.metadata_cache.misses == 1
+
+
+def test_float32_statistics(tmp_path):
+    # the Float32 statistics are widened to double, 0.1 is not 0.1f
+    path = tmp_path / "float32.parquet"
+    pl.DataFrame({"x": pl.Series([0.1, 0.1], dtype=pl.Float32)}).write_parquet(path)
+    for op, value in [
+        ("eq", 0.1),
+        ("le", 0.1),
+        ("ge", 0.1),
+        ("between", [0.1, 0.1]),
+    ]:
+        writer = Writer(
+            format="parquet",
+            read_filter={"col": "x", "op": op, "value": value},
+        )
+        assert writer.read(file_args=[path]).height == 2
+        writer.metadata_cache = ParquetMetadataCache(max_bytes=10_000_000)
+        assert writer.read(file_args=[path]).height == 2
+        assert writer.scan(file_args=[path]).collect().height == 2
+    metadata = pq.read_metadata(path)
+    assert select_row_groups(metadata, {"col": "x", "op": "gt", "value": 0.2}) == []
+    assert select_row_groups(metadata, {"col": "x", "op": "ne", "value": 0.1}) == [0]
+
+
+def test_writer_bloom_filters(tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_bloom_filters={"id": {"fpp": 2.0}})
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_bloom_filters=["id"])
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_column_compression={"id": "zip"})
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_column_encoding={"id": "RLE_DICTIONARY"})
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_use_dictionary={"id": "no"})
+    with pytest.raises(ValueError):
+        Writer(
+            format="parquet",
+            parquet_write_page_index=True,
+            parquet_use_pyarrow=False,
+        )
+    with pytest.raises(ValueError):
+        Writer(
+            format="parquet",
+            parquet_write_page_index=True,
+            parquet_statistics="full",
+        )
+    assert Writer(format="csv", parquet_write_page_index=True).has_sink() is True
+
+    # random ids, the min / max of every row group covers the whole range
+    random.seed(0)
+    ids = random.sample(range(1_000_000_000), 16_000)
+    big_df = pl.DataFrame(
+        {
+            "id": ids,
+            "name": [f"name-{i}" for i in ids],
+            "score": [i / 7 for i in ids],
+        }
+    )
+    writer = Writer(
+        format="parquet",
+        parquet_row_group_size=1000,
+        parquet_compression="zstd",
+        parquet_compression_level=5,
+        parquet_bloom_filters={"id": {"fpp": 0.01, "ndv": 1000}, "name": True},
+        parquet_write_page_index=True,
+        parquet_use_dictionary={"id": False},
+        parquet_column_compression={"name": "snappy", "score": "uncompressed"},
+        parquet_column_encoding={"score": "BYTE_STREAM_SPLIT"},
+        parquet_pyarrow_options={"write_batch_size": 512},
+    )
+    assert Writer.from_dict(writer.to_dict()) == writer
+    assert writer.has_pyarrow_write_options() is True
+    assert writer.has_sink() is False
+    assert writer.compile().is_direct is False
+    paths = list()
+    for i in range(4):
+        path = tmp_path / f"data-{i}.parquet"
+        writer.write(big_df[i * 4000 : (i + 1) * 4000], file_args=[path])
+        paths.append(str(path))
+    assert writer.parquet_pyarrow_options == {"write_batch_size": 512}
+
+    metadata = pq.read_metadata(paths[0])
+    assert metadata.num_row_groups == 4
+    id_column, name_column, score_column = [
+        metadata.row_group(0).column(j) for j in range(3)
+    ]
+    assert id_column.bloom_filter_offset > 0
+    assert name_column.bloom_filter_offset > 0
+    assert not score_column.bloom_filter_offset
+    assert id_column.has_column_index and id_column.has_offset_index
+    assert id_column.compression == "ZSTD"
+    assert name_column.compression == "SNAPPY"
+    assert score_column.compression == "UNCOMPRESSED"
+    assert "RLE_DICTIONARY" not in id_column.encodings
+    assert "RLE_DICTIONARY" in name_column.encodings
+    assert "BYTE_STREAM_SPLIT" in score_column.encodings
+    assert pl.read_parquet(paths).equals(big_df)
+
+    # the same data without bloom filters
+    plain_paths = list()
+    for i in range(4):
+        path = tmp_path / f"plain-{i}.parquet"
+        big_df[i * 4000 : (i + 1) * 4000].write_parquet(path, row_group_size=1000)
+        plain_paths.append(str(path))
+
+    # an equality filter on a value of the third file
+    target = ids[9000]
+    for col, value in [("id", target), ("name", f"name-{target}")]:
+        read_filter = {"col": col, "op": "eq", "value": value}
+        cache = ParquetMetadataCache(max_bytes=10_000_000)
+        metadata = cache.get_metadata(paths[2])
+        assert select_row_groups(metadata, read_filter) == [0, 1, 2, 3]
+        # one filesystem and file handle for all the bitsets of the file
+        with patch(
+            "polars_writer.cache.get_filesystem", wraps=get_filesystem
+        ) as spy:
+            with cache.get_bloom_filter_reader(paths[2], metadata) as bloom_filter:
+                assert select_row_groups(metadata, read_filter, bloom_filter) == [1]
+            assert spy.call_count == 1
+    # the bloom filters are cached
+    n_misses = cache.misses
+    with cache.get_bloom_filter_reader(paths[2], metadata) as bloom_filter:
+        assert select_row_groups(metadata, read_filter, bloom_filter) == [1]
+        assert bloom_filter._file is None
+    assert cache.misses == n_misses
+
+    # Writer.scan only reads the row group that may have the id
+    read_filter = {"col": "id", "op": "eq", "value": target}
+    read_row_groups = list()
+    spy = pq.ParquetFile.read_row_groups
+
+    def read_row_groups_spy(self, row_groups, **kwargs):
+        read_row_groups.extend(row_groups)
+        return spy(self, row_groups, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, "read_row_groups", read_row_groups_spy)
+    monkeypatch.setattr(pl, "scan_parquet", None)  # never called
+    expected = big_df.filter(pl.col("id") == target)
+    for file_paths, n_row_groups in [(plain_paths, 16), (paths, 1)]:
+        reader = Writer(format="parquet", read_filter=read_filter)
+        reader.metadata_cache = ParquetMetadataCache(max_bytes=10_000_000)
+        assert reader.scan(file_args=[file_paths]).collect().equals(expected)
+        assert len(read_row_groups) == n_row_groups
+        read_row_groups.clear()
+        assert reader.read(file_args=[file_paths]).equals(expected)
+        assert len(read_row_groups) == n_row_groups
+        read_row_groups.clear()
+
+
+def test_read_cache(tmp_path):
+    path = tmp_path / "data.csv"
+    df.write_csv(path)
+    writer = Writer(format="csv")
+    writer.read_cache = ReadCache(max_bytes=10_000_000)
+
+    df1 = writer.read(file_args=[path])
+    df2 = writer.read(file_args=[path])
+    assert df1.equals(df) and df2.equals(df)
+    assert df1 is not df2
+    assert writer.read_cache.stats()["misses"] == 1
+    assert writer.read_cache.stats()["hits"] == 1
+    assert writer.read_cache.current_bytes == df.estimated_size()
+
+    # changing the returned frame doesn't change the cached one
+    df2.drop_in_place("name")
+    assert writer.read(file_args=[path]).equals(df)
+
+    # different read kwargs, different entry
+    df3 = writer.read(file_args=[path], read_kwargs={"n_rows": 10})
+    assert df3.height == 10
+    assert len(writer.read_cache) == 2
+
+    # the compiled plan and other config share the cache
+    assert writer.compile_read().execute([path]).equals(df)
+    assert writer.read_cache.hits == 3
+    writer2 = Writer(format="csv", read_columns=["id"])
+    writer2.read_cache = writer.read_cache
+    assert writer2.read(file_args=[path]).columns == ["id"]
+    assert len(writer.read_cache) == 3
+
+    # a changed file invalidates all its entries
+    identity = get_file_identity(path)
+    df.head(5).write_csv(path)
+    os.utime(path, ns=(identity.mtime + 1_000_000_000,) * 2)
+    assert writer.read(file_args=[path]).height == 5
+    assert len(writer.read_cache) == 1
+
+    # LRU eviction by the total estimated_size
+    cache = ReadCache(max_bytes=df.estimated_size() * 2)
+    paths = list()
+    for i in range(3):
+        p = tmp_path / f"data-{i}.parquet"
+        df.write_parquet(p)
+        paths.append(p)
+    writer = Writer(format="parquet")
+    writer.read_cache = cache
+    for p in paths:
+        writer.read(file_args=[p])
+    assert cache.evictions == 1
+    assert len(cache) == 2
+    writer.read(file_args=[paths[0]])
+    assert cache.misses == 4
+    writer.read(file_args=[paths[2]])
+    assert cache.hits == 1
+
+    # a buffer is not cached
+    with open(paths[0], "rb") as f:
+        assert writer.read(file_args=[f]).equals(df)
+    assert cache.misses + cache.hits == 5
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.cache", preview=False)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import io
+import random
+
+import pytest
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from polars_writer.cluster import (
+    Z_ORDER_KEY,
+    with_z_order_key,
+    sort_by_z_order,
+    to_sorting_columns,
+)
+from polars_writer.cache import select_row_groups
+from func_args import NOTHING
+from polars_writer.writer import Writer
+
+
+random.seed(0)
+n = 10_000
+df = pl.DataFrame(
+    {
+        "x": [random.randint(0, 999) for _ in range(n)],
+        "y": [random.randint(0, 999) for _ in range(n)],
+        "name": [random.choice(["a", "b", "c", None]) for _ in range(n)],
+    }
+)
+
+
+def count_row_groups(data: bytes, spec) -> int:
+    metadata = pq.read_metadata(pa.BufferReader(data))
+    return len(select_row_groups(metadata, spec))
+
+
+def test_z_order_key():
+    with pytest.raises(ValueError):
+        with_z_order_key(df, [])
+    grid = pl.DataFrame({"x": [0, 1, 0, 1], "y": [0, 0, 1, 1]})
+    df1 = with_z_order_key(grid, ["x", "y"])
+    assert df1.columns == ["x", "y", Z_ORDER_KEY]
+    key = df1[Z_ORDER_KEY]
+    assert key.dtype == pl.UInt64
+    # the Z curve visits (0, 0), (0, 1), (1, 0), (1, 1)
+    assert key.arg_sort().to_list() == [0, 2, 1, 3]
+    assert sort_by_z_order(grid.lazy(), ["x", "y"]).collect().rows() == [
+        (0, 0),
+        (0, 1),
+        (1, 0),
+        (1, 1),
+    ]
+    # null is the lowest
+    key = with_z_order_key(pl.DataFrame({"x": [2, None, 1]}), ["x"])[Z_ORDER_KEY]
+    assert key.arg_sort().to_list() == [1, 2, 0]
+
+
+def test_to_sorting_columns():
+    schema = df.head(0).to_arrow().schema
+    columns = to_sorting_columns(schema, ["y", "x"], [True, False], nulls_last=True)
+    assert [(c.column_index, c.descending, c.nulls_first) for c in columns] == [
+        (1, True, False),
+        (0, False, False),
+    ]
+    assert len(to_sorting_columns(schema, ["x", "unknown", "y"])) == 1
+    assert to_sorting_columns(schema, "unknown") == []
+
+
+def test_writer_sort_and_cluster(tmp_path):
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_sort_by="x", parquet_cluster_by=["y"])
+    with pytest.raises(ValueError):
+        Writer(format="parquet", parquet_cluster_by=[])
+    assert Writer(format="csv", parquet_sort_by="x").has_sort() is False
+
+    unsorted = Writer(format="parquet", parquet_row_group_size=1000)
+    x_filter = {"col": "x", "op": "lt", "value": 100}
+    y_filter = {"col": "y", "op": "lt", "value": 100}
+    data = bytes(unsorted.to_bytes(df))
+    assert count_row_groups(data, x_filter) == 10
+    assert count_row_groups(data, y_filter) == 10
+
+    # sort with the pyarrow writer, the sort order is recorded
+    writer = Writer(
+        format="parquet",
+        parquet_row_group_size=1000,
+        parquet_use_pyarrow=True,
+        parquet_sort_by=["x", "name"],
+        parquet_sort_descending=[False, True],
+        parquet_sort_nulls_last=True,
+    )
+    assert Writer.from_dict(writer.to_dict()) == writer
+    assert writer.compile().is_direct is False
+    buffer = io.BytesIO()
+    writer.write(df, file_args=[buffer])
+    data = buffer.getvalue()
+    assert count_row_groups(data, x_filter) == 1
+    metadata = pq.read_metadata(pa.BufferReader(data))
+    sorting_columns = metadata.row_group(0).sorting_columns
+    assert [(c.column_index, c.descending, c.nulls_first) for c in sorting_columns] == [
+        (0, False, False),
+        (2, True, False),
+    ]
+    df1 = pl.read_parquet(data)
+    assert df1.equals(df.sort(["x", "name"], descending=[False, True], nulls_last=True))
+
+    # the native writer by default, sorted without the sort order
+    for use_pyarrow in [NOTHING, False]:
+        writer = Writer(
+            format="parquet",
+            parquet_sort_by="x",
+            parquet_use_pyarrow=use_pyarrow,
+            parquet_statistics="full",
+        )
+        data = bytes(writer.to_bytes(df))
+        metadata = pq.read_metadata(pa.BufferReader(data))
+        assert metadata.row_group(0).sorting_columns == ()
+        assert pl.read_parquet(data)["x"].is_sorted()
+    # the pyarrow writer only supports boolean statistics
+    with pytest.raises(ValueError):
+        Writer(
+            format="parquet",
+            parquet_sort_by="x",
+            parquet_use_pyarrow=True,
+            parquet_statistics="full",
+        )
+
+    # cluster, both columns prune
+    writer = Writer(
+        format="parquet",
+        parquet_row_group_size=1000,
+        parquet_cluster_by=["x", "y"],
+    )
+    data = bytes(writer.to_bytes(df))
+    assert count_row_groups(data, x_filter) < 10
+    assert count_row_groups(data, y_filter) < 10
+    assert pl.read_parquet(data).sort(["x", "y", "name"]).equals(
+        df.sort(["x", "y", "name"])
+    )
+
+    # sink and write_many
+    writer = Writer(format="parquet", parquet_sort_by="y")
+    path = tmp_path / "sink.parquet"
+    writer.sink(df.lazy(), file_args=[path])
+    assert pl.read_parquet(path)["y"].is_sorted()
+    path = tmp_path / "many.parquet"
+    results = writer.write_many([(df, [path])])
+    assert results[0].is_succeeded
+    assert pl.read_parquet(path)["y"].is_sorted()
+    assert pq.read_metadata(path).row_group(0).sorting_columns == ()
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.cluster", preview=False)
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+from polars_writer.compression import (
+    TextCompressionEnum,
+    open_compressor,
+    decompress,
+    read_and_decompress,
+    open_decompressor,
+    decompress_to_buffer,
+)
+
+
+@pytest.mark.parametrize("compression", [c.value for c in TextCompressionEnum])
+def test_open_compressor_and_decompress(compression, tmp_path):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    if compression == "lz4":
+        pytest.importorskip("lz4")
+
+    # file object is not closed, multiple frames can be concatenated
+    buffer = io.BytesIO()
+    for part in [b"hello ", b"world"]:
+        with open_compressor(buffer, compression, level=1) as stream:
+            stream.write(part)
+    assert buffer.closed is False
+    assert decompress(buffer.getvalue(), compression) == b"hello world"
+
+    path = tmp_path / "data.bin"
+    with open_compressor(path, compression) as stream:
+        stream.write(b"hello ")
+    with open_compressor(path, compression, mode="ab") as stream:
+        stream.write(b"world")
+    assert read_and_decompress(path, compression) == b"hello world"
+    assert read_and_decompress(str(path), compression) == b"hello world"
+    assert read_and_decompress(path.read_bytes(), compression) == b"hello world"
+    with path.open("rb") as f:
+        assert read_and_decompress(f, compression) == b"hello world"
+
+    # decompressed as a stream, chunk by chunk
+    with open_decompressor(path, compression) as stream:
+        assert stream.read(6) == b"hello "
+        assert stream.read() == b"world"
+    buffer = decompress_to_buffer(path, compression)
+    assert buffer.tell() == 0
+    assert buffer.getvalue() == b"hello world"
+
+
+def test_invalid_compression():
+    with pytest.raises(ValueError):
+        with open_compressor(io.BytesIO(), "invalid"):
+            pass
+    with pytest.raises(ValueError):
+        decompress(b"", "invalid")
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.compression", preview=False)
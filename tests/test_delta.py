@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+import time
+import datetime
+
+import pytest
+import polars as pl
+from deltalake import DeltaTable
+
+from polars_writer.delta import (
+    to_sql_literal,
+    build_upsert_predicate,
+    build_change_predicate,
+)
+from polars_writer.writer import Writer
+
+
+def make_df(start: int, n: int) -> pl.DataFrame:
+    return pl.DataFrame({"id": range(start, start + n), "value": ["x"] * n})
+
+
+def test_delta_append_buffer(tmp_path):
+    table = str(tmp_path / "table")
+    writer = Writer(format="delta")
+
+    with pytest.raises(ValueError):
+        Writer(format="csv").open_delta_append(table)
+    with pytest.raises(ValueError):
+        Writer(format="delta", delta_mode="overwrite").open_delta_append(table)
+
+    # row threshold, 10 appends of 3 rows -> 3 commits of 9 rows + close
+    with writer.open_delta_append(
+        table, max_rows=9, max_bytes=None, max_seconds=None
+    ) as buffer:
+        for i in range(10):
+            buffer.write(make_df(i * 3, 3))
+        buffer.write(make_df(0, 0))  # empty frame is ignored
+        assert buffer.n_commits == 3
+        assert buffer.pending_rows == 3
+    assert buffer.closed
+    assert buffer.n_commits == 4
+    assert buffer.n_rows == 30
+    assert buffer.n_batches == 10
+    with pytest.raises(ValueError):
+        buffer.write(make_df(0, 1))
+
+    dt = DeltaTable(table)
+    assert dt.version() == 3
+    df = writer.read(file_args=[table]).sort("id")
+    assert df["id"].to_list() == list(range(30))
+
+    # byte threshold
+    buffer = writer.open_delta_append(
+        table, max_rows=None, max_bytes=1, max_seconds=None
+    )
+    buffer.write(make_df(30, 5))
+    assert buffer.n_commits == 1
+
+    # time threshold
+    buffer = writer.open_delta_append(
+        table, max_rows=None, max_bytes=None, max_seconds=0.05
+    )
+    buffer.write(make_df(35, 5))
+    assert buffer.flush_if_due() is False
+    time.sleep(0.1)
+    assert buffer.flush_if_due() is True
+    assert buffer.n_commits == 1
+    buffer.close()
+    assert buffer.n_commits == 1
+
+    assert DeltaTable(table).version() == 5
+    assert writer.read(file_args=[table]).height == 40
+
+
+def test_delta_optimize_and_vacuum(tmp_path):
+    table = str(tmp_path / "table")
+    writer = Writer.from_dict(
+        {
+            "format": "delta",
+            "delta_mode": "append",
+            "delta_optimize_z_order_by": ["id"],
+            "delta_vacuum_retention_hours": 0,
+            "delta_vacuum_enforce_retention_duration": False,
+        }
+    )
+    assert writer.to_dict()["delta_optimize_z_order_by"] == ["id"]
+    with pytest.raises(ValueError):
+        Writer(format="parquet").delta_optimize(table)
+    with pytest.raises(ValueError):
+        Writer(format="parquet").delta_vacuum(table)
+
+    for i in range(5):
+        writer.write(make_df(i * 10, 10), file_args=[table])
+    assert len(DeltaTable(table).files()) == 5
+
+    # compact only
+    metrics = writer.delta_optimize(table, z_order_by=None)
+    assert metrics["numFilesAdded"] == 1
+    assert metrics["numFilesRemoved"] == 5
+    assert len(DeltaTable(table).files()) == 1
+
+    # z-order from the config
+    writer.write(make_df(50, 10), file_args=[table])
+    metrics = writer.delta_optimize(table)
+    assert metrics["numFilesRemoved"] == 2
+    assert len(DeltaTable(table).files()) == 1
+
+    n_files = len(list((tmp_path / "table").glob("*.parquet")))
+    assert n_files == 8
+    files = writer.delta_vacuum(table, dry_run=True)
+    assert len(files) == 7
+    assert len(list((tmp_path / "table").glob("*.parquet"))) == 8
+    files = writer.delta_vacuum(table)
+    assert len(files) == 7
+    assert len(list((tmp_path / "table").glob("*.parquet"))) == 1
+
+    df = writer.read(file_args=[table]).sort("id")
+    assert df["id"].to_list() == list(range(60))
+
+
+def test_upsert_predicate():
+    assert to_sql_literal(None) == "NULL"
+    assert to_sql_literal(True) == "true"
+    assert to_sql_literal(1) == "1"
+    assert to_sql_literal("it's") == "'it''s'"
+    assert to_sql_literal(datetime.date(2024, 1, 2)) == "CAST('2024-01-02' AS DATE)"
+    assert to_sql_literal(datetime.datetime(2024, 1, 2, 3)) == (
+        "CAST('2024-01-02T03:00:00' AS TIMESTAMP)"
+    )
+    with pytest.raises(TypeError):
+        to_sql_literal(object())
+    assert to_sql_literal(float("inf")) == "CAST('inf' AS DOUBLE)"
+    assert to_sql_literal(float("-inf")) == "CAST('-inf' AS DOUBLE)"
+    with pytest.raises(ValueError):
+        to_sql_literal(float("nan"))
+
+    df = pl.DataFrame({"id": [3, 1, 2], "p": ["b", None, "a"], "v": [1, 2, 3]})
+    assert build_upsert_predicate(df, keys=["id"], partition_cols=["p"]) == (
+        't."id" = s."id"'
+        """ AND (t."p" IN ('a', 'b') OR t."p" IS NULL)"""
+        ' AND t."id" >= 1 AND t."id" <= 3'
+    )
+    assert build_change_predicate(["v", "p"]) == (
+        '(t."v" IS DISTINCT FROM s."v") OR (t."p" IS DISTINCT FROM s."p")'
+    )
+    assert build_change_predicate([]) is None
+
+
+def test_upsert_non_finite_partition(tmp_path):
+    table = str(tmp_path / "table")
+    writer = Writer(format="delta")
+    df = pl.DataFrame({"id": [1, 2, 3], "p": [float("inf"), 1.0, float("-inf")]})
+    writer.upsert(df, table, keys=["id"], partition_cols=["p"])
+
+    batch = pl.DataFrame({"id": [1, 3, 4], "p": [float("inf"), float("-inf"), 1.0]})
+    result = writer.upsert(batch, table, keys=["id"], partition_cols=["p"])
+    assert result.n_unchanged == 2
+    assert result.n_inserted == 1
+    assert writer.read(file_args=[table]).height == 4
+
+    batch = pl.DataFrame({"id": [5], "p": [float("nan")]})
+    with pytest.raises(ValueError):
+        writer.upsert(batch, table, keys=["id"], partition_cols=["p"])
+
+
+def test_upsert(tmp_path):
+    table = str(tmp_path / "table")
+    writer = Writer(format="delta")
+    with pytest.raises(ValueError):
+        Writer(format="parquet").upsert(make_df(0, 1), table, keys=["id"])
+    with pytest.raises(ValueError):
+        writer.upsert(make_df(0, 1), table, keys=[])
+
+    def make_batch(ids, value):
+        return pl.DataFrame(
+            {
+                "id": ids,
+                "p": [f"p{i % 4}" for i in ids],
+                "value": [value] * len(ids),
+            }
+        )
+
+    # create the table, 4 partitions, 10 rows each
+    result = writer.upsert(
+        make_batch(list(range(40)), "a"), table, keys=["id"], partition_cols=["p"]
+    )
+    assert result.n_inserted == 40
+    assert result.predicate is None
+    assert len(DeltaTable(table).files()) == 4
+
+    # 2 updated, 1 unchanged, 1 inserted, all in partition p0
+    batch = pl.concat(
+        [make_batch([0, 4], "b"), make_batch([8], "a"), make_batch([40], "a")]
+    )
+    result = writer.upsert(batch, table, keys=["id"], partition_cols=["p"])
+    assert result.n_source_rows == 4
+    assert result.n_inserted == 1
+    assert result.n_updated == 2
+    assert result.n_unchanged == 1
+    assert result.n_files_scanned == 1
+    assert result.n_files_skipped == 3
+    assert result.n_files_removed == 1
+    assert "IN ('p0')" in result.predicate
+
+    df = writer.read(file_args=[table]).sort("id")
+    assert df.height == 41
+    assert df.filter(pl.col("value") == "b")["id"].to_list() == [0, 4]
+
+    # nothing changed, no file is rewritten
+    result = writer.upsert(
+        make_batch([0, 4], "b"), table, keys=["id"], partition_cols=["p"]
+    )
+    assert result.n_unchanged == 2
+    assert result.n_files_removed == 0
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.delta", preview=False)
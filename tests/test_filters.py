@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import datetime
+
+import pytest
+import polars as pl
+
+from polars_writer.filters import validate_filter, get_filter_columns, to_expr
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame(
+    {
+        "id": [1, 2, 3, 4, 5],
+        "name": ["alice", "bob", "cathy", "david", None],
+        "day": [datetime.date(2024, 1, i) for i in range(1, 6)],
+    }
+)
+
+
+def get_ids(spec) -> list:
+    return df.filter(to_expr(spec))["id"].to_list()
+
+
+def test_to_expr():
+    assert get_ids({"col": "id", "op": "eq", "value": 2}) == [2]
+    assert get_ids({"col": "id", "op": "ne", "value": 2}) == [1, 3, 4, 5]
+    assert get_ids({"col": "id", "op": "lt", "value": 2}) == [1]
+    assert get_ids({"col": "id", "op": "le", "value": 2}) == [1, 2]
+    assert get_ids({"col": "id", "op": "gt", "value": 4}) == [5]
+    assert get_ids({"col": "id", "op": "ge", "value": 4}) == [4, 5]
+    assert get_ids({"col": "id", "op": "in", "value": [1, 3]}) == [1, 3]
+    assert get_ids({"col": "id", "op": "not_in", "value": [1, 3]}) == [2, 4, 5]
+    assert get_ids({"col": "id", "op": "between", "value": [2, 4]}) == [2, 3, 4]
+    assert get_ids({"col": "name", "op": "is_null"}) == [5]
+    assert get_ids({"col": "name", "op": "is_not_null"}) == [1, 2, 3, 4]
+    assert get_ids(
+        {"col": "day", "op": "ge", "value": "2024-01-04", "dtype": "date"}
+    ) == [4, 5]
+    assert get_ids(
+        {
+            "col": "day",
+            "op": "in",
+            "value": ["2024-01-01", "2024-01-03"],
+            "dtype": "date",
+        }
+    ) == [1, 3]
+    spec = {
+        "or": [
+            {
+                "and": [
+                    {"col": "id", "op": "gt", "value": 1},
+                    {"col": "name", "op": "in", "value": ["bob", "cathy"]},
+                ]
+            },
+            {"not": {"col": "day", "op": "lt", "value": "2024-01-05", "dtype": "date"}},
+        ]
+    }
+    assert get_ids(spec) == [2, 3, 5]
+    assert get_filter_columns(spec) == ["id", "name", "day"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        [],
+        {"and": []},
+        {"and": [{"col": "id", "op": "eq", "value": 1}], "col": "id"},
+        {"not": {"col": "id", "op": "eq", "value": 1}, "col": "id"},
+        {"op": "eq", "value": 1},
+        {"col": "id", "op": "equal", "value": 1},
+        {"col": "id", "op": "eq"},
+        {"col": "id", "op": "in", "value": 1},
+        {"col": "id", "op": "between", "value": [1, 2, 3]},
+        {"col": "id", "op": "eq", "value": "1", "dtype": "time"},
+    ],
+)
+def test_validate_filter(spec):
+    with pytest.raises(ValueError):
+        validate_filter(spec)
+
+
+def test_read_pushdown(tmp_path):
+    with pytest.raises(ValueError):
+        Writer(format="parquet", read_filter={"col": "id"})
+    with pytest.raises(ValueError):
+        Writer(format="parquet", read_columns="id")
+
+    read_filter = {
+        "and": [
+            {"col": "id", "op": "ge", "value": 2},
+            {"col": "name", "op": "is_not_null"},
+        ]
+    }
+    for format, ext in [
+        ("csv", "csv"),
+        ("json", "json"),
+        ("ndjson", "ndjson"),
+        ("parquet", "parquet"),
+    ]:
+        path = tmp_path / f"data.{ext}"
+        Writer(format=format).write(df, file_args=[path])
+        writer = Writer(
+            format=format,
+            read_columns=["id", "name"],
+            read_filter=read_filter,
+        )
+        assert writer.to_dict()["read_filter"] == read_filter
+        expected = [
+            {"id": 2, "name": "bob"},
+            {"id": 3, "name": "cathy"},
+            {"id": 4, "name": "david"},
+        ]
+        assert writer.read(file_args=[path]).to_dicts() == expected
+        assert writer.compile_read().execute([path]).to_dicts() == expected
+        if format != "json":
+            assert writer.scan(file_args=[path]).collect().to_dicts() == expected
+
+    # the projection and the filter are pushed into the parquet scan
+    writer = Writer(format="parquet", read_columns=["id"], read_filter=read_filter)
+    plan = writer.scan(file_args=[tmp_path / "data.parquet"]).explain()
+    assert "SELECTION" in plan
+    assert "PROJECT 2/3 COLUMNS" in plan
+
+    # delta
+    path = tmp_path / "delta"
+    Writer(format="delta").write(df, file_args=[str(path)])
+    writer = Writer(
+        format="delta",
+        read_columns=["id"],
+        read_filter={"col": "day", "op": "le", "value": "2024-01-02", "dtype": "date"},
+    )
+    assert writer.read(file_args=[str(path)]).to_dicts() == [{"id": 1}, {"id": 2}]
+
+    # compressed text
+    path = tmp_path / "data.csv.gz"
+    writer = Writer(format="csv", csv_compression="gzip", read_columns=["name"])
+    writer.write(df, file_args=[path])
+    assert gzip.decompress(path.read_bytes()).startswith(b"id,name,day")
+    assert writer.read(file_args=[path]).columns == ["name"]
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.filters", preview=False)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+import io
+from types import SimpleNamespace
+
+import pytest
+import polars as pl
+
+from polars_writer.hooks import (
+    IOEvent,
+    WriteResult,
+    ReadResult,
+    HookRegistry,
+    ByteCounter,
+    get_path_size,
+    get_source_size,
+    hook_registry,
+)
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+
+
+def test_get_size(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"hello")
+    tmp_path.joinpath("sub").mkdir()
+    tmp_path.joinpath("sub", "b.txt").write_bytes(b"world!")
+    assert get_path_size(path) == 5
+    assert get_path_size(tmp_path) == 11
+    assert get_path_size(tmp_path / "not-exists") is None
+
+    assert get_source_size(b"hello") == 5
+    assert get_source_size(str(path)) == 5
+    assert get_source_size(io.BytesIO(b"hello")) == 5
+    assert get_source_size("s3://bucket/key") is None
+    assert get_source_size(object()) is None
+
+    counter = ByteCounter(tmp_path / "c.txt")
+    tmp_path.joinpath("c.txt").write_bytes(b"abc")
+    assert counter.count() == 3
+    # overwritten, the final size
+    counter = ByteCounter(tmp_path / "c.txt")
+    tmp_path.joinpath("c.txt").write_bytes(b"a")
+    assert counter.count() == 1
+    # appended, the growth
+    counter = ByteCounter(tmp_path / "sub", append=True)
+    tmp_path.joinpath("sub", "d.txt").write_bytes(b"abcd")
+    assert counter.count() == 4
+    assert ByteCounter("s3://bucket/key").count() is None
+    # rolling, the size of the part files in the manifest
+    counter = ByteCounter(tmp_path, rolling=True)
+    assert counter.count([SimpleNamespace(path=tmp_path / "c.txt")]) == 1
+    assert counter.count([SimpleNamespace(path="s3://bucket/key")]) is None
+    assert counter.count() is None
+    assert ByteCounter(None).count() is None
+
+
+def test_hook_registry():
+    registry = HookRegistry()
+    assert registry.is_empty()
+    calls = list()
+
+    @registry.register_on_start
+    def on_start(event):
+        calls.append(("start", event.operation))
+
+    def broken(event, result):
+        raise RuntimeError("metrics backend is down")
+
+    registry.register_on_end(broken)
+    registry.register_on_error(lambda event, error: calls.append(("error", error)))
+    assert registry.is_empty() is False
+
+    event = IOEvent("write", "csv", "write_csv", {}, [])
+    registry.emit_start(event)
+    with pytest.warns(UserWarning):
+        registry.emit_end(event, None)
+    registry.emit_error(event, ValueError())
+    assert calls[0] == ("start", "write")
+    assert isinstance(calls[1][1], ValueError)
+
+    registry.unregister(on_start)
+    registry.unregister(broken)
+    assert not registry.on_start
+    registry.clear()
+    assert registry.is_empty()
+
+
+def test_write_read_scan_result(tmp_path):
+    writer = Writer(format="parquet", parquet_compression="zstd")
+    path = tmp_path / "data.parquet"
+
+    result = writer.write(df, file_args=[path], return_result=True)
+    assert isinstance(result, WriteResult)
+    assert result.format == "parquet"
+    assert result.method == "write_parquet"
+    assert result.kwargs == {"compression": "zstd"}
+    assert result.n_rows == 3
+    assert result.n_columns == 2
+    assert result.n_bytes == path.stat().st_size
+    assert result.wall_time > 0
+    assert result.rows_per_second > 0
+    assert result.mb_per_second > 0
+
+    buffer = io.BytesIO()
+    result = writer.write(df, file_args=[buffer], return_result=True)
+    assert result.n_bytes == len(buffer.getvalue())
+
+    # overwrite a larger file, the size of the new file
+    result = writer.write(df.head(1), file_args=[path], return_result=True)
+    assert result.n_bytes == path.stat().st_size
+    assert result.mb_per_second > 0
+    result = writer.write(df, file_args=[path], return_result=True)
+
+    # rolling output, only the part files of this write are counted
+    dir_root = tmp_path / "rolling"
+    dir_root.mkdir()
+    dir_root.joinpath("existing.bin").write_bytes(b"x" * 1000)
+    rolling_writer = Writer(format="csv", max_rows_per_file=2)
+    result = rolling_writer.write(df, file_args=[dir_root], return_result=True)
+    assert len(result.output) == 2
+    assert result.n_bytes == sum(f.path.stat().st_size for f in result.output)
+
+    result = writer.read(file_args=[path], return_result=True)
+    assert isinstance(result, ReadResult)
+    assert result.n_rows == 3
+    assert result.n_bytes == path.stat().st_size
+    assert result.df.to_dicts() == df.to_dicts()
+
+    result = writer.scan(file_args=[path], return_result=True)
+    assert result.n_rows is None
+    assert result.rows_per_second is None
+    assert result.df.collect().to_dicts() == df.to_dicts()
+
+
+def test_global_hooks(tmp_path):
+    events = list()
+
+    def on_start(event):
+        events.append(("start", event.operation, event.format))
+
+    def on_end(event, result):
+        events.append(("end", event.operation, result.n_rows))
+
+    def on_error(event, error):
+        events.append(("error", event.operation, type(error).__name__))
+
+    for func, register in [
+        (on_start, hook_registry.register_on_start),
+        (on_end, hook_registry.register_on_end),
+        (on_error, hook_registry.register_on_error),
+    ]:
+        register(func)
+    try:
+        writer = Writer(format="csv")
+        path = tmp_path / "data.csv"
+        # return value is unchanged when only hooks are registered
+        assert writer.write(df, file_args=[path]) is None
+        assert writer.read(file_args=[path]).to_dicts() == df.to_dicts()
+        writer.scan(file_args=[path])
+        with pytest.raises(Exception):
+            writer.read(file_args=[tmp_path / "not-exists.csv"])
+    finally:
+        for func in [on_start, on_end, on_error]:
+            hook_registry.unregister(func)
+
+    assert events[:6] == [
+        ("start", "write", "csv"),
+        ("end", "write", 3),
+        ("start", "read", "csv"),
+        ("end", "read", 3),
+        ("start", "scan", "csv"),
+        ("end", "scan", None),
+    ]
+    assert events[6] == ("start", "read", "csv")
+    assert events[7][:2] == ("error", "read")
+    assert hook_registry.is_empty()
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.hooks", preview=False)
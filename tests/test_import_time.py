@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+
+# the import time is dominated by these modules, they are imported lazily
+# on first use, so they must not be loaded by ``import polars_writer.api``
+HEAVY_MODULES = ["polars", "pyarrow", "deltalake"]
+
+
+def get_heavy_modules(*lines: str) -> str:
+    """
+    Run the code lines in a fresh interpreter and return the printed list
+    of the heavy modules in ``sys.modules`` at the end.
+    """
+    code = "\n".join(
+        [
+            "import sys",
+            *lines,
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])",
+        ]
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return res.stdout.strip()
+
+
+def test_import_time():
+    assert get_heavy_modules("import polars_writer.api") == "[]"
+
+
+def test_no_heavy_import():
+    assert (
+        get_heavy_modules(
+            "import polars_writer.api",
+            "from polars_writer.api import Writer",
+            "Writer.from_dict(dict(format='parquet', parquet_compression='zstd'))",
+        )
+        == "[]"
+    )
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer", preview=False)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+import polars as pl
+
+from polars_writer.plan import freeze, WritePlan, ReadPlan, ScanPlan
+from polars_writer.hooks import hook_registry
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+
+
+def test_freeze():
+    assert freeze({"b": [1, {"c": 2}], "a": {3}}) == (
+        ("a", frozenset({3})),
+        ("b", (1, (("c", 2),))),
+    )
+    hash(freeze({"b": [1, {"c": 2}], "a": {3}}))
+
+
+def test_compile():
+    writer = Writer(
+        format="parquet",
+        parquet_compression="zstd",
+        storage_options={"region": "us-east-1"},
+    )
+    plan = writer.compile()
+    assert isinstance(plan, WritePlan)
+    assert plan.method == "write_parquet"
+    assert plan.kwargs == {"compression": "zstd"}
+    with pytest.raises(TypeError):
+        plan.kwargs["compression"] = "snappy"
+    with pytest.raises(Exception):
+        plan.method = "write_csv"
+
+    # hashable and comparable
+    assert plan == writer.compile()
+    assert hash(plan) == hash(writer.compile())
+    assert len({plan, writer.compile()}) == 1
+    # same method and kwargs, but different output
+    csv_plan = Writer(format="csv").compile()
+    other_plan = Writer(
+        format="csv", csv_compression="gzip", max_rows_per_file=5
+    ).compile()
+    assert csv_plan.kwargs == other_plan.kwargs
+    assert csv_plan != other_plan
+    assert hash(csv_plan) != hash(other_plan)
+    assert len({csv_plan, other_plan}) == 2
+    read_plan = writer.compile_read()
+    assert isinstance(read_plan, ReadPlan)
+    assert hash(read_plan) == hash(writer.compile_read())
+    assert read_plan.kwargs["storage_options"] == {"region": "us-east-1"}
+
+    # plan is a snapshot
+    writer.parquet_compression = "snappy"
+    assert plan.kwargs == {"compression": "zstd"}
+
+    # validate once
+    with pytest.raises(ValueError):
+        Writer(format="json").compile_scan()
+
+
+def test_execute(tmp_path):
+    for format in ["csv", "ndjson", "parquet"]:
+        writer = Writer(format=format)
+        write_plan = writer.compile()
+        read_plan = writer.compile_read()
+        scan_plan = writer.compile_scan()
+        assert isinstance(scan_plan, ScanPlan)
+        path = tmp_path / f"data.{format}"
+        write_plan.execute(df, [path])
+        assert read_plan.execute([path]).to_dicts() == df.to_dicts()
+        assert scan_plan.execute([path]).collect().to_dicts() == df.to_dicts()
+
+    writer = Writer(format="csv")
+    path = tmp_path / "data.tsv"
+    writer.compile().execute(df, [path], overrides={"separator": "\t"})
+    df1 = writer.compile_read().execute([path], overrides={"separator": "\t"})
+    assert df1.to_dicts() == df.to_dicts()
+    df1 = writer.compile_scan().execute([path], overrides={"separator": "\t"})
+    assert df1.collect().to_dicts() == df.to_dicts()
+
+
+def test_execute_not_direct(tmp_path):
+    # rolling output and compression go through the full Writer logic
+    writer = Writer(format="csv", csv_compression="gzip", max_rows_per_file=2)
+    plan = writer.compile()
+    assert plan.is_direct is False
+    manifest = plan.execute(df, [tmp_path], overrides={"include_header": True})
+    assert len(manifest) == 2
+    read_plan = writer.compile_read()
+    df1 = pl.concat([read_plan.execute([f.path]) for f in manifest])
+    assert df1.to_dicts() == df.to_dicts()
+    df1 = pl.concat(
+        [writer.compile_scan().execute([f.path], overrides={}) for f in manifest]
+    ).collect()
+    assert df1.to_dicts() == df.to_dicts()
+
+    # hooks are honored
+    events = list()
+    hook_registry.register_on_end(lambda event, result: events.append(event))
+    try:
+        Writer(format="csv").compile().execute(df, [io.BytesIO()])
+    finally:
+        hook_registry.clear()
+    assert len(events) == 1
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.plan", preview=False)
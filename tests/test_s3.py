@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+import io
+import gzip
+
+import pytest
+import polars as pl
+
+from polars_writer.s3 import (
+    MIN_PART_SIZE,
+    is_s3_uri,
+    split_s3_uri,
+    new_s3_client,
+    S3MultipartUpload,
+)
+from polars_writer.cache import ParquetMetadataCache
+from polars_writer.writer import Writer
+
+moto_server = pytest.importorskip("moto.server")
+
+BUCKET = "test-bucket"
+
+
+@pytest.fixture(scope="module")
+def storage_options():
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    storage_options = {
+        "aws_access_key_id": "testing",
+        "aws_secret_access_key": "testing",
+        "aws_region": "us-east-1",
+        "aws_endpoint_url": f"http://{host}:{port}",
+    }
+    new_s3_client(storage_options).create_bucket(Bucket=BUCKET)
+    yield storage_options
+    server.stop()
+
+
+def get_object(storage_options, key: str) -> bytes:
+    client = new_s3_client(storage_options)
+    return client.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+
+
+def test_is_s3_uri():
+    assert is_s3_uri("s3://bucket/key") is True
+    assert is_s3_uri("s3a://bucket/key") is True
+    assert is_s3_uri("/tmp/key") is False
+    assert is_s3_uri(io.BytesIO()) is False
+
+    assert split_s3_uri("s3://bucket/a/b.csv") == ("bucket", "a/b.csv")
+    with pytest.raises(ValueError):
+        split_s3_uri("s3://bucket")
+    with pytest.raises(ValueError):
+        split_s3_uri("/tmp/key")
+
+
+def test_multipart_upload(storage_options):
+    client = new_s3_client(storage_options)
+    with pytest.raises(ValueError):
+        S3MultipartUpload(client, BUCKET, "key", part_size=1)
+    with pytest.raises(ValueError):
+        S3MultipartUpload(client, BUCKET, "key", max_concurrency=0)
+
+    # small object, single put_object
+    with S3MultipartUpload(client, BUCKET, "small.txt") as upload:
+        upload.write(b"hello")
+        upload.write(b" world")
+        assert upload.tell() == 11
+    assert upload.upload_id is None
+    assert get_object(storage_options, "small.txt") == b"hello world"
+
+    # large object, 3 parts
+    chunk = b"0123456789abcdef" * (64 * 1024)  # 1 MiB
+    with S3MultipartUpload(
+        client,
+        BUCKET,
+        "large.bin",
+        part_size=MIN_PART_SIZE,
+        max_concurrency=2,
+    ) as upload:
+        for _ in range(12):
+            upload.write(chunk)
+    assert upload.upload_id is not None
+    assert get_object(storage_options, "large.bin") == chunk * 12
+
+    # an exception aborts the upload, no object is created
+    with pytest.raises(ZeroDivisionError):
+        with S3MultipartUpload(
+            client, BUCKET, "aborted.bin", part_size=MIN_PART_SIZE
+        ) as upload:
+            for _ in range(6):
+                upload.write(chunk)
+            1 / 0
+    res = client.list_objects_v2(Bucket=BUCKET, Prefix="aborted.bin")
+    assert res["KeyCount"] == 0
+
+
+def test_write_to_s3(storage_options):
+    df = pl.DataFrame(
+        {
+            "id": range(400_000),
+            "name": [f"name-{i:010d}" for i in range(400_000)],
+        }
+    )
+
+    # csv larger than one part
+    writer = Writer(
+        format="csv",
+        storage_options=storage_options,
+        s3_part_size=MIN_PART_SIZE,
+        s3_max_concurrency=4,
+    )
+    assert writer.to_dict()["s3_part_size"] == MIN_PART_SIZE
+    writer.write(df, file_args=[f"s3://{BUCKET}/data.csv"])
+    data = get_object(storage_options, "data.csv")
+    assert len(data) > MIN_PART_SIZE
+    assert pl.read_csv(data).equals(df)
+
+    # the compiled plan also streams to s3
+    writer.compile().execute(df, [f"s3://{BUCKET}/plan.csv"])
+    assert get_object(storage_options, "plan.csv") == data
+
+    # compressed text
+    writer = Writer(
+        format="ndjson",
+        ndjson_compression="gzip",
+        storage_options=storage_options,
+    )
+    writer.write(df, file_args=[f"s3://{BUCKET}/data.ndjson.gz"])
+    data = gzip.decompress(get_object(storage_options, "data.ndjson.gz"))
+    assert pl.read_ndjson(data).equals(df)
+    # read and scan it back, decompressed as a stream
+    assert writer.read(file_args=[f"s3://{BUCKET}/data.ndjson.gz"]).equals(df)
+    lf = writer.scan(file_args=[f"s3://{BUCKET}/data.ndjson.gz"])
+    assert lf.collect().equals(df)
+
+    # parquet
+    writer = Writer(format="parquet", storage_options=storage_options)
+    writer.write(df, file_args=[f"s3://{BUCKET}/data.parquet"])
+    data = get_object(storage_options, "data.parquet")
+    assert pl.read_parquet(data).equals(df)
+
+    # rolling output, one object per part
+    writer = Writer(
+        format="csv",
+        storage_options=storage_options,
+        max_rows_per_file=150_000,
+    )
+    manifest = writer.write(df, file_args=[f"s3://{BUCKET}/rolling/"])
+    assert [f.path for f in manifest] == [
+        f"s3://{BUCKET}/rolling/part-0000{i}.csv" for i in range(3)
+    ]
+    df1 = pl.concat(
+        [
+            pl.read_csv(get_object(storage_options, f"rolling/part-0000{i}.csv"))
+            for i in range(3)
+        ]
+    )
+    assert df1.equals(df)
+
+    # not supported remote output directories
+    with pytest.raises(ValueError):
+        writer.write(df, file_args=["gs://bucket/rolling"])
+    with pytest.raises(ValueError):
+        writer.sink(df.lazy(), file_args=[f"s3://{BUCKET}/rolling"])
+    writer = Writer(format="parquet", parquet_partition_by="id")
+    with pytest.raises(ValueError):
+        writer.write_partitioned(df, f"s3://{BUCKET}/partitioned")
+
+    with pytest.raises(ValueError):
+        Writer(format="csv", s3_part_size=1024)
+    with pytest.raises(ValueError):
+        Writer(format="csv", s3_max_concurrency=0)
+
+
+def test_parquet_metadata_cache_on_s3(storage_options):
+    df = pl.DataFrame({"id": range(1000)})
+    uri = f"s3://{BUCKET}/cache/data.parquet"
+    writer = Writer(
+        format="parquet",
+        storage_options=storage_options,
+        parquet_row_group_size=100,
+        read_filter={"col": "id", "op": "lt", "value": 150},
+    )
+    writer.write(df, file_args=[uri])
+    writer.metadata_cache = ParquetMetadataCache(max_bytes=1_000_000)
+    for _ in range(3):
+        assert writer.read(file_args=[uri])["id"].to_list() == list(range(150))
+    assert writer.metadata_cache.misses == 1
+    assert writer.metadata_cache.hits == 2
+
+    # a new object with a different size is a new identity
+    writer.write(pl.DataFrame({"id": range(10)}), file_args=[uri])
+    assert writer.read(file_args=[uri]).height == 10
+    assert writer.metadata_cache.misses == 2
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.s3", preview=False)
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+import polars as pl
+
+from polars_writer.transform import (
+    validate_casts,
+    get_shrink_casts,
+    transform_frame,
+)
+from polars_writer.hooks import hook_registry
+from polars_writer.writer import Writer
+
+
+df = pl.DataFrame(
+    {
+        "id": range(1000),
+        "delta": [i - 500 for i in range(1000)],
+        "big": [i * 10_000_000_000 for i in range(1000)],
+        "ratio": [i / 4 for i in range(1000)],
+        "price": [i / 10 for i in range(1000)],
+        "country": ["US", "CA", "MX", None] * 250,
+        "name": [f"name-{i}" for i in range(1000)],
+        "empty": pl.Series([None] * 1000, dtype=pl.Int64),
+    }
+)
+
+
+def test_validate_casts():
+    validate_casts({"id": "Int32", "country": "Categorical"})
+    with pytest.raises(ValueError):
+        validate_casts(["id"])
+    with pytest.raises(ValueError):
+        validate_casts({1: "Int32"})
+    with pytest.raises(ValueError):
+        validate_casts({"id": "int32"})
+    with pytest.raises(ValueError):
+        validate_casts({"id": None})
+
+
+def test_get_shrink_casts():
+    casts = get_shrink_casts(df)
+    assert casts == {
+        "id": pl.Int16,
+        "delta": pl.Int16,
+        "ratio": pl.Float32,
+        "country": pl.Categorical,
+    }
+    # unsigned stays unsigned
+    casts = get_shrink_casts(df.select(pl.col("id").cast(pl.UInt64)))
+    assert casts == {"id": pl.UInt16}
+    # the threshold decides which string column is categorical
+    assert "name" in get_shrink_casts(df, categorical_threshold=1)
+    assert "country" not in get_shrink_casts(df, categorical_threshold=0.001)
+    assert get_shrink_casts(df, exclude=df.columns) == {}
+    assert get_shrink_casts(df.head(0).select("name")) == {}
+
+
+def test_transform_frame():
+    result = transform_frame(
+        df,
+        columns=["id", "price", "country", "name"],
+        exclude=["name"],
+        casts={"price": "Float32"},
+        shrink=True,
+    )
+    assert result.df.columns == ["id", "price", "country"]
+    assert result.dtypes == {"id": "Int16", "price": "Float32", "country": "Categorical"}
+    assert result.size_after < result.size_before
+    assert result.saved_bytes == result.size_before - result.size_after
+    assert result.df["country"].cast(pl.String).equals(df["country"])
+
+    # nothing to do
+    result = transform_frame(df)
+    assert result.df.equals(df)
+    assert result.dtypes == {}
+    assert result.saved_bytes == 0
+
+
+def test_writer_transform(tmp_path):
+    with pytest.raises(ValueError):
+        Writer(format="parquet", transform_columns="id")
+    with pytest.raises(ValueError):
+        Writer(format="parquet", transform_casts={"id": "int"})
+    with pytest.raises(ValueError):
+        Writer(format="parquet", transform_categorical_threshold=2)
+
+    writer = Writer(format="parquet")
+    assert writer.has_transform() is False
+    assert writer.write(df, file_args=[io.BytesIO()], return_result=True).transform is None
+
+    writer = Writer(
+        format="parquet",
+        transform_exclude=["name", "empty"],
+        transform_casts={"big": "Float64"},
+        transform_shrink=True,
+        transform_categorical_threshold=0.01,
+    )
+    assert writer.has_transform() is True
+    assert Writer.from_dict(writer.to_dict()) == writer
+    path = tmp_path / "data.parquet"
+    result = writer.write(df, file_args=[path], return_result=True)
+    assert result.transform.size_after < result.transform.size_before
+    assert result.n_columns == 6
+    assert dict(writer.read(file_args=[path]).schema) == {
+        "id": pl.Int16,
+        "delta": pl.Int16,
+        "big": pl.Float64,
+        "ratio": pl.Float32,
+        "price": pl.Float64,
+        "country": pl.Categorical,
+    }
+
+    # the hooks see the transform result
+    results = list()
+    hook_registry.register_on_end(lambda event, res: results.append(res))
+    try:
+        writer.write(df, file_args=[io.BytesIO()])
+    finally:
+        hook_registry.clear()
+    assert results[0].transform.dtypes["id"] == "Int16"
+
+    # the compiled plan, write_many and to_bytes transform too
+    writer = Writer(format="csv", transform_columns=["id", "country"])
+    assert writer.compile().is_direct is False
+    buffer = io.BytesIO()
+    writer.compile().execute(df, [buffer])
+    assert buffer.getvalue().startswith(b"id,country\n")
+    results = writer.write_many([(df, [tmp_path / "many.csv"])])
+    assert results[0].is_succeeded
+    assert writer.read(file_args=[tmp_path / "many.csv"]).columns == ["id", "country"]
+    assert bytes(writer.to_bytes(df)) == buffer.getvalue()
+    assert b"".join(writer.iter_bytes(df, chunk_rows=100)) == buffer.getvalue()
+
+
+def test_writer_transform_partitioned_and_sink(tmp_path):
+    # the projected out column doesn't leak through another method
+    config = dict(
+        format="parquet",
+        transform_exclude=["name", "empty"],
+        transform_casts={"id": "Int32"},
+    )
+    expected = {
+        "id": pl.Int32,
+        "delta": pl.Int64,
+        "big": pl.Int64,
+        "ratio": pl.Float64,
+        "price": pl.Float64,
+        "country": pl.String,
+    }
+    writer = Writer(parquet_partition_by="country", **config)
+    paths = writer.write_partitioned(df, tmp_path / "partitioned")
+    df1 = pl.read_parquet(paths[0])
+    assert dict(df1.schema) == {k: v for k, v in expected.items() if k != "country"}
+
+    writer = Writer(**config)
+    assert writer.has_sink() is True
+    path = tmp_path / "sink.parquet"
+    writer.sink(df.lazy(), file_args=[path])
+    assert dict(pl.read_parquet(path).schema) == expected
+
+    # the shrink needs the whole result, collected and written
+    writer = Writer(transform_shrink=True, **config)
+    assert writer.has_sink() is False
+    writer.sink(df.lazy(), file_args=[path])
+    assert pl.read_parquet(path).schema["delta"] == pl.Int16
+    dir_root = tmp_path / "rolling"
+    writer = Writer(format="csv", transform_columns=["id"], max_rows_per_file=500)
+    manifest = writer.sink(df.lazy(), file_args=[dir_root])
+    assert pl.read_csv(manifest[0].path).columns == ["id"]
+
+
+def test_writer_transform_append_and_delta(tmp_path):
+    # the projected out column doesn't leak through the append and delta paths
+    writer = Writer(format="csv", transform_exclude=["name", "empty"])
+    path = tmp_path / "append.csv"
+    with writer.open_append(path) as session:
+        session.write(df)
+        session.write(df)
+    df1 = pl.read_csv(path)
+    assert df1.height == 2 * df.height
+    assert df1.columns == ["id", "delta", "big", "ratio", "price", "country"]
+
+    writer = Writer(
+        format="delta",
+        transform_exclude=["name", "empty"],
+        transform_casts={"id": "Int32"},
+    )
+    table = str(tmp_path / "delta_append")
+    with writer.open_delta_append(table, max_rows=None) as buffer:
+        buffer.write(df.head(10))
+        buffer.write(df.tail(10))
+    df1 = writer.read(file_args=[table])
+    assert df1.height == 20
+    assert "name" not in df1.columns
+    assert df1.schema["id"] == pl.Int32
+
+    table = str(tmp_path / "upsert")
+    writer.upsert(df.head(10), table, keys=["id"])
+    writer.upsert(df.slice(5, 10), table, keys=["id"])
+    df1 = writer.read(file_args=[table])
+    assert df1.height == 15
+    assert "name" not in df1.columns
+    assert df1.schema["id"] == pl.Int32
+
+
+if __name__ == "__main__":
+    from polars_writer.tests import run_cov_test
+
+    run_cov_test(__file__, "polars_writer.transform", preview=False)
@@ -4,8 +4,14 @@ import pytest
 import io
 import shutil
 from pathlib import Path
+from unittest.mock import patch
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from polars_writer.writer import Writer
+from polars_writer.transform import transform_frame
+from polars_writer.hooks import hook_registry
+from polars_writer.compression import decompress
 
 
 dir_here = Path(__file__).absolute().parent
@@ -24,6 +30,12 @@ class TestWriter:
             writer = Writer(format="parquet", parquet_compression="invalid")
         with pytest.raises(ValueError):
             writer = Writer(format="delta", delta_mode="invalid")
+        with pytest.raises(ValueError):
+            writer = Writer(format="csv", max_rows_per_file=0)
+        with pytest.raises(ValueError):
+            writer = Writer(format="csv", csv_compression="invalid")
+        with pytest.raises(ValueError):
+            writer = Writer(format="delta", max_rows_per_file=100)
 
         writer = Writer(format="csv")
         kwargs = writer.to_kwargs()
@@ -87,6 +99,553 @@ class TestWriter:
         df2 = writer.scan(file_args=[str(dir_tmp)]).collect()
         assert df2.to_dicts() == df.to_dicts()
 
+    def test_write_parquet_options(self):
+        df = pl.DataFrame({"id": list(range(1000))})
+        writer = Writer(
+            format="parquet",
+            parquet_row_group_size=100,
+            parquet_statistics=False,
+        )
+        method, kwargs = writer.to_method_and_kwargs()
+        assert kwargs == {"row_group_size": 100, "statistics": False}
+
+        buffer = io.BytesIO()
+        writer.write(df, file_args=[buffer])
+        metadata = pq.read_metadata(pa.BufferReader(buffer.getvalue()))
+        assert metadata.num_row_groups == 10
+        assert metadata.row_group(0).column(0).is_stats_set is False
+        df1 = writer.read(file_args=[buffer.getvalue()])
+        assert df1.to_dicts() == df.to_dicts()
+
+    def test_write_partitioned(self):
+        df = pl.DataFrame(
+            {
+                "year": [2023, 2023, 2024, 2024, None],
+                "tag": ["a", "b", "a", "a/b", "c"],
+                "value": [1, 2, 3, 4, 5],
+            }
+        )
+        dir_root = dir_tmp / "partitioned"
+        shutil.rmtree(dir_root, ignore_errors=True)
+
+        with pytest.raises(ValueError):
+            Writer(format="csv").write_partitioned(df, dir_root)
+        with pytest.raises(ValueError):
+            Writer(format="parquet").write_partitioned(df, dir_root)
+
+        writer = Writer(format="parquet", parquet_partition_by=["year", "tag"])
+        paths = writer.write_partitioned(df, dir_root, max_workers=4)
+        assert len(paths) == 5
+        assert all(path.exists() for path in paths)
+        assert dir_root.joinpath("year=2024", "tag=a%2Fb", "00000000.parquet") in paths
+        assert dir_root.joinpath(
+            "year=__HIVE_DEFAULT_PARTITION__", "tag=c", "00000000.parquet"
+        ) in paths
+
+        df1 = pl.scan_parquet(
+            f"{dir_root}/**/*.parquet", hive_partitioning=True
+        ).collect()
+        assert sorted(df1["value"].to_list()) == [1, 2, 3, 4, 5]
+
+        # split partition into multiple chunks
+        dir_root = dir_tmp / "partitioned_chunk"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(
+            format="parquet",
+            parquet_partition_by="year",
+            parquet_partition_chunk_size_bytes=16,
+        )
+        paths = writer.write_partitioned(df, dir_root)
+        assert len(paths) > 3
+        df1 = pl.scan_parquet(
+            f"{dir_root}/**/*.parquet", hive_partitioning=True
+        ).collect()
+        assert sorted(df1["value"].to_list()) == [1, 2, 3, 4, 5]
+
+        # never more chunks than rows, no empty file
+        dir_root = dir_tmp / "partitioned_small_chunk"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(
+            format="parquet",
+            parquet_partition_by="year",
+            parquet_partition_chunk_size_bytes=8,
+        )
+        paths = writer.write_partitioned(df, dir_root)
+        assert len(paths) == df.height
+        assert all(pl.read_parquet(path).height == 1 for path in paths)
+
+    def test_write_many(self):
+        dfs = [pl.DataFrame({"id": [i, i + 1]}) for i in range(20)]
+        dir_root = dir_tmp / "write_many"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        dir_root.mkdir()
+        items = [
+            (df, [dir_root / f"{ith}.parquet"]) for ith, df in enumerate(dfs)
+        ]
+        # this one will fail, the parent folder doesn't exist
+        items.append((dfs[0], [dir_root / "not-exists" / "0.parquet"]))
+        # the same DataFrame object can be written concurrently
+        items.extend([(dfs[1], [dir_root / f"dup-{ith}.parquet"]) for ith in range(4)])
+
+        writer = Writer(format="parquet")
+        results = writer.write_many(items, max_workers=4, ordered=True)
+        assert [res.index for res in results] == list(range(25))
+        assert all(res.is_succeeded for res in results[:20])
+        assert results[20].is_failed
+        assert all(res.is_succeeded for res in results[21:])
+        for df, res in zip(dfs, results):
+            assert writer.read(file_args=res.file_args).to_dicts() == df.to_dicts()
+
+        results = writer.write_many(
+            items,
+            write_kwargs={"compression": "snappy"},
+            max_workers=4,
+        )
+        assert sorted(res.index for res in results) == list(range(25))
+        assert sum(res.is_failed for res in results) == 1
+
+        # rolling output and hooks, same as write
+        events = list()
+        hook_registry.register_on_end(lambda event, res: events.append(res))
+        try:
+            writer = Writer(format="csv", max_rows_per_file=1)
+            results = writer.write_many(
+                [(dfs[0], [dir_root / "rolling"])], ordered=True
+            )
+        finally:
+            hook_registry.clear()
+        manifest = results[0].result
+        assert [f.path.name for f in manifest] == ["part-00000.csv", "part-00001.csv"]
+        assert len(events) == 1
+        assert events[0].n_rows == 2
+
+        # the method and kwargs are resolved once for the whole batch
+        writer = Writer(format="parquet", parquet_sort_by="id")
+        with patch.object(
+            Writer, "_resolve_write", autospec=True,
+            side_effect=Writer._resolve_write,
+        ) as spy:
+            results = writer.write_many(items[:20])
+        assert all(res.is_succeeded for res in results)
+        assert spy.call_count == 1
+
+        # a plain config goes straight to the polars write method
+        writer = Writer(format="csv")
+        assert writer._is_direct is True
+        assert Writer(format="parquet", parquet_sort_by="id")._is_direct is False
+        with patch.object(Writer, "_prepare", autospec=True) as spy:
+            buffer = io.BytesIO()
+            writer.write(items[0][0], file_args=[buffer])
+        assert spy.call_count == 0
+        assert buffer.getvalue()
+
+    def test_fan_out(self):
+        df = pl.DataFrame(
+            {
+                "id": list(range(100)),
+                "country": ["US", "CA"] * 50,
+                "name": [f"n{i}" for i in range(100)],
+            }
+        )
+        dir_root = dir_tmp / "fan_out"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        dir_root.mkdir()
+        transform = dict(transform_exclude=["name"], transform_shrink=True)
+        parquet_writer = Writer(format="parquet", **transform)
+        ndjson_writer = Writer(format="ndjson", **transform)
+        sorted_writer = Writer(format="parquet", parquet_sort_by="id", **transform)
+        targets = [
+            (parquet_writer, [dir_root / "data.parquet"]),
+            (Writer(format="csv"), [dir_root / "data.csv"]),
+            (ndjson_writer, [dir_root / "data.ndjson"]),
+            (sorted_writer, [dir_root / "sorted.parquet"]),
+            # this one will fail, the parent folder doesn't exist
+            (Writer(format="csv"), [dir_root / "not-exists" / "data.csv"]),
+        ]
+        with patch(
+            "polars_writer.writer.transform_frame", wraps=transform_frame
+        ) as spy:
+            results = Writer.fan_out(
+                df.sample(fraction=1, shuffle=True, seed=1), targets
+            )
+        assert [res.index for res in results] == list(range(5))
+        assert all(res.is_succeeded for res in results[:4])
+        assert results[4].is_failed
+
+        # the targets with the same transform config share one transform,
+        # the sorted one transforms its own sorted copy
+        assert spy.call_count == 2
+        for i in [0, 2, 3]:
+            assert results[i].result.transform.dtypes == {
+                "id": "Int8",
+                "country": "Categorical",
+            }
+        assert results[1].result.transform is None
+        assert [res.result.n_columns for res in results[:4]] == [2, 3, 2, 2]
+
+        expected = df.select("id", "country")
+        for writer, file_args in targets[:4]:
+            df1 = writer.read(file_args=file_args).sort("id")
+            assert df1.select(pl.col("id").cast(pl.Int64), "country").equals(
+                expected.with_columns(pl.col("country").cast(df1["country"].dtype))
+            )
+        assert pl.read_parquet(dir_root / "sorted.parquet")["id"].is_sorted()
+        assert Writer.fan_out(df, []) == []
+
+    def test_write_rolling(self):
+        df = pl.DataFrame({"id": list(range(10)), "name": [f"n{i}" for i in range(10)]})
+
+        dir_root = dir_tmp / "rolling_csv"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(format="csv", max_rows_per_file=4)
+        manifest = writer.write(df, file_args=[dir_root])
+        assert [f.path.name for f in manifest] == [
+            "part-00000.csv",
+            "part-00001.csv",
+            "part-00002.csv",
+        ]
+        assert [f.n_rows for f in manifest] == [4, 4, 2]
+        # header is repeated in every file
+        for f in manifest:
+            assert f.path.read_text().startswith("id,name")
+        df1 = pl.concat([writer.read(file_args=[f.path]) for f in manifest])
+        assert df1.to_dicts() == df.to_dicts()
+
+        dir_root = dir_tmp / "rolling_parquet"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(
+            format="parquet",
+            max_bytes_per_file=df.estimated_size() // 3,
+            file_name_template="data-{index}.{ext}",
+        )
+        assert writer.get_rows_per_file(df) == 3
+        manifest = writer.write(df, file_args=[dir_root])
+        assert manifest[0].path.name == "data-0.parquet"
+        assert len(manifest) == 4
+        df1 = pl.concat([writer.read(file_args=[f.path]) for f in manifest])
+        assert df1.to_dicts() == df.to_dicts()
+
+        # empty DataFrame still produces one file
+        dir_root = dir_tmp / "rolling_empty"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(format="ndjson", max_rows_per_file=4)
+        manifest = writer.write(df.clear(), file_args=[dir_root])
+        assert len(manifest) == 1
+        assert manifest[0].n_rows == 0
+
+        # streaming
+        dir_root = dir_tmp / "rolling_sink"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(format="ndjson", max_rows_per_file=3)
+        manifest = writer.sink(df.lazy(), file_args=[dir_root])
+        assert [f.n_rows for f in manifest] == [3, 3, 3, 1]
+        df1 = pl.concat([writer.read(file_args=[f.path]) for f in manifest])
+        assert df1.to_dicts() == df.to_dicts()
+        # the temporary result is removed
+        assert sorted(p.name for p in dir_root.iterdir()) == [
+            f.path.name for f in manifest
+        ]
+
+        # the query runs only once, not once per file
+        calls = list()
+
+        def udf(batch: pl.DataFrame) -> pl.DataFrame:
+            calls.append(batch.height)
+            return batch
+
+        dir_root = dir_tmp / "rolling_sink_once"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(format="csv", max_rows_per_file=3)
+        lf = df.lazy().map_batches(udf, streamable=True)
+        manifest = writer.sink(lf, file_args=[dir_root])
+        assert len(manifest) == 4
+        assert sum(calls) == df.height
+
+        # only max_bytes_per_file, collect and write_rolling
+        dir_root = dir_tmp / "rolling_sink_bytes"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        writer = Writer(format="ndjson", max_bytes_per_file=df.estimated_size() // 3)
+        with pytest.raises(ValueError):
+            writer.sink(df.lazy(), file_args=[dir_root], collect_fallback=False)
+        manifest = writer.sink(df.lazy(), file_args=[dir_root])
+        assert [f.n_rows for f in manifest] == [3, 3, 3, 1]
+        df1 = pl.concat([writer.read(file_args=[f.path]) for f in manifest])
+        assert df1.to_dicts() == df.to_dicts()
+
+    def test_open_append(self):
+        df = pl.DataFrame({"id": [1, 2], "name": ["alice", "bob"]})
+
+        with pytest.raises(ValueError):
+            Writer(format="parquet").open_append(dir_tmp / "append.parquet")
+
+        path = dir_tmp / "append.csv"
+        path.unlink(missing_ok=True)
+        writer = Writer(format="csv")
+        with writer.open_append(path) as session:
+            session.write(df)
+            session.write(df)
+        assert session.closed
+        assert session.n_rows == 4
+        assert session.n_batches == 2
+        with pytest.raises(ValueError):
+            session.write(df)
+        # existing file, header is not written again
+        with writer.open_append(path) as session:
+            session.write(df)
+        assert path.read_text().count("id,name") == 1
+        df1 = writer.read(file_args=[path])
+        assert df1.to_dicts() == pl.concat([df, df, df]).to_dicts()
+
+        # re-opened session on a new file, header is written again
+        session = writer.open_append(path)
+        session.open()
+        session.close()
+        session.path = dir_tmp / "append_new.csv"
+        session.path.unlink(missing_ok=True)
+        with session:
+            session.write(df)
+        assert session.path.read_text().count("id,name") == 1
+        assert writer.read(file_args=[session.path]).to_dicts() == df.to_dicts()
+
+        path = dir_tmp / "append.ndjson"
+        path.unlink(missing_ok=True)
+        writer = Writer(format="ndjson")
+        for _ in range(2):
+            with writer.open_append(path) as session:
+                session.write(df)
+                session.flush()
+        df1 = writer.read(file_args=[path])
+        assert df1.to_dicts() == pl.concat([df, df]).to_dicts()
+
+    @pytest.mark.parametrize("compression", ["gzip", "zstd", "lz4"])
+    def test_text_compression(self, compression):
+        if compression == "zstd":
+            pytest.importorskip("zstandard")
+        if compression == "lz4":
+            pytest.importorskip("lz4")
+        df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+
+        for format in ["csv", "json", "ndjson"]:
+            writer = Writer(
+                format=format,
+                **{
+                    f"{format}_compression": compression,
+                    f"{format}_compression_level": 1,
+                },
+            )
+            assert writer.is_text_compressed()
+            assert writer.has_sink() is False
+
+            buffer = io.BytesIO()
+            writer.write(df, file_args=[buffer])
+            b = buffer.getvalue()
+            plain_buffer = io.BytesIO()
+            Writer(format=format).write(df, file_args=[plain_buffer])
+            assert decompress(b, compression) == plain_buffer.getvalue()
+            assert writer.read(file_args=[b]).to_dicts() == df.to_dicts()
+
+            path = dir_tmp / f"compressed.{writer.get_file_ext()}"
+            writer.write(df, file_args=[path])
+            assert writer.read(file_args=[path]).to_dicts() == df.to_dicts()
+            if format != "json":
+                df1 = writer.scan(file_args=[path]).collect()
+                assert df1.to_dicts() == df.to_dicts()
+
+            # sink falls back to collect + write
+            writer.sink(df.lazy(), file_args=[path])
+            assert writer.read(file_args=[path]).to_dicts() == df.to_dicts()
+
+        # append compressed batches
+        writer = Writer(format="csv", csv_compression=compression)
+        path = dir_tmp / f"append.{writer.get_file_ext()}"
+        path.unlink(missing_ok=True)
+        for _ in range(2):
+            with writer.open_append(path) as session:
+                session.write(df)
+        df1 = writer.read(file_args=[path])
+        assert df1.to_dicts() == pl.concat([df, df]).to_dicts()
+
+        # rolling output
+        writer = Writer(
+            format="ndjson",
+            ndjson_compression=compression,
+            max_rows_per_file=2,
+        )
+        dir_root = dir_tmp / f"rolling_{compression}"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        manifest = writer.write(df, file_args=[dir_root])
+        assert manifest[0].path.name.startswith("part-00000.ndjson.")
+        df1 = pl.concat([writer.read(file_args=[f.path]) for f in manifest])
+        assert df1.to_dicts() == df.to_dicts()
+
+    def test_sink(self):
+        df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+        lf = df.lazy()
+
+        for writer in [
+            Writer(format="csv"),
+            Writer(format="ndjson"),
+            Writer(format="parquet", parquet_compression="zstd"),
+        ]:
+            path = dir_tmp / f"sink.{writer.format}"
+            writer.sink(lf, file_args=[path])
+            assert writer.read(file_args=[path]).to_dicts() == df.to_dicts()
+
+        writer = Writer(format="csv")
+        path = dir_tmp / "sink.tsv"
+        writer.sink(lf, file_args=[path], sink_kwargs={"separator": "\t"})
+        df1 = writer.read(file_args=[path], read_kwargs={"separator": "\t"})
+        assert df1.to_dicts() == df.to_dicts()
+
+        # json doesn't support sink, fallback to collect + write
+        writer = Writer(format="json")
+        with pytest.raises(ValueError):
+            writer.to_sink_method_and_kwargs()
+        with pytest.raises(ValueError):
+            writer.sink(lf, file_args=[dir_tmp / "sink.json"], collect_fallback=False)
+        path = dir_tmp / "sink.json"
+        writer.sink(lf, file_args=[path])
+        assert writer.read(file_args=[path]).to_dicts() == df.to_dicts()
+
+        writer = Writer(format="delta")
+        with pytest.raises(ValueError):
+            writer.to_sink_method_and_kwargs()
+
+        # the parquet sink can't partition or use pyarrow, sink falls back to
+        # collect + write, the same output as write
+        for config in [
+            dict(parquet_partition_by="name"),
+            dict(parquet_use_pyarrow=True),
+            dict(parquet_pyarrow_options={"write_statistics": False}),
+        ]:
+            writer = Writer(format="parquet", **config)
+            assert writer.has_sink() is False
+            with pytest.raises(ValueError):
+                writer.sink(lf, file_args=[dir_tmp / "x"], collect_fallback=False)
+        writer = Writer(format="parquet", parquet_partition_by="name")
+        dir_write = dir_tmp / "partitioned_write"
+        dir_sink = dir_tmp / "partitioned_sink"
+        for dir_root in [dir_write, dir_sink]:
+            shutil.rmtree(dir_root, ignore_errors=True)
+        writer.write(df, file_args=[dir_write])
+        writer.sink(lf, file_args=[dir_sink])
+        assert dir_sink.is_dir()
+        assert sorted(
+            p.relative_to(dir_sink) for p in dir_sink.rglob("*.parquet")
+        ) == sorted(p.relative_to(dir_write) for p in dir_write.rglob("*.parquet"))
+        df1 = pl.read_parquet(dir_sink, hive_partitioning=True)
+        assert sorted(df1.select("id", "name").rows()) == sorted(df.rows())
+
+    def test_ipc(self):
+        df = pl.DataFrame({"id": [1, 2, 3], "name": ["alice", "bob", "cathy"]})
+        with pytest.raises(ValueError):
+            Writer(format="ipc", ipc_compression="gzip")
+        with pytest.raises(ValueError):
+            Writer(format="ipc_stream", ipc_stream_compression="snappy")
+
+        for compression in ["uncompressed", "lz4", "zstd"]:
+            writer = Writer(format="ipc", ipc_compression=compression)
+            assert writer.get_file_ext() == "arrow"
+            path = dir_tmp / f"data-{compression}.arrow"
+            writer.write(df, file_args=[path])
+            assert writer.read(file_args=[path]).equals(df)
+            assert writer.scan(file_args=[path]).collect().equals(df)
+            assert writer.compile_read().execute([path]).equals(df)
+
+            buffer = io.BytesIO()
+            writer = Writer(format="ipc_stream", ipc_stream_compression=compression)
+            assert writer.get_file_ext() == "arrows"
+            writer.write(df, file_args=[buffer])
+            assert writer.read(file_args=[buffer.getvalue()]).equals(df)
+
+        # local files are memory mapped by default
+        _, kwargs = Writer(format="ipc").to_read_method_and_kwargs()
+        assert kwargs == {"memory_map": True}
+        _, kwargs = Writer(format="ipc", ipc_compression="zstd").to_read_method_and_kwargs()
+        assert kwargs == {"memory_map": False}
+        kwargs = Writer(format="ipc", ipc_memory_map=False).to_scan_kwargs()
+        assert kwargs == {"memory_map": False}
+
+        # sink ipc, uncompressed unless configured
+        writer = Writer(format="ipc")
+        _, kwargs = writer.to_sink_method_and_kwargs()
+        assert kwargs == {"compression": None}
+        path = dir_tmp / "sink.arrow"
+        writer.sink(df.lazy(), file_args=[path])
+        assert writer.read(file_args=[path]).equals(df)
+
+        # ipc_stream doesn't support scan and sink, the pushdown is applied
+        # after the read
+        writer = Writer(format="ipc_stream", read_columns=["name"])
+        assert writer.has_scan() is False
+        assert writer.has_sink() is False
+        with pytest.raises(ValueError):
+            writer.to_scan_method_and_kwargs()
+        with pytest.raises(ValueError):
+            writer.to_sink_method_and_kwargs()
+        path = dir_tmp / "data.arrows"
+        writer.write(df, file_args=[path])
+        assert writer.read(file_args=[path]).columns == ["name"]
+
+        # rolling output
+        writer = Writer(format="ipc", max_rows_per_file=2)
+        dir_root = dir_tmp / "ipc_rolling"
+        shutil.rmtree(dir_root, ignore_errors=True)
+        manifest = writer.write(df, file_args=[dir_root])
+        assert [f.path.name for f in manifest] == ["part-00000.arrow", "part-00001.arrow"]
+
+    def test_to_bytes_and_iter_bytes(self):
+        df = pl.DataFrame({"id": list(range(10)), "name": [f"n{i}" for i in range(10)]})
+
+        for writer in [
+            Writer(format="csv"),
+            Writer(format="csv", csv_include_header=False),
+            Writer(format="json"),
+            Writer(format="ndjson"),
+            Writer(format="csv", csv_compression="gzip"),
+            Writer(format="json", json_compression="zstd"),
+            Writer(format="ndjson", ndjson_compression="lz4"),
+            Writer(format="parquet"),
+            Writer(format="ipc"),
+            Writer(format="ipc_stream"),
+        ]:
+            buffer = io.BytesIO()
+            writer.write(df, file_args=[buffer])
+            data = writer.to_bytes(df)
+            assert isinstance(data, memoryview)
+            assert writer.read(file_args=[bytes(data)]).rows() == df.rows()
+
+            chunks = list(writer.iter_bytes(df, chunk_rows=3))
+            assert writer.read(file_args=[b"".join(chunks)]).rows() == df.rows()
+            if writer.is_text_compressed() is False:
+                assert b"".join(chunks) == bytes(data) == buffer.getvalue()
+
+        writer = Writer(format="csv")
+        chunks = list(writer.iter_bytes(df, chunk_rows=4))
+        assert chunks[0] == b"id,name\n0,n0\n1,n1\n2,n2\n3,n3\n"
+        assert chunks[1] == b"4,n4\n5,n5\n6,n6\n7,n7\n"
+        assert len(chunks) == 3
+
+        writer = Writer(format="json")
+        chunks = list(writer.iter_bytes(df.head(4), chunk_rows=2))
+        assert chunks == [
+            b'[{"id":0,"name":"n0"},{"id":1,"name":"n1"}',
+            b',{"id":2,"name":"n2"},{"id":3,"name":"n3"}',
+            b"]",
+        ]
+        assert b"".join(writer.iter_bytes(df.head(0))) == b"[]"
+
+        assert list(Writer(format="csv").iter_bytes(df.head(0))) == [b"id,name\n"]
+        assert list(Writer(format="ndjson").iter_bytes(df.head(0))) == []
+        assert bytes(
+            Writer(format="csv").to_bytes(df, write_kwargs={"separator": "\t"})
+        ).startswith(b"id\tname\n")
+
+        with pytest.raises(ValueError):
+            Writer(format="delta").to_bytes(df)
+        with pytest.raises(ValueError):
+            list(Writer(format="csv").iter_bytes(df, chunk_rows=0))
+
 
 if __name__ == "__main__":
     from polars_writer.tests import run_cov_test